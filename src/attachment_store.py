@@ -0,0 +1,43 @@
+import threading
+
+ATTACHMENT_STORE_LAYOUTS = ('copy', 'shared', 'hardlink')
+
+
+class AttachmentStore:
+    """
+    Record of the attachment files placed in the export folder in a run, keyed on the md5 of their content.
+
+    Attachments in an NSX file are identified by the md5 of their content, so the first attachment with a given md5
+    is extracted from the nsx file and every later attachment with the same md5, on any note, can use or link to that
+    file instead of being extracted again.
+
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._paths_by_md5 = {}
+
+    def path_for(self, md5):
+        """Return the path of the file already placed for md5, or None if there is not one."""
+        with self._lock:
+            return self._paths_by_md5.get(md5)
+
+    def add(self, md5, path):
+        """
+        Record path as the file for md5 and return it, if a file has already been recorded for md5 that path is
+        returned instead.
+        """
+        with self._lock:
+            return self._paths_by_md5.setdefault(md5, path)
+
+    def reset(self):
+        with self._lock:
+            self._paths_by_md5.clear()
+
+
+_attachment_store = AttachmentStore()
+
+
+def attachment_store():
+    """Return the attachment store shared by the whole run."""
+    return _attachment_store
@@ -0,0 +1,142 @@
+"""Write chart data as csv and as a html table without creating a pandas DataFrame
+
+The output is the same as the DataFrame to_csv and to_html methods gave for chart data, so pandas is only imported
+when a chart image is drawn.  Each column is given the type pandas would give it, whole numbers, decimal numbers or
+text, as that decides how its values are written.
+
+"""
+import csv
+import html
+import io
+import math
+import re
+
+_INTEGER = 'integer'
+_FLOAT = 'float'
+_TEXT = 'text'
+
+_PRECISION = 6  # pandas display.precision
+_NUMBER_WITH_DECIMAL = re.compile(r'^\s*[+-]?[0-9]+\.[0-9]*$')
+_CONTROL_CHARACTERS = {ord('\t'): r'\t', ord('\n'): r'\n', ord('\r'): r'\r'}
+
+
+def chart_data_csv(column_labels, row_labels, rows):
+    """Return the chart data as a csv string with a header row of column_labels and row_labels as the first column."""
+    kinds = _column_kinds(rows, len(column_labels))
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator='\n')
+    writer.writerow([''] + list(column_labels))
+    for row_label, row in zip(row_labels, rows):
+        writer.writerow([row_label] + [_csv_value(value, kind) for value, kind in zip(row, kinds)])
+
+    return output.getvalue()
+
+
+def chart_data_html_table(column_labels, row_labels, rows, formatters=None):
+    """
+    Return the chart data as a html table with the column and row labels in bold header cells.
+
+    formatters is an optional dictionary of column label to a function that formats each value in that column.
+    """
+    formatters = formatters or {}
+    kinds = _column_kinds(rows, len(column_labels))
+    columns = [_html_column([row[index] for row in rows], kind, formatters.get(label))
+               for index, (label, kind) in enumerate(zip(column_labels, kinds))]
+
+    header_cells = ''.join(_header_cell(label) for label in [''] + list(column_labels))
+    body_rows = ''.join(f'<tr>{_header_cell(row_label)}'
+                        f'{"".join(_data_cell(column[index]) for column in columns)}</tr>'
+                        for index, row_label in enumerate(row_labels))
+
+    return (f'<table border="1" class="dataframe"><thead><tr style="text-align: right;">{header_cells}</tr></thead>'
+            f'<tbody>{body_rows}</tbody></table>')
+
+
+def _column_kinds(rows, number_of_columns):
+    return [_column_kind([row[index] for row in rows]) for index in range(number_of_columns)]
+
+
+def _column_kind(values):
+    if any(isinstance(value, bool) or not isinstance(value, (int, float, type(None))) for value in values):
+        return _TEXT
+    if all(value is None for value in values):
+        return _TEXT
+    if all(isinstance(value, int) for value in values):
+        return _INTEGER
+    return _FLOAT
+
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def _csv_value(value, kind):
+    if _is_missing(value):
+        return ''
+    if kind == _FLOAT:
+        return repr(float(value))
+    return value
+
+
+def _html_column(values, kind, formatter):
+    if formatter is not None:
+        return [formatter(value) for value in values]
+    if kind == _INTEGER:
+        return [str(value) for value in values]
+    if kind == _FLOAT:
+        return _html_float_column(values)
+    return [_html_text_value(value) for value in values]
+
+
+def _html_text_value(value):
+    if value is None:
+        return 'None'
+    if _is_missing(value):
+        return 'NaN'
+    if isinstance(value, float):
+        text = f'{value:.{_PRECISION}f}'.rstrip('0')
+        return f'{text}0' if text.endswith('.') else text
+    return str(value)
+
+
+def _html_float_column(values):
+    """Format a column of numbers the way pandas does, to the same number of decimal places down the column."""
+    numbers = [value for value in values if not _is_missing(value)]
+    formatted = _format_floats(values, 'f')
+    longest = max((len(value) for value in formatted), default=0)
+    has_large_values = any(abs(number) > 1e6 for number in numbers)
+    has_small_values = any(0 < abs(number) < 10 ** -_PRECISION for number in numbers)
+    if has_small_values or (longest > _PRECISION + 6 and has_large_values):
+        formatted = _format_floats(values, 'e')
+
+    return [value.strip() for value in formatted]
+
+
+def _format_floats(values, presentation):
+    formatted = ['NaN' if _is_missing(value) else f'{float(value): .{_PRECISION}{presentation}}' for value in values]
+    return _trim_zeros(formatted)
+
+
+def _trim_zeros(values):
+    """Remove trailing zeros that every decimal value has, leaving at least one digit after the decimal point."""
+    def should_trim(values_to_check):
+        numbers = [value for value in values_to_check if _NUMBER_WITH_DECIMAL.match(value)]
+        return len(numbers) > 0 and all(value.endswith('0') for value in numbers)
+
+    while should_trim(values):
+        values = [value[:-1] if _NUMBER_WITH_DECIMAL.match(value) else value for value in values]
+
+    return [f'{value}0' if _NUMBER_WITH_DECIMAL.match(value) and value.endswith('.') else value for value in values]
+
+
+def _header_cell(label):
+    return f'<th><strong>{_cell_text(label)}</strong></th>'
+
+
+def _data_cell(value):
+    return f'<td>{_cell_text(value)}</td>'
+
+
+def _cell_text(value):
+    text = str(value).translate(_CONTROL_CHARACTERS)
+    return html.escape(text, quote=False).strip()
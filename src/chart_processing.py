@@ -1,15 +1,18 @@
 from abc import ABC, abstractmethod
 import ast
+from functools import lru_cache
+import hashlib
+import importlib.metadata
 import io
+import json
 import logging
-import re
-
-from bs4 import BeautifulSoup
-import matplotlib.pyplot as pyplot
-import pandas as pd
+import math
+from pathlib import Path
 
+from chart_data_table import chart_data_csv, chart_data_html_table
+from chart_rendering import get_chart_image_cache, render_chart_png
 import config
-from helper_functions import add_strong_between_tags
+from placeholders import make_placeholder, PlaceholderRegistry
 from sn_attachment import ChartStringNSAttachment, ChartImageNSAttachment
 
 
@@ -17,6 +20,21 @@ def what_module_is_this():
     return __name__
 
 
+@lru_cache(maxsize=None)
+def _matplotlib_version():
+    # read from the installed package metadata so matplotlib is not imported when a cached chart image is used
+    try:
+        return importlib.metadata.version('matplotlib')
+    except importlib.metadata.PackageNotFoundError:
+        # frozen builds do not include the package metadata
+        import matplotlib
+        return matplotlib.__version__
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
 class ChartProcessor(ABC):
     """
     Abstract class for processing chart content in html that can not be converted by pandoc.
@@ -29,8 +47,9 @@ class ChartProcessor(ABC):
     Attributes
     ----------
     note : Note object
-    html : str
-        string containing html code to be parsed for charts and modified with replacement chart content
+    html : str or BeautifulSoup
+        string containing html code to be parsed for charts and modified with replacement chart content, or an
+        already parsed page which is modified in place
     create_image : bool
         If True will create a pbg image of the chart and add to html
     create_csv : bool
@@ -42,6 +61,8 @@ class ChartProcessor(ABC):
     -------
     process_charts()
         Process the html content and generate the required html content and attachments.
+    add_chart_elements_to(html)
+        Replace the chart placeholders in serialised html with the new chart elements.
 
     """
     def __init__(self, note, html, create_image=True, create_csv=True, create_data_table=True):
@@ -52,16 +73,25 @@ class ChartProcessor(ABC):
         self._create_image = create_image
         self._create_csv = create_csv
         self._create_data_table = create_data_table
-        self._processed_html = self._raw_html
-        self._soup = BeautifulSoup(self._raw_html, 'html.parser')
+        from bs4 import BeautifulSoup  # bs4 is only imported when a page has to be parsed
+        if isinstance(html, BeautifulSoup):
+            self._soup = html
+        else:
+            self._soup = BeautifulSoup(self._raw_html, 'html.parser')
+        self._placeholders = PlaceholderRegistry()
+        self._new_chart_elements_by_key = {}
         self._attachments = {}
         self._charts = []  # used for regression testing
         self._chart_config = {}
+        self._image_cache = None
+        if config.chart_cache:
+            self._image_cache = get_chart_image_cache(Path(note.conversion_settings.working_directory, config.DATA_DIR,
+                                                           'cache', 'charts'))
         self.process_charts()
 
     @property
     def processed_html(self):
-        return self._processed_html
+        return self.add_chart_elements_to(str(self._soup))
 
     @abstractmethod
     def _find_all_charts(self):  # pragma: no cover
@@ -72,31 +102,63 @@ class ChartProcessor(ABC):
         Process the provided html content and generate replacement chart elements.
 
         Html is parsed for charts, charts are analysed for formatting and data. Replacement chart elements are
-        created.  Replace the original chart html with new elements
+        created.  Each chart in the parsed html is replaced with a placeholder, the placeholders are replaced with the
+        new elements by add_chart_elements_to once the html has been serialised.
+
+        Charts are identified by a hash of their configuration, data and the elements being created.  The hash is used
+        to name the chart files so they have the same names on every run, and a chart that is the same as one earlier
+        in the page re-uses its elements.
 
         """
         chart_tags = self._find_all_charts()
 
         for tag in chart_tags:
-            self._fetch_chart_config_from_html(tag)
-            chart = self._create_chart_object()
-            self._charts.append(chart)
-            self._set_chart_config(chart)
-            self._retrieve_chart_data(tag, chart)
-            self._create_required_replacement_chart_elements(chart)
-            self._add_new_chart_elements_to_html(tag, chart)
-
-    def _add_new_chart_elements_to_html(self, tag, chart):
-        search_for = str(tag)
-        replace_with = self._new_chart_elements_html(chart)
-        self._processed_html = self._processed_html.replace(search_for, replace_with)
+            chart_key = self._chart_key(tag)
+            if chart_key not in self._new_chart_elements_by_key:
+                self._fetch_chart_config_from_html(tag)
+                chart = self._create_chart_object()
+                chart.key = chart_key
+                self._charts.append(chart)
+                self._set_chart_config(chart)
+                self._retrieve_chart_data(tag, chart)
+                self._create_required_replacement_chart_elements(chart)
+                self._new_chart_elements_by_key[chart_key] = self._new_chart_elements_html(chart)
+
+            self._add_new_chart_elements_to_html(tag, self._new_chart_elements_by_key[chart_key])
+
+    def _add_new_chart_elements_to_html(self, tag, new_chart_elements):
+        placeholder_text = make_placeholder('chart', tag)
+        self._placeholders.add(placeholder_text, new_chart_elements)
+        tag.replace_with(placeholder_text)
+
+    def _chart_key(self, tag):
+        chart_description = json.dumps([self._chart_source(tag), self._create_image, self._create_csv,
+                                        self._create_data_table])
+        return hashlib.sha256(chart_description.encode('utf-8')).hexdigest()
+
+    def add_chart_elements_to(self, html):
+        """
+        Replace the chart placeholders with the new chart elements.
+
+        Parameters
+        ----------
+        html : str
+            Serialised html containing the chart placeholders
+
+        Returns
+        -------
+        str:
+            html with the new chart elements in place of the placeholders
+
+        """
+        return self._placeholders.restore(html)
 
     def _new_chart_elements_html(self, chart):
         elements_to_add = ''
         if self._create_image:
-            elements_to_add = elements_to_add + f"<p>{self._note.attachments[f'{id(chart)}.png'].html_link}</p>"
+            elements_to_add = elements_to_add + f"<p>{self._note.attachments[f'{chart.file_stem}.png'].html_link}</p>"
         if self._create_csv:
-            elements_to_add = elements_to_add + f"<p>{self._note.attachments[f'{id(chart)}.csv'].html_link}</p>"
+            elements_to_add = elements_to_add + f"<p>{self._note.attachments[f'{chart.file_stem}.csv'].html_link}</p>"
         if self._create_data_table:
             elements_to_add = elements_to_add + f"<p>{chart.html_chart_data_table}</p>"
 
@@ -104,7 +166,7 @@ class ChartProcessor(ABC):
 
     def _create_required_replacement_chart_elements(self, chart):
         if self._create_image:
-            chart.plot_chart()
+            chart.plot_chart(self._image_cache)
             self._generate_png_attachment(chart)
 
         if self._create_csv:
@@ -114,6 +176,11 @@ class ChartProcessor(ABC):
         if self._create_data_table:
             chart.make_html_chart_data_table()
 
+    @abstractmethod
+    def _chart_source(self, tag):  # pragma: no cover
+        """Return the text in the chart tag that defines the chart."""
+        pass
+
     @abstractmethod
     def _create_chart_object(self):  # pragma: no cover
         pass
@@ -133,17 +200,17 @@ class ChartProcessor(ABC):
 
     def _generate_csv_attachment(self, chart):
         self.logger.debug("Generate chart csv file")
-        self._note.attachments[f"{id(chart)}.csv"] = ChartStringNSAttachment(self._note, f"{id(chart)}.csv",
-                                                                             chart.csv_chart_data_string)
-        self._note.attachments[f"{id(chart)}.csv"].process_attachment()
+        self._note.attachments[f"{chart.file_stem}.csv"] = ChartStringNSAttachment(self._note, f"{chart.file_stem}.csv",
+                                                                                   chart.csv_chart_data_string)
+        self._note.attachments[f"{chart.file_stem}.csv"].process_attachment()
         self._note.attachment_count += 1
 
     def _generate_png_attachment(self, chart):
         self.logger.debug("Generate chart image attachment")
 
-        self._note.attachments[f"{id(chart)}.png"] = ChartImageNSAttachment(self._note, f"{id(chart)}.png",
-                                                                            chart.png_img_buffer)
-        self._note.attachments[f"{id(chart)}.png"].process_attachment()
+        self._note.attachments[f"{chart.file_stem}.png"] = ChartImageNSAttachment(self._note, f"{chart.file_stem}.png",
+                                                                                  chart.png_img_buffer)
+        self._note.attachments[f"{chart.file_stem}.png"].process_attachment()
         self._note.image_count += 1
 
     @property
@@ -156,7 +223,7 @@ class ChartProcessor(ABC):
             self.logger.setLevel(config.logger_level)
             self._chart_type = str
             self._title = str
-            self._df = None
+            self._data = []
             self._x_axis_title = str
             self._y_axis_title = str
             self.x_category_labels = []
@@ -165,11 +232,47 @@ class ChartProcessor(ABC):
             self._html_chart_data_table = str
             self._chart_fig = None
             self._png_img_buffer = None
+            self.key = ''
+
+        @property
+        def file_stem(self):
+            """Name of the chart files without the extension, the same on every run for the same chart."""
+            return f'chart-{self.key[:16]}'
+
+        @property
+        def image_cache_key(self):
+            return hashlib.sha256(f'{_matplotlib_version()}\0{self.key}'.encode('utf-8')).hexdigest()
+
+        def plot_chart(self, image_cache=None):
+            self.prepare_chart_data()
+            self._png_img_buffer = render_chart_png(self, image_cache)
+
+        def prepare_chart_data(self):
+            pass
 
         @abstractmethod
-        def plot_chart(self):  # pragma: no cover
+        def draw_chart(self, fig):  # pragma: no cover
             pass
 
+        def render_png(self):
+            """
+            Draw the chart on a new figure with the non-interactive Agg backend and return the png image data.
+
+            The figure is not created with pyplot so it is never held by the pyplot figure manager, and it is cleared
+            once the image has been saved.
+            """
+            # matplotlib is only imported when a chart is drawn, as it slows the start of every run
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            from matplotlib.figure import Figure
+
+            fig = Figure()
+            FigureCanvasAgg(fig)
+            try:
+                self.draw_chart(fig)
+                return self.fig_to_img_buf(fig).getvalue()
+            finally:
+                fig.clear()
+
         @staticmethod
         def fig_to_img_buf(fig):
             """Convert a Matplotlib figure to png format in an io.Bytes buffer and return it"""
@@ -186,20 +289,23 @@ class ChartProcessor(ABC):
             ax.spines['left'].set_visible(False)
             return ax
 
-        def set_title_and_axes(self, ax):
+        def set_title_and_axes(self, ax, df):
             ax.set_title(self._x_axis_title, y=-0.15, fontdict=None)
             ax.set_ylabel(self._y_axis_title)
-            ax.set_ylim(self._df.min().min() * 0.9, self._df.max().max() * 1.1)
+            ax.set_ylim(df.min().min() * 0.9, df.max().max() * 1.1)
             return ax
 
+        def data_frame(self):
+            """Return the chart data as a pandas DataFrame for drawing the chart."""
+            import pandas as pd  # pandas is only imported when a chart is drawn, as it slows the start of every run
+            return pd.DataFrame(self._data, columns=self.x_category_labels, index=self.y_category_labels)
+
         def make_html_chart_data_table(self):
-            self._html_chart_data_table = self._df.to_html(formatters={'percent': '{:,.2f}'.format})
-            self._html_chart_data_table = self._html_chart_data_table.replace('\n', '')
-            self._html_chart_data_table = re.sub(r">\s*<", '><', self._html_chart_data_table)
-            self._html_chart_data_table = add_strong_between_tags('<th>', '</th>', self._html_chart_data_table)
+            self._html_chart_data_table = chart_data_html_table(self.x_category_labels, self.y_category_labels,
+                                                                self._data, formatters={'percent': '{:,.2f}'.format})
 
         def make_csv_chart_data_string(self):
-            self._csv_chart_data_string = self._df.to_csv()
+            self._csv_chart_data_string = chart_data_csv(self.x_category_labels, self.y_category_labels, self._data)
 
         def set_x_axis_title(self, value):
             self._x_axis_title = value
@@ -210,8 +316,9 @@ class ChartProcessor(ABC):
         def set_title(self, value):
             self._title = value
 
-        def set_df(self, value):
-            self._df = value
+        def set_data(self, rows):
+            """Set the chart data, a list of rows with a value for each of the x category labels."""
+            self._data = rows
 
         @property
         def csv_chart_data_string(self):
@@ -227,44 +334,48 @@ class ChartProcessor(ABC):
 
     class PieChart(Chart):
         def __format_data_for_pie_chart(self):
-            self._df["sum"] = self._df.sum(axis=1)
-            self._df["percent"] = self._df["sum"] / self._df["sum"].sum() * 100
+            numeric_columns = [index for index in range(len(self.x_category_labels))
+                               if all(_is_number(row[index]) for row in self._data)]
+            row_sums = [sum(row[index] for index in numeric_columns) for row in self._data]
+            total = sum(row_sums)
+            self.x_category_labels = self.x_category_labels + ['sum', 'percent']
+            self._data = [row + [row_sum, row_sum / total * 100 if total else math.nan]
+                          for row, row_sum in zip(self._data, row_sums)]
+
+        def prepare_chart_data(self):
+            self.__format_data_for_pie_chart()
 
-        def plot_chart(self):
+        def draw_chart(self, fig):
             self.logger.debug("Creating pie chart")
-            self.__format_data_for_pie_chart()
-            explode = [0.02 for _ in range(len(self._df.index))]
-            fig, ax = pyplot.subplots()
-            pyplot.title(self._title)
-            pyplot.gca().axis("equal")
-            pie = pyplot.pie(self._df['sum'], autopct='%1.2f%%', pctdistance=1.2, explode=explode)
+            df = self.data_frame()
+            explode = [0.02 for _ in range(len(df.index))]
+            ax = fig.subplots()
+            ax.set_title(self._title)
+            ax.axis("equal")
+            pie = ax.pie(df['sum'], autopct='%1.2f%%', pctdistance=1.2, explode=explode)
             labels = self.y_category_labels
-            pyplot.legend(pie[0], labels, bbox_to_anchor=(1, 1), loc="upper right",
-                          bbox_transform=pyplot.gcf().transFigure)
-            self._png_img_buffer = self.fig_to_img_buf(fig)
+            ax.legend(pie[0], labels, bbox_to_anchor=(1, 1), loc="upper right", bbox_transform=fig.transFigure)
 
     class LineChart(Chart):
-        def plot_chart(self):
+        def draw_chart(self, fig):
             self.logger.debug("Creating line chart")
-            df_transposed = self._df.copy().T
-            fig2, ax = pyplot.subplots()
-            ax = self.set_title_and_axes(ax)
+            df = self.data_frame()
+            df_transposed = df.copy().T
+            ax = fig.subplots()
+            ax = self.set_title_and_axes(ax, df)
             ax = self.remove_chart_frame(ax)
             x_ticks = [x for x in range(len(df_transposed.index))]
-            plot = df_transposed.plot(kind='line', grid=True, ax=ax, rot=0, xticks=x_ticks, title=self._title)
-            fig = plot.get_figure()
-            self._png_img_buffer = self.fig_to_img_buf(fig)
+            df_transposed.plot(kind='line', grid=True, ax=ax, rot=0, xticks=x_ticks, title=self._title)
 
     class BarChart(Chart):
-        def plot_chart(self):
+        def draw_chart(self, fig):
             self.logger.debug("Creating bar chart")
-            df_transposed = self._df.copy().T
-            fig2, ax = pyplot.subplots()
-            ax = self.set_title_and_axes(ax)
+            df = self.data_frame()
+            df_transposed = df.copy().T
+            ax = fig.subplots()
+            ax = self.set_title_and_axes(ax, df)
             ax = self.remove_chart_frame(ax)
-            plot = df_transposed.plot(kind='bar', grid=True, ax=ax, rot=0, title=self._title)
-            fig = plot.get_figure()
-            self._png_img_buffer = self.fig_to_img_buf(fig)
+            df_transposed.plot(kind='bar', grid=True, ax=ax, rot=0, title=self._title)
 
 
 class NSXChartProcessor(ChartProcessor):
@@ -273,6 +384,9 @@ class NSXChartProcessor(ChartProcessor):
         self.logger.debug("Searching for charts")
         return self._soup.select('div.syno-ns-chart-object')
 
+    def _chart_source(self, tag):
+        return [tag.attrs['chart-config'], tag.attrs['chart-data']]
+
     def _fetch_chart_config_from_html(self, tag):
         self.logger.debug("Reading chart configuration")
         chart_config = tag.attrs['chart-config']
@@ -286,7 +400,7 @@ class NSXChartProcessor(ChartProcessor):
         raw_data = ast.literal_eval(raw_data)
         chart.x_category_labels = raw_data.pop(0)[1:]
         chart.y_category_labels = [item.pop(0) for item in raw_data]
-        chart.set_df(pd.DataFrame(raw_data, columns=chart.x_category_labels, index=chart.y_category_labels))
+        chart.set_data(raw_data)
 
     def _set_chart_config(self, chart):
         chart.set_title(self._chart_config['title'])
@@ -0,0 +1,197 @@
+from contextlib import ExitStack
+from io import BufferedIOBase, BytesIO
+import logging
+import os
+from pathlib import Path
+import pickle
+import tempfile
+import threading
+
+import config
+from worker_processes import worker_process_pool
+
+logger = logging.getLogger(f'{config.APP_NAME}.{__name__}')
+logger.setLevel(config.logger_level)
+
+
+class PendingChartImage(BufferedIOBase):
+    """
+    Binary file-like object for the png image of a chart that is being rendered in a worker process.
+
+    Reading waits for the image to be rendered, so the image can be passed to file_writer.store_file as soon as the
+    chart has been submitted and conversion of the note can continue while the chart is rendered.
+    """
+
+    def __init__(self, future):
+        super().__init__()
+        self._future = future
+        self._buffer = None
+
+    def _rendered_image(self):
+        if self._buffer is None:
+            self._buffer = BytesIO(self._future.result())
+        return self._buffer
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        return self._rendered_image().read(size)
+
+    def getvalue(self):
+        return self._rendered_image().getvalue()
+
+
+class ChartRenderPool:
+    """
+    Render chart images in a pool of worker processes, started when the first chart is submitted.
+    """
+
+    def __init__(self, number_of_processes):
+        self._number_of_processes = number_of_processes
+        self._lock = threading.Lock()
+        self._exit_stack = ExitStack()
+        self._executor = None
+
+    def submit(self, chart):
+        with self._lock:
+            if self._executor is None:
+                logger.debug(f"Starting {self._number_of_processes} chart rendering processes")
+                self._executor = self._exit_stack.enter_context(worker_process_pool(self._number_of_processes))
+            # the chart is pickled now, the executor would otherwise pickle it later while the note is still changing it
+            return self._executor.submit(_render_png, pickle.dumps(chart))
+
+    def finish(self):
+        """Wait for all submitted charts to be rendered and stop the worker processes."""
+        with self._lock:
+            self._exit_stack.close()
+            self._executor = None
+
+
+def _render_png(pickled_chart):
+    return pickle.loads(pickled_chart).render_png()
+
+
+class ChartImageCache:
+    """
+    An on disk cache of chart png images, one file per chart in folder named by the chart's image cache key.
+
+    Images are written to a temporary file that is then renamed, so a run that is stopped part way through, or two
+    runs sharing the cache, never leave a partly written image in the cache.
+
+    """
+
+    def __init__(self, folder):
+        self._folder = Path(folder)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return the cached png image for key as bytes, or None if the image is not in the cache."""
+        try:
+            image = Path(self._folder, f'{key}.png').read_bytes()
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return image
+
+    def put(self, key, image):
+        try:
+            self._folder.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=self._folder, suffix='.tmp', delete=False) as temporary_file:
+                temporary_file.write(image)
+            os.replace(temporary_file.name, Path(self._folder, f'{key}.png'))
+        except OSError as exc:
+            logger.warning(f"Unable to write to chart image cache {self._folder} - {exc}")
+
+
+_chart_image_caches = {}
+_worker_process_statistics = [0, 0]
+
+
+def get_chart_image_cache(folder):
+    """Return the chart image cache stored in folder, every chart processor in a run shares one cache per folder."""
+    folder = str(folder)
+    if folder not in _chart_image_caches:
+        _chart_image_caches[folder] = ChartImageCache(folder)
+
+    return _chart_image_caches[folder]
+
+
+def chart_cache_statistics():
+    """
+    Return the total number of cache hits and misses for the chart image caches used in this run, including those used
+    in worker processes.
+    """
+    caches = list(_chart_image_caches.values())
+    return (sum(cache.hits for cache in caches) + _worker_process_statistics[0],
+            sum(cache.misses for cache in caches) + _worker_process_statistics[1])
+
+
+def add_chart_cache_statistics(hits, misses):
+    """Add the chart image cache hits and misses of a worker process to the statistics for this run."""
+    _worker_process_statistics[0] += hits
+    _worker_process_statistics[1] += misses
+
+
+_chart_render_pool = None
+
+
+def start_chart_rendering(number_of_processes):
+    """
+    Render charts passed to render_chart_png in number_of_processes worker processes until finish_chart_rendering is
+    called.  The worker processes are started when the first chart is submitted.
+    """
+    global _chart_render_pool
+    if _chart_render_pool is not None:
+        return
+    _chart_render_pool = ChartRenderPool(number_of_processes)
+
+
+def render_chart_png(chart, image_cache=None):
+    """
+    Return a binary file-like object of the png image of chart.
+
+    If image_cache is given and holds the image of the chart the cached image is returned without drawing the chart,
+    otherwise the rendered image is added to the cache.  The chart is rendered now unless start_chart_rendering has
+    been called, in which case it is rendered in a worker process and reading the returned object waits for the image.
+    """
+    if image_cache is not None:
+        image = image_cache.get(chart.image_cache_key)
+        if image is not None:
+            return BytesIO(image)
+
+    if _chart_render_pool is None:
+        image = chart.render_png()
+        if image_cache is not None:
+            image_cache.put(chart.image_cache_key, image)
+        return BytesIO(image)
+
+    future = _chart_render_pool.submit(chart)
+    if image_cache is not None:
+        future.add_done_callback(_cache_rendered_image(image_cache, chart.image_cache_key))
+    return PendingChartImage(future)
+
+
+def _cache_rendered_image(image_cache, key):
+    def cache_image(future):
+        if future.cancelled() or future.exception() is not None:
+            return
+        image_cache.put(key, future.result())
+
+    return cache_image
+
+
+def finish_chart_rendering():
+    """Wait for charts still being rendered and go back to rendering charts as render_chart_png is called."""
+    global _chart_render_pool
+    if _chart_render_pool is None:
+        return
+
+    _chart_render_pool.finish()
+    _chart_render_pool = None
@@ -2,9 +2,8 @@ from abc import ABC, abstractmethod
 import logging
 import re
 
-from bs4 import BeautifulSoup
-
 import config
+from placeholders import make_placeholder, PlaceholderRegistry
 
 
 def what_module_is_this():
@@ -21,7 +20,7 @@ class ChecklistItem:
         self.__create_placeholder_text()
 
     def __create_placeholder_text(self):
-        self._placeholder_text = f'checklist-placeholder-id-{str(id(self))}'
+        self._placeholder_text = make_placeholder('checklist', self)
 
     def generate_markdown_item_text(self):
         tabs = '\t' * self._indent
@@ -49,18 +48,26 @@ class ChecklistItem:
 
 
 class ChecklistProcessor(ABC):
-    def __init__(self, html):
+    def __init__(self, html, placeholders=None):
         self.logger = logging.getLogger(f'{config.APP_NAME}.{what_module_is_this()}.{self.__class__.__name__}')
         self.logger.setLevel(config.logger_level)
         self._raw_html = html
-        self._processed_html = ''
         self._list_of_checklist_items = []
-        self._soup = BeautifulSoup(self._raw_html, 'html.parser')
+        # placeholders may be shared with other processing of the same page so all are restored together
+        if placeholders is None:
+            placeholders = PlaceholderRegistry(remove_leading_spaces=True)
+        self._placeholders = placeholders
+        # an already parsed page is processed in place so it is not parsed again
+        from bs4 import BeautifulSoup  # bs4 is only imported when a page has to be parsed
+        if isinstance(html, BeautifulSoup):
+            self._soup = html
+        else:
+            self._soup = BeautifulSoup(self._raw_html, 'html.parser')
         self.__checklist_pre_processing()
 
     @property
     def processed_html(self):
-        return self._processed_html
+        return str(self._soup)
 
     @property
     def list_of_checklist_items(self):
@@ -85,8 +92,6 @@ class ChecklistProcessor(ABC):
 
         self.__calculate_indents_and_generate_cleaned_checklist_items()
 
-        self._processed_html = str(self._soup)
-
     def __calculate_indents_and_generate_cleaned_checklist_items(self):
         self.logger.debug("Generate cleaned checklists")
         set_of_indents = {item.indent for item in self._list_of_checklist_items}
@@ -98,14 +103,11 @@ class ChecklistProcessor(ABC):
         for item in self._list_of_checklist_items:
             item.indent = indent_level_lookup[item.indent]
             item.generate_markdown_item_text()
+            self._placeholders.add(item.placeholder_text, f'{item.markdown_item_text}\n')
 
     def add_checklist_items_to(self, markdown_text):
         self.logger.debug(f"Add checklists to page")
-        for item in self._list_of_checklist_items:
-            search_for = rf'\ *{item.placeholder_text}'   # removing leading spaces as would stop markdown working
-            replace_with = f'{item.markdown_item_text}\n'
-            markdown_text = re.sub(search_for, replace_with, markdown_text)
-        return markdown_text
+        return self._placeholders.restore(markdown_text)
 
     @abstractmethod
     def find_all_checklist_items(self):  # pragma: no cover
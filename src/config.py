@@ -6,6 +6,32 @@ global logger_level
 logger_level = 20  # INFO
 global silent
 silent = False
+global workers
+workers = 1
+global batch_size
+batch_size = 1
+global pandoc_server
+pandoc_server = False
+global pandoc_cache
+pandoc_cache = False
+global pandoc_cache_size
+pandoc_cache_size = 256  # MB
+global write_behind
+write_behind = False
+global write_queue_size
+write_queue_size = 64
+global stream_notes
+stream_notes = False
+global incremental
+incremental = False
+global attachment_store
+attachment_store = 'copy'
+global processes
+processes = 1
+global chart_processes
+chart_processes = 0  # charts are rendered in the conversion process
+global chart_cache
+chart_cache = False
 
 
 def set_logger_level(level: int):
@@ -16,3 +42,82 @@ def set_logger_level(level: int):
 def set_silent(silent_mode: bool):
     global silent
     silent = silent_mode
+
+
+def set_workers(number_of_workers: int):
+    global workers
+    workers = number_of_workers
+
+
+def set_batch_size(number_of_notes: int):
+    global batch_size
+    batch_size = number_of_notes
+
+
+def set_pandoc_server(use_pandoc_server: bool):
+    global pandoc_server
+    pandoc_server = use_pandoc_server
+
+
+def set_pandoc_cache(use_pandoc_cache: bool):
+    global pandoc_cache
+    pandoc_cache = use_pandoc_cache
+
+
+def set_pandoc_cache_size(size_in_mb: int):
+    global pandoc_cache_size
+    pandoc_cache_size = size_in_mb
+
+
+def set_write_behind(use_write_behind: bool):
+    global write_behind
+    write_behind = use_write_behind
+
+
+def set_write_queue_size(number_of_files: int):
+    global write_queue_size
+    write_queue_size = number_of_files
+
+
+def set_stream_notes(use_stream_notes: bool):
+    global stream_notes
+    stream_notes = use_stream_notes
+
+
+def set_incremental(use_incremental: bool):
+    global incremental
+    incremental = use_incremental
+
+
+def set_attachment_store(layout: str):
+    global attachment_store
+    attachment_store = layout
+
+
+def set_processes(number_of_processes: int):
+    global processes
+    processes = number_of_processes
+
+
+def set_chart_processes(number_of_processes: int):
+    global chart_processes
+    chart_processes = number_of_processes
+
+
+def set_chart_cache(use_chart_cache: bool):
+    global chart_cache
+    chart_cache = use_chart_cache
+
+
+_RUN_SETTINGS = ('logger_level', 'silent', 'workers', 'batch_size', 'pandoc_server', 'pandoc_cache',
+                 'pandoc_cache_size', 'write_behind', 'write_queue_size', 'stream_notes', 'incremental',
+                 'attachment_store', 'processes', 'chart_processes', 'chart_cache')
+
+
+def run_settings():
+    """Return the values set by the functions above, so worker processes can be given the same settings."""
+    return {name: globals()[name] for name in _RUN_SETTINGS}
+
+
+def apply_run_settings(settings: dict):
+    globals().update({name: value for name, value in settings.items() if name in _RUN_SETTINGS})
@@ -4,7 +4,6 @@ from pathlib import Path
 import sys
 
 import config
-from interactive_cli import InvalidConfigFileCommandLineInterface
 from conversion_settings import ConversionSettings
 
 
@@ -85,6 +84,7 @@ class ConfigData(ConfigParser):
             return False
 
     def ask_user_to_choose_new_default_config_file(self):
+        from interactive_cli import InvalidConfigFileCommandLineInterface  # only imported when the cli is used
         ask_what_to_do = InvalidConfigFileCommandLineInterface()
         what_to_do = ask_what_to_do.run_cli()
         if what_to_do == 'exit':
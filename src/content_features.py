@@ -0,0 +1,79 @@
+from collections import Counter
+import logging
+import re
+import threading
+
+import config
+
+
+def what_module_is_this():
+    return __name__
+
+
+_FEATURE_PATTERN = re.compile(r'<(?:iframe|table|input)\b|syno-notestation-editor-checkbox|syno-ns-chart-object',
+                              re.IGNORECASE)
+
+
+class ContentFeatures:
+    """
+    Record which html constructs that require pre-processing are present in a page.
+
+    The page is scanned once with a single regular expression so stages with nothing to do can be skipped without
+    parsing the page or searching it again.  The scan is case insensitive and does not check the tags are well formed,
+    so it may report a construct the stage then does not find but will not miss one the stage would find.
+
+    """
+
+    def __init__(self, html):
+        self.logger = logging.getLogger(f'{config.APP_NAME}.{what_module_is_this()}.{self.__class__.__name__}')
+        self.logger.setLevel(config.logger_level)
+        self._found = {match.group(0).lower() for match in _FEATURE_PATTERN.finditer(html)}
+        self.logger.debug(f"Content features found {sorted(self._found)}")
+
+    @property
+    def has_iframes(self):
+        return '<iframe' in self._found
+
+    @property
+    def has_tables(self):
+        return '<table' in self._found
+
+    @property
+    def has_checkboxes(self):
+        return '<input' in self._found
+
+    @property
+    def has_nsx_checklists(self):
+        return 'syno-notestation-editor-checkbox' in self._found
+
+    @property
+    def has_nsx_charts(self):
+        return 'syno-ns-chart-object' in self._found
+
+
+_skipped_stages = Counter()
+_skipped_stages_lock = threading.Lock()
+
+
+def record_skipped_stage(stage):
+    with _skipped_stages_lock:
+        _skipped_stages[stage] += 1
+
+
+def skipped_stage_counts():
+    """
+    Return a dictionary of the number of times each pre-processing stage has been skipped in this run.
+    """
+    with _skipped_stages_lock:
+        return dict(_skipped_stages)
+
+
+def add_skipped_stage_counts(counts):
+    """Add the skipped stage counts of a worker process to the counts for this run."""
+    with _skipped_stages_lock:
+        _skipped_stages.update(counts)
+
+
+def reset_skipped_stage_counts():
+    with _skipped_stages_lock:
+        _skipped_stages.clear()
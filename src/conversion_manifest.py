@@ -0,0 +1,216 @@
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+
+import config
+from path_allocator import path_allocator
+
+
+def what_module_is_this():
+    return __name__
+
+
+MANIFEST_FILE_NAME = '.yanom-manifest.json'
+MANIFEST_VERSION = 1
+
+# conversion settings that change the content of converted notes
+_SETTINGS_IN_HASH = ('export_format', 'front_matter_format', 'metadata_schema', 'tag_prefix', 'spaces_in_tags',
+                     'split_tags', 'first_row_as_header', 'first_column_as_header', 'chart_image', 'chart_csv',
+                     'chart_data_table', 'attachment_folder_name', 'creation_time_in_exported_file_name')
+
+# fields of a manifest entry that must be the same for a note to be unchanged, attachment paths are not compared
+_FIELDS_COMPARED = ('mtime', 'content_hash', 'links_hash', 'settings_hash', 'output_path')
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def settings_hash(conversion_settings):
+    settings = {name: str(getattr(conversion_settings, name)) for name in _SETTINGS_IN_HASH}
+    return text_hash(json.dumps(settings, sort_keys=True))
+
+
+class ConversionManifest:
+    """
+    Record of the notes converted into an export folder, used to convert only new and changed notes on the next run.
+
+    Each entry is keyed on note id and holds the note's mtime, a hash of its content, a hash of the links generated to
+    other notes, a hash of the conversion settings, the output path, the md5 and path of each attachment and the paths
+    of files generated from the note, such as chart images.  Paths are relative to the export folder.  A note is
+    unchanged if these, other than the paths, are the same as the previous run and its output file still exists.  A
+    note linking to a note that has been renamed or moved has different links so is converted again.
+
+    """
+
+    def __init__(self, export_folder):
+        self.logger = logging.getLogger(f'{config.APP_NAME}.{what_module_is_this()}.{self.__class__.__name__}')
+        self.logger.setLevel(config.logger_level)
+        self._export_folder = Path(export_folder)
+        self._manifest_file = Path(self._export_folder, MANIFEST_FILE_NAME)
+        self._previous_entries = {}
+        self._entries = {}
+        self.unchanged_count = 0
+
+    def load(self):
+        try:
+            manifest = json.loads(self._manifest_file.read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as exc:
+            self.logger.warning(f"Unable to read conversion manifest {self._manifest_file} - {exc}")
+            return
+
+        if not isinstance(manifest, dict) or manifest.get('version') != MANIFEST_VERSION:
+            self.logger.warning(f"Conversion manifest {self._manifest_file} is not a supported version, "
+                                f"all notes will be converted")
+            return
+
+        self._previous_entries = manifest.get('notes', {})
+        self.logger.debug(f"Loaded conversion manifest {self._manifest_file} with "
+                          f"{len(self._previous_entries)} notes")
+
+    def release_previous_outputs(self):
+        """
+        Record the files and folders written by the previous run as free to be used again, so notes and notebooks
+        are given the same paths as before instead of numbered copies.
+        """
+        for path in self._paths_in(self._previous_entries):
+            path_allocator().release(path)
+            path_allocator().release(path.parent)
+
+    def reserve_previous_outputs(self, note_id):
+        """
+        Record the files written by the previous run for an unchanged note as in use, so notes that are converted again
+        are not given the paths of files the unchanged note still links to.
+        """
+        for path in self._paths_in({str(note_id): self._previous_entries[str(note_id)]}):
+            path_allocator().reserve(path)
+
+    def make_entry(self, note_page, links_html):
+        return {
+            'mtime': str(note_page.note_json.get('mtime', '')),
+            'content_hash': text_hash(note_page.raw_content),
+            'links_hash': text_hash(json.dumps(sorted(links_html.items()))),
+            'settings_hash': settings_hash(note_page.conversion_settings),
+            'output_path': self._relative_path(note_page.full_path),
+            'attachments': {attachment_id: {'md5': attachment.get('md5', '')}
+                            for attachment_id, attachment in note_page.note_json.get('attachment', {}).items()},
+        }
+
+    def is_unchanged(self, note_id, entry):
+        previous_entry = self._previous_entries.get(str(note_id))
+        if previous_entry is None:
+            return False
+
+        if any(previous_entry.get(field) != entry[field] for field in _FIELDS_COMPARED):
+            return False
+
+        previous_md5s = {attachment_id: attachment.get('md5')
+                         for attachment_id, attachment in previous_entry.get('attachments', {}).items()}
+        current_md5s = {attachment_id: attachment['md5'] for attachment_id, attachment in entry['attachments'].items()}
+        if previous_md5s != current_md5s:
+            return False
+
+        return Path(self._export_folder, entry['output_path']).exists()
+
+    def record(self, note_id, entry, attachments):
+        """
+        Add the entry for a converted note, attachments is the dictionary of attachment objects of the note.
+        """
+        entry['generated_files'] = []
+        for attachment_id, attachment in attachments.items():
+            if attachment_id in entry['attachments']:
+                entry['attachments'][attachment_id]['path'] = self._relative_path(attachment.full_path)
+            else:
+                entry['generated_files'].append(self._relative_path(attachment.full_path))
+        self._entries[str(note_id)] = entry
+
+    def record_unchanged(self, note_id):
+        self._entries[str(note_id)] = self._previous_entries[str(note_id)]
+        self.unchanged_count += 1
+
+    def remove_stale_outputs(self):
+        """
+        Delete files written by the previous run for notes that have been deleted, or whose note or attachments have
+        moved, and are not used by this run.  Folders left empty are removed.
+        """
+        paths_in_use = set(self._paths_in(self._entries))
+        stale_paths = [path for path in self._paths_in(self._previous_entries) if path not in paths_in_use]
+        for path in stale_paths:
+            try:
+                path.unlink()
+                path_allocator().release(path)
+            except FileNotFoundError:
+                pass
+            except OSError as exc:
+                self.logger.warning(f"Unable to remove {path} - {exc}")
+
+        folders = sorted({folder for path in stale_paths for folder in path.parents
+                          if self._export_folder in folder.parents}, key=lambda folder: len(folder.parts), reverse=True)
+        for folder in folders:
+            try:
+                folder.rmdir()
+                path_allocator().release(folder)
+            except OSError:
+                pass  # the folder is not empty
+
+        if stale_paths:
+            self.logger.info(f"Removed {len(stale_paths)} files no longer in use from {self._export_folder}")
+
+    def save(self):
+        manifest = {'version': MANIFEST_VERSION, 'notes': self._entries}
+        temporary_file = self._manifest_file.with_name(f'{self._manifest_file.name}.tmp')
+        try:
+            temporary_file.write_text(json.dumps(manifest, indent=1, sort_keys=True), encoding='utf-8')
+            os.replace(temporary_file, self._manifest_file)
+        except OSError as exc:
+            self.logger.warning(f"Unable to save conversion manifest {self._manifest_file} - {exc}")
+
+    def _relative_path(self, path):
+        return Path(path).relative_to(self._export_folder).as_posix()
+
+    def _paths_in(self, entries):
+        for entry in entries.values():
+            yield Path(self._export_folder, entry['output_path'])
+            for attachment in entry.get('attachments', {}).values():
+                if 'path' in attachment:
+                    yield Path(self._export_folder, attachment['path'])
+            for generated_file in entry.get('generated_files', []):
+                yield Path(self._export_folder, generated_file)
+
+    @property
+    def entries(self):
+        return self._entries
+
+
+_conversion_manifests = {}
+
+
+def get_conversion_manifest(export_folder):
+    """
+    Return the conversion manifest for export_folder, loading it on first use.
+
+    Every NSX file converted into the same export folder in a run shares one manifest, so notes are only treated as
+    deleted if they are not in any of the NSX files.
+    """
+    export_folder = Path(export_folder)
+    if export_folder not in _conversion_manifests:
+        manifest = ConversionManifest(export_folder)
+        manifest.load()
+        manifest.release_previous_outputs()
+        _conversion_manifests[export_folder] = manifest
+
+    return _conversion_manifests[export_folder]
+
+
+def finish_conversion_manifests():
+    """
+    Remove the outputs of deleted notes and save the manifest of each export folder used in this run.
+    """
+    for manifest in _conversion_manifests.values():
+        manifest.remove_stale_outputs()
+        manifest.save()
+    _conversion_manifests.clear()
@@ -1,23 +1,40 @@
 from checklist_processing import HTMLInputMDOutputChecklistProcessor
+from content_features import ContentFeatures, record_skipped_stage
 from file_converter_abstract import FileConverter
 from metadata_processing import MetaDataProcessor
 
-from iframe_processing import pre_process_iframes_from_html, post_process_iframes_to_markdown
+from iframe_processing import pre_process_iframes_from_html
+from placeholders import PlaceholderRegistry
 
 
 class HTMLToMDConverter(FileConverter):
     def __init__(self, conversion_settings, files_to_convert):
         super().__init__(conversion_settings, files_to_convert)
         self._iframes_dict = {}
+        self._placeholders = PlaceholderRegistry(remove_leading_spaces=True)
 
     def pre_process_content(self):
         self.logger.debug(f'Pre-process HTML file {self._file}')
-        self._checklist_processor = HTMLInputMDOutputChecklistProcessor(self._file_content)
-        self._pre_processed_content = self._checklist_processor.processed_html
+        features = ContentFeatures(self._file_content)
+        self._checklist_processor = None
+        self._iframes_dict = {}
+        self._placeholders = PlaceholderRegistry(remove_leading_spaces=True)
+        self._pre_processed_content = self._file_content
+        if features.has_checkboxes:
+            self._checklist_processor = HTMLInputMDOutputChecklistProcessor(self._file_content, self._placeholders)
+            self._pre_processed_content = self._checklist_processor.processed_html
+        else:
+            self.logger.debug(f'Skipping checklists pre-processing, none found in {self._file}')
+            record_skipped_stage('checklists')
         self._pre_processed_content = self.update_note_links(self._pre_processed_content, 'html', 'md')
         self.parse_metadata_if_required()
-        self.logger.debug(f'Search for iframes')
-        self._pre_processed_content, self._iframes_dict = pre_process_iframes_from_html(self._pre_processed_content)
+        if features.has_iframes:
+            self.logger.debug(f'Search for iframes')
+            self._pre_processed_content, self._iframes_dict = pre_process_iframes_from_html(self._pre_processed_content,
+                                                                                            self._placeholders)
+        else:
+            self.logger.debug(f'Skipping iframes pre-processing, none found in {self._file}')
+            record_skipped_stage('iframes')
         self.rename_target_file_if_already_exists()
 
     def parse_metadata_if_required(self):
@@ -27,15 +44,15 @@ class HTMLToMDConverter(FileConverter):
     def post_process_content(self):
         self._post_processed_content = self._converted_content
         self.post_process_obsidian_image_links_if_required()
-        self.add_check_lists()
         self.add_meta_data_if_required()
-        if self._iframes_dict:
-            self.logger.debug(f'Add iframes to Markdown content')
-            self._post_processed_content = post_process_iframes_to_markdown(self._post_processed_content, self._iframes_dict)
+        self.add_check_lists_and_iframes()
         self.add_one_last_line_break()
 
-    def add_check_lists(self):
-        self._post_processed_content = self._checklist_processor.add_checklist_items_to(self._post_processed_content)
+    def add_check_lists_and_iframes(self):
+        if not self._placeholders:
+            return
+        self.logger.debug(f'Add checklists and iframes to Markdown content')
+        self._post_processed_content = self._placeholders.restore(self._post_processed_content)
 
     def add_one_last_line_break(self):
         self._post_processed_content = f'{self._post_processed_content}\n'
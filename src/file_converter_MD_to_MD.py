@@ -3,6 +3,17 @@ from metadata_processing import MetaDataProcessor
 
 
 class MDToMDConverter(FileConverter):
+    """
+    Convert markdown files to another markdown format without using pandoc.
+
+    The front matter and obsidian image links are the only parts of a file changed, so these are rewritten by the pre
+    and post processing and the rest of the content is passed through as it is.
+
+    """
+
+    def create_pandoc_converter(self):
+        return None
+
     def pre_process_content(self):
         self._pre_processed_content = self._file_content
         self.parse_metadata_if_required()
@@ -13,6 +24,10 @@ class MDToMDConverter(FileConverter):
         self._metadata_processor = MetaDataProcessor(self._conversion_settings)
         self._pre_processed_content = self._metadata_processor.parse_md_metadata(self._pre_processed_content)
 
+    def convert_content(self):
+        self.logger.info(f"Converting content of '{self._file}'")
+        self._converted_content = self._pre_processed_content
+
     def post_process_content(self):
         self._post_processed_content = self._pre_processed_content
         self.post_process_obsidian_image_links_if_required()
@@ -1,26 +1,40 @@
 from abc import ABC, abstractmethod
+from functools import lru_cache
+import html
 import logging
 from pathlib import Path
 import re
-
-from bs4 import BeautifulSoup
+import shutil
 
 import config
 import file_writer
 from image_processing import ObsidianImageTagFormatter
 from pandoc_converter import PandocConverter
+from path_allocator import path_allocator
 
 
 def what_module_is_this():
     return __name__
 
 
+_TAG_PATTERN = re.compile(r'<[a-zA-Z](?:"[^"]*"|\'[^\']*\'|[^\'">])*>')
+_HREF_PATTERN = re.compile(r'(\shref\s*=\s*)("[^"]*"|\'[^\']*\'|[^\s"\'>]+)', re.IGNORECASE)
+
+
+@lru_cache(maxsize=None)
+def _link_pattern(source_extension):
+    # extract the link without its extension, links to web pages are not renamed
+    return re.compile(fr'^((?!https).*)\.{re.escape(source_extension)}$')
+
+
 class FileConverter(ABC):
     def __init__(self, conversion_settings, files_to_convert):
         self.logger = logging.getLogger(f'{config.APP_NAME}.{what_module_is_this()}.{self.__class__.__name__}')
         self.logger.setLevel(config.logger_level)
         self._file = None
+        self._target_path = None
         self._files_to_convert = files_to_convert
+        self._file_names_to_convert = None
         self._file_content = ''
         self._meta_content = {}
         self._pre_processed_content = ''
@@ -28,7 +42,7 @@ class FileConverter(ABC):
         self._converted_content = ''
         self._conversion_settings = conversion_settings
         self._out_put_extension = self.set_out_put_file_extension()
-        self._pandoc_converter = PandocConverter(self._conversion_settings)
+        self._pandoc_converter = self.create_pandoc_converter()
         self._pre_processor = None
         self._checklist_processor = None
         self._image_processor = None
@@ -52,26 +66,51 @@ class FileConverter(ABC):
         pass
 
     def update_note_links(self, content, source_extension='', target_extension=''):
-        # create a basic file name filter to rename only those files that are being modified
-        # only compares file names not full paths.. so limited but will be enough for many cases
-        links_that_can_be_renamed = [Path(file).stem for file in self._files_to_convert]
+        """
+        Change the extension of links to files that are being converted from source_extension to target_extension.
+
+        Only file names are compared, not full paths, so this is limited but will be enough for many cases.  The
+        content is scanned once for tags with an href attribute and the rest of the content is left as it is.
+        """
+        link_pattern = _link_pattern(source_extension)
+        names_that_can_be_renamed = self._names_that_can_be_renamed()
+
+        def rename_link(href_match):
+            quoted_link = href_match.group(2)
+            quote = quoted_link[0] if quoted_link[0] in '"\'' else ''
+            link = link_pattern.match(html.unescape(quoted_link.strip(quote)))
+            if link is None or Path(link.group(1)).name not in names_that_can_be_renamed:
+                return href_match.group(0)
 
-        soup = BeautifulSoup(content, 'html.parser')
-        for a in soup.findAll(href=True):
-            link = re.search(fr'^((?!https).*).{source_extension}$', a['href'])  # extract the actual link
-            if link is not None:
-                if Path(str(link.group(1))).name in links_that_can_be_renamed:  # only names in list being processed
-                    a['href'] = str(link.group(1)) + '.' + target_extension
+            new_link = quoted_link.strip(quote)[:-len(source_extension)] + target_extension
+            return f'{href_match.group(1)}{quote}{new_link}{quote}'
 
-        return str(soup)
+        def rename_links_in_tag(tag_match):
+            return _HREF_PATTERN.sub(rename_link, tag_match.group(0))
+
+        return _TAG_PATTERN.sub(rename_links_in_tag, content)
+
+    def _names_that_can_be_renamed(self):
+        # built once, on first use, for all the files converted in the run
+        if self._file_names_to_convert is None:
+            self._file_names_to_convert = frozenset(Path(file).stem for file in self._files_to_convert)
+        return self._file_names_to_convert
+
+    def create_pandoc_converter(self):
+        return PandocConverter(self._conversion_settings)
 
     def set_out_put_file_extension(self):
         if self._conversion_settings.export_format == 'html':
             return '.html'
         return '.md'
 
-    def convert(self, file):
+    def convert(self, file, target_path=None):
+        """
+        Convert file and write the result to target_path, or if target_path is None to the file of the same name with
+        the output extension, moving aside any file already at that path.
+        """
         self._file = Path(file)
+        self._target_path = target_path
         self.read_file()
         self.pre_process_content()
         self.convert_content()
@@ -99,20 +138,44 @@ class FileConverter(ABC):
             self._post_processed_content = obsidian_image_link_formatter.processed_content
 
     def write_post_processed_content(self):
-        self.logger.info(f"Writing new file {self._file.stem + self._out_put_extension}")
-        absolute_path = self._file.parent / (self._file.stem + self._out_put_extension)
-        file_writer.write_text(absolute_path, self._post_processed_content)
+        absolute_path = self._target_path or self._default_target_path()
+        self.logger.info(f"Writing new file {absolute_path.name}")
+        file_writer.store_file(absolute_path, self._post_processed_content)
+
+    def allocate_target_path(self, file):
+        """
+        Return the path file will be converted to, moving aside any file already at that path.
+
+        When files are converted in worker processes the paths of every file are allocated in this process before the
+        files are sent to the workers, so each file is given a different path and no file is moved aside while
+        another worker is writing to that path.
+        """
+        self._file = Path(file)
+        self._target_path = None
+        # a file converted in place is read by a worker after this, so the old file is kept as a copy
+        move_file = shutil.copy2 if self._default_target_path() == self._file else Path.replace
+        self._move_aside_existing_target(move_file)
+        return self._default_target_path()
+
+    def _default_target_path(self):
+        return Path(self._file.parent, f'{self._file.stem}{self._out_put_extension}')
 
     def rename_target_file_if_already_exists(self):
-        n = 0
-        target_path = Path(self._file.parent, f'{self._file.stem}{self._out_put_extension}')
+        if self._target_path is not None:
+            return  # the path was allocated before the file was sent to a worker process
+
+        self._move_aside_existing_target(Path.replace)
+
+    def _move_aside_existing_target(self, move_file):
+        target_path = self._default_target_path()
 
-        if not target_path.exists():  # no need for renaming
+        if path_allocator().reserve(target_path):  # no need for renaming, the name is now reserved for the new file
             return
 
-        check_target_path = target_path
-        while check_target_path.exists():
-            n += 1
-            check_target_path = Path(self._file.parent, f'{self._file.stem}-old-{n}{self._out_put_extension}')
+        check_target_path = path_allocator().allocate(target_path, number_format='-old-{}')
 
-        target_path.replace(check_target_path)
+        try:
+            move_file(target_path, check_target_path)
+        except FileNotFoundError:
+            # the name was allocated earlier in this run but the file was never written
+            path_allocator().release(check_target_path)
@@ -0,0 +1,73 @@
+import content_features
+import pandoc_cache
+from worker_processes import worker_process_pool
+
+# the converter used by this worker process.  It holds only the settings shared by every file, each file is sent with
+# the path it is written to so nothing about one file is carried over to the next
+_file_converter = None
+
+MAX_FILES_PER_TASK = 64
+
+
+class FileConversionResult:
+    """
+    A file converted in a worker process and the statistics of its conversion, which are kept in the worker process
+    and have to be added to the statistics of the run by the process reporting on the run.
+    """
+
+    def __init__(self, file, cache_statistics, skipped_stage_counts):
+        self.file = file
+        self.cache_statistics = cache_statistics
+        self.skipped_stage_counts = skipped_stage_counts
+
+
+def convert_files_in_processes(file_converter, conversion_settings, files_to_convert, number_of_processes):
+    """
+    Convert html or markdown files at the same time on a pool of worker processes.
+
+    The path each file is written to is allocated by file_converter in this process, in the order of files_to_convert,
+    before any file is sent to a worker.  Worker processes do not share names allocated in the run so allocating them
+    here gives every file a different path and moves aside existing files before any worker writes a new one.
+
+    Each worker process creates one converter of the same class as file_converter and converts the files sent to it
+    one at a time.  Files are sent to the workers in small groups to reduce the cost of passing work between processes.
+
+    Parameters
+    ----------
+    file_converter : FileConverter
+        A file converter for the conversion settings, used to allocate the path of each converted file
+    conversion_settings : ConversionSettings
+        The conversion settings for all of the files
+    files_to_convert : list[pathlib.Path]
+        The files to convert
+    number_of_processes : int
+        The maximum number of files to convert at the same time
+
+    Yields
+    ------
+    FileConversionResult
+        The result for each file once it has been converted, in the order of files_to_convert
+
+    """
+    target_paths = [file_converter.allocate_target_path(file) for file in files_to_convert]
+    files_per_task = max(1, min(MAX_FILES_PER_TASK, len(files_to_convert) // (number_of_processes * 8)))
+    with worker_process_pool(number_of_processes, initializer=_create_file_converter,
+                             initargs=(type(file_converter), conversion_settings, files_to_convert)) as executor:
+        yield from executor.map(_convert_file, files_to_convert, target_paths, chunksize=files_per_task)
+
+
+def _create_file_converter(converter_class, conversion_settings, files_to_convert):
+    global _file_converter
+    _file_converter = converter_class(conversion_settings, files_to_convert)
+
+
+def _convert_file(file, target_path):
+    # a worker process converts several files, the statistics returned are for this file only
+    cache_hits_before, cache_misses_before = pandoc_cache.cache_statistics()
+    content_features.reset_skipped_stage_counts()
+
+    _file_converter.convert(file, target_path)
+
+    cache_hits, cache_misses = pandoc_cache.cache_statistics()
+    return FileConversionResult(file, (cache_hits - cache_hits_before, cache_misses - cache_misses_before),
+                                content_features.skipped_stage_counts())
@@ -1,29 +1,180 @@
-from io import BytesIO
+from io import BufferedIOBase, BytesIO
 import logging
+import os
 from pathlib import Path
+import queue
+import shutil
+import threading
 
 import config
 
 logger = logging.getLogger(f'{config.APP_NAME}.{__name__}')
 logger.setLevel(config.logger_level)
 
+STREAM_CHUNK_SIZE = 1024 * 1024
+WRITE_BEHIND_THREADS = 2
+
+
+class WriteBehindWriter:
+    """
+    Write files on a small pool of background threads so disk writes overlap with conversion.
+
+    Files waiting to be written are held in a queue of at most queue_size entries, when the queue is full submit waits
+    for a writer thread to take the next file, so memory use can not grow without limit.  Errors are collected and
+    returned when the writer is finished.
+
+    """
+
+    def __init__(self, queue_size, number_of_threads=WRITE_BEHIND_THREADS):
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._threads = [threading.Thread(target=self._write_files, name=f'file-writer-{n}', daemon=True)
+                         for n in range(number_of_threads)]
+        self._errors = []
+        self._errors_lock = threading.Lock()
+
+    def start(self):
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, absolute_path, content_to_save):
+        self._queue.put((absolute_path, content_to_save))
+
+    def _write_files(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                absolute_path, content_to_save = item
+                if not _store_file_now(absolute_path, content_to_save):
+                    self._record_error(f"{absolute_path}")
+            except Exception as e:
+                self._record_error(f"{absolute_path} - {e}")
+            finally:
+                self._queue.task_done()
+
+    def _record_error(self, message):
+        with self._errors_lock:
+            self._errors.append(message)
+
+    def flush(self):
+        """Wait until every file submitted so far has been written."""
+        self._queue.join()
+
+    def finish(self):
+        """
+        Write any remaining files and stop the writer threads.
+
+        Returns
+        -------
+        list[str]:
+            A description of each file that could not be written.
+
+        """
+        self.flush()
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+
+        return self._errors
+
+
+_write_behind_writer = None
+
+
+def start_write_behind(queue_size):
+    """Send files passed to store_file to a WriteBehindWriter until finish_write_behind is called."""
+    global _write_behind_writer
+    if _write_behind_writer is not None:
+        return
+    _write_behind_writer = WriteBehindWriter(queue_size)
+    _write_behind_writer.start()
+    logger.debug(f"Started write behind with a queue of {queue_size} files")
+
+
+def flush_write_behind():
+    if _write_behind_writer is not None:
+        _write_behind_writer.flush()
+
+
+def finish_write_behind():
+    """
+    Write any files still waiting and go back to writing files as store_file is called.
+
+    Returns
+    -------
+    list[str]:
+        A description of each file that could not be written, errors are also logged.
+
+    """
+    global _write_behind_writer
+    if _write_behind_writer is None:
+        return []
+
+    errors = _write_behind_writer.finish()
+    _write_behind_writer = None
+    for error in errors:
+        logger.error(f"Unable to write file {error}")
+
+    return errors
+
 
 def store_file(absolute_path, content_to_save):
+    """
+    Save content to absolute_path, content can be a string, bytes or a binary file-like object.
+
+    When write behind has been started the content is queued and written on a background thread.  A file-like object
+    must then remain readable until flush_write_behind or finish_write_behind has returned.
+    """
+    if _write_behind_writer is not None:
+        _write_behind_writer.submit(absolute_path, content_to_save)
+        return
+
+    _store_file_now(absolute_path, content_to_save)
+
+
+def link_file(source_path, absolute_path):
+    """
+    Create absolute_path as a hard link to the existing file source_path, replacing any existing file.  The file is
+    copied if a hard link can not be made, for example when the file system does not support them.
+    """
+    try:
+        Path(absolute_path).unlink()
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.error(f"{e}")
+        return False
+
+    try:
+        os.link(source_path, absolute_path)
+    except OSError:
+        try:
+            shutil.copyfile(source_path, absolute_path)
+        except OSError as e:
+            logger.error(f"{e}")
+            return False
+
+    return True
 
+
+def _store_file_now(absolute_path, content_to_save):
     logger.debug(f"Storing attachment {absolute_path}")
     if isinstance(content_to_save, str):
-        write_text(absolute_path, content_to_save)
-        return
+        return write_text(absolute_path, content_to_save)
 
     if isinstance(content_to_save, bytes):
-        write_bytes(absolute_path, content_to_save)
-        return
+        return write_bytes(absolute_path, content_to_save)
 
     if isinstance(content_to_save, BytesIO):
-        write_bytes_IO(absolute_path, content_to_save)
-        return
+        return write_bytes_IO(absolute_path, content_to_save)
+
+    if isinstance(content_to_save, BufferedIOBase):
+        return write_stream(absolute_path, content_to_save)
 
     logger.warning(f"content type {type(content_to_save)} was not recognised for path {absolute_path}")
+    return False
 
 
 def write_text(absolute_path, content_to_save):
@@ -31,6 +182,9 @@ def write_text(absolute_path, content_to_save):
         Path(absolute_path).write_text(content_to_save, encoding="utf-8")
     except FileNotFoundError as e:
         logger.error(f"{e}")
+        return False
+
+    return True
 
 
 def write_bytes(absolute_path, content_to_save):
@@ -38,10 +192,33 @@ def write_bytes(absolute_path, content_to_save):
         Path(absolute_path).write_bytes(content_to_save)
     except FileNotFoundError as e:
         logger.error(f"{e}")
+        return False
+
+    return True
 
 
 def write_bytes_IO(absolute_path, content_to_save):
     try:
         Path(absolute_path).write_bytes(content_to_save.getbuffer())
     except FileNotFoundError as e:
-        logger.error(f"{e}")
\ No newline at end of file
+        logger.error(f"{e}")
+        return False
+
+    return True
+
+
+def write_stream(absolute_path, content_to_save, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Copy a readable binary file-like object to disk in chunks and close the file-like object.
+
+    Only chunk_size bytes of the content are held in memory at any time, so memory use does not grow with the size
+    of the content being saved.
+    """
+    try:
+        with content_to_save, open(absolute_path, 'wb') as file:
+            shutil.copyfileobj(content_to_save, file, chunk_size)
+    except FileNotFoundError as e:
+        logger.error(f"{e}")
+        return False
+
+    return True
@@ -6,6 +6,8 @@ import sys
 from typing import Tuple
 import unicodedata
 
+from path_allocator import path_allocator
+
 
 def find_working_directory(is_frozen=getattr(sys, 'frozen', False)) -> Tuple[Path, str]:
     """
@@ -68,6 +70,9 @@ def find_valid_full_file_path(path_to_file: Path) -> Path:
     """
     Test if file exists and add an incrementing number to the file name until a valid file name is found.
 
+    The name is checked and reserved using the run's path allocator so the same name is not given out twice and the
+    folder is only read once.
+
     Parameters
     ----------
     path_to_file:
@@ -78,14 +83,7 @@ def find_valid_full_file_path(path_to_file: Path) -> Path:
     path_to_file
         Path object of the absolute path for the new incremented file name
     """
-    n = 0
-    path_to_folder = path_to_file.parent
-    stem = path_to_file.stem
-    while path_to_file.exists():
-        n += 1
-        path_to_file = Path(path_to_folder, f"{stem}-{n}{path_to_file.suffix}")
-
-    return path_to_file
+    return path_allocator().allocate(path_to_file)
 
 
 def add_random_string_to_file_name(path, length: int):
@@ -5,18 +5,24 @@ This module allows iframes to be retained when converting HTML-Markdown, the pre
 would be called before and aftger pandoc conversion
 
 """
-from bs4 import BeautifulSoup
-import re
-from typing import Tuple
+from typing import Optional, Tuple, TYPE_CHECKING
 
+from placeholders import make_placeholder, PlaceholderRegistry
 
-def pre_process_iframes_from_html(raw_content: str) -> Tuple[str, dict]:
+if TYPE_CHECKING:  # pragma: no cover
+    from bs4 import BeautifulSoup
+
+
+def pre_process_iframes_from_html(raw_content: str,
+                                  placeholders: Optional[PlaceholderRegistry] = None) -> Tuple[str, dict]:
     """Locate, and replace iframes with placeholder ID
 
     Parameters
     ----------
     raw_content : str
         A string of HTML code to be parsed for iframe tags.
+    placeholders : PlaceholderRegistry
+        Optional registry the placeholders and their markdown replacements are added to.
 
     Returns
     -------
@@ -26,18 +32,42 @@ def pre_process_iframes_from_html(raw_content: str) -> Tuple[str, dict]:
         Dictionary where the key is the unique placeholder string, the value is the iframe beautiful soup tag object
 
     """
+    from bs4 import BeautifulSoup  # bs4 is only imported when a page has to be parsed
     soup = BeautifulSoup(raw_content, 'html.parser')
 
+    iframes_dict = pre_process_iframes_from_soup(soup, placeholders)
+
+    processed_content = str(soup)
+
+    return processed_content, iframes_dict
+
+
+def pre_process_iframes_from_soup(soup: 'BeautifulSoup', placeholders: Optional[PlaceholderRegistry] = None) -> dict:
+    """Locate, and replace iframes with placeholder ID in an already parsed html document
+
+    Parameters
+    ----------
+    soup : BeautifulSoup
+        Parsed html, iframe tags are replaced in place.
+    placeholders : PlaceholderRegistry
+        Optional registry the placeholders and their markdown replacements are added to.
+
+    Returns
+    -------
+    iframes_dict: dict
+        Dictionary where the key is the unique placeholder string, the value is the iframe beautiful soup tag object
+
+    """
     iframes = soup.select('iframe')
     iframes_dict = {}
     for iframe in iframes:
-        placeholder_text = f'iframe-placeholder-id-{str(id(iframe))}'
+        placeholder_text = make_placeholder('iframe', iframe)
         iframes_dict[placeholder_text] = iframe
+        if placeholders is not None:
+            placeholders.add(placeholder_text, _iframe_markdown(iframe))
         iframe.replace_with(f'{placeholder_text}')
 
-    processed_content = str(soup)
-
-    return processed_content, iframes_dict
+    return iframes_dict
 
 
 def post_process_iframes_to_markdown(content, iframes_dict) -> str:
@@ -56,9 +86,13 @@ def post_process_iframes_to_markdown(content, iframes_dict) -> str:
         The raw_content with iframe code replacing the unique placeholder string.
 
     """
+    placeholders = PlaceholderRegistry(remove_leading_spaces=True)
     for key, value in iframes_dict.items():
-        search_for = rf'\ *{key}'  # including leading spaces to leave a blank line
-        replace_with = f'\n{value}\n' # new line either side of html code is required for some readers
-        content = re.sub(search_for, replace_with, content)
+        placeholders.add(key, _iframe_markdown(value))
+
+    return placeholders.restore(content)
+
 
-    return content
+def _iframe_markdown(iframe) -> str:
+    # new line either side of html code is required for some readers
+    return f'\n{iframe}\n'
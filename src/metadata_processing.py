@@ -1,6 +1,5 @@
 import logging
 
-from bs4 import BeautifulSoup
 import frontmatter
 from frontmatter import YAMLHandler, TOMLHandler, JSONHandler
 
@@ -25,6 +24,7 @@ class MetaDataProcessor:
 
     def parse_html_metadata(self, html_metadata_source):
         self.logger.debug(f"Parsing HTML meta-data")
+        from bs4 import BeautifulSoup  # bs4 is only imported when a page has to be parsed
         soup = BeautifulSoup(html_metadata_source, 'html.parser')
 
         head = soup.find('head')
@@ -179,13 +179,28 @@ class MetaDataProcessor:
         if len(self._metadata) == 0:
             return content
 
-        title_text = ''
+        from bs4 import BeautifulSoup
         soup = BeautifulSoup(content, 'html.parser')
 
+        if not self.add_metadata_html_to_soup(soup):
+            return content
+
+        return str(soup)
+
+    def add_metadata_html_to_soup(self, soup):
+        """
+        Add meta tags for the meta-data to the head section of parsed html.
+
+        Returns True if meta tags were added, False if there is no meta-data or no head section.
+        """
+        if len(self._metadata) == 0:
+            return False
+
+        title_text = ''
         head = soup.find('head')
         if head is None:
             self.logger.debug("No <head> in html, skipping meta data insert")
-            return content
+            return False
 
         for key, value in self._metadata.items():
             if key.lower() == 'title':
@@ -203,7 +218,7 @@ class MetaDataProcessor:
             if title_text:
                 title.string = title_text
 
-        return str(soup)
+        return True
 
     @property
     def metadata(self):
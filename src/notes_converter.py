@@ -5,12 +5,19 @@ from timer import Timer
 from alive_progress import alive_bar
 
 import config
-from interactive_cli import StartUpCommandLineInterface
+from chart_rendering import add_chart_cache_statistics, chart_cache_statistics
+from chart_rendering import finish_chart_rendering, start_chart_rendering
+from conversion_manifest import finish_conversion_manifests
+import file_writer
+from content_features import add_skipped_stage_counts, skipped_stage_counts
 from nsx_file_converter import NSXFile
+from nsx_process_pool import convert_nsx_files_in_processes
+from pandoc_cache import add_cache_statistics, cache_statistics
 from pandoc_converter import PandocConverter
 from file_converter_HTML_to_MD import HTMLToMDConverter
 from file_converter_MD_to_HTML import MDToHTMLConverter
 from file_converter_MD_to_MD import MDToMDConverter
+from file_converter_pool import convert_files_in_processes
 
 
 def what_module_is_this():
@@ -39,18 +46,28 @@ class NotesConvertor:
         self._note_book_count = 0
         self._image_count = 0
         self._attachment_count = 0
+        self._unchanged_note_count = 0
         self._nsx_backups = []
         self.pandoc_converter = None
         self.config_data = config_data
+        self._write_errors = []
 
     def convert_notes(self):
         self.evaluate_command_line_arguments()
-        if self.conversion_settings.conversion_input == 'html':
-            self.convert_html()
-        elif self.conversion_settings.conversion_input == 'markdown':
-            self.convert_markdown()
-        else:
-            self.convert_nsx()
+        if config.write_behind:
+            file_writer.start_write_behind(config.write_queue_size)
+        if config.chart_processes:
+            start_chart_rendering(config.chart_processes)
+        try:
+            if self.conversion_settings.conversion_input == 'html':
+                self.convert_html()
+            elif self.conversion_settings.conversion_input == 'markdown':
+                self.convert_markdown()
+            else:
+                self.convert_nsx()
+        finally:
+            finish_chart_rendering()
+            self._write_errors.extend(file_writer.finish_write_behind())
 
         self.output_results_if_not_silent_mode()
         self.log_results()
@@ -89,14 +106,27 @@ class NotesConvertor:
         if not config.silent:
             print(f"Processing note pages")
         with alive_bar(len(files_to_convert), bar='blocks') as bar:
-            for file in files_to_convert:
-                file_converter.convert(file)
+            if config.processes > 1 and len(files_to_convert) > 1:
+                conversions = self.add_worker_process_statistics(
+                    convert_files_in_processes(file_converter, self.conversion_settings, files_to_convert,
+                                               config.processes))
+            else:
+                conversions = map(file_converter.convert, files_to_convert)
+
+            for _ in conversions:
                 file_count += 1
                 if not config.silent:
                     bar()
 
         self._note_page_count = file_count
 
+    @staticmethod
+    def add_worker_process_statistics(file_conversion_results):
+        for file_conversion_result in file_conversion_results:
+            add_cache_statistics(*file_conversion_result.cache_statistics)
+            add_skipped_stage_counts(file_conversion_result.skipped_stage_counts)
+            yield file_conversion_result.file
+
     def convert_html(self):
         with Timer(name="html_conversion", logger=self.logger.info, silent=bool(config.silent)):
             file_extension = 'html'
@@ -110,20 +140,60 @@ class NotesConvertor:
         nsx_files_to_convert = self.generate_file_list(file_extension)
         self.exit_if_no_files_found(nsx_files_to_convert, file_extension)
         self.pandoc_converter = PandocConverter(self.conversion_settings)
+        if self.use_worker_processes(nsx_files_to_convert):
+            self.process_nsx_files_in_worker_processes(nsx_files_to_convert)
+            return
+
         self._nsx_backups = [NSXFile(file, self.conversion_settings, self.pandoc_converter) for file in nsx_files_to_convert]
         self.process_nsx_files()
 
+    def use_worker_processes(self, nsx_files_to_convert):
+        if config.processes < 2 or len(nsx_files_to_convert) < 2:
+            return False
+
+        # the manifest and shared attachment folder are written by every nsx file converted into the export folder
+        if config.incremental or config.attachment_store == 'shared':
+            self.logger.info("NSX files are converted one at a time when using incremental conversion "
+                             "or a shared attachment store")
+            return False
+
+        return True
+
+    def process_nsx_files_in_worker_processes(self, nsx_files_to_convert):
+        if not config.silent:
+            print(f"Converting {len(nsx_files_to_convert)} NSX files using "
+                  f"{min(config.processes, len(nsx_files_to_convert))} processes")
+        if config.chart_processes:
+            # each nsx file process would otherwise start its own chart processes
+            msg = ("Chart processes are not used when NSX files are converted in worker processes, "
+                   "charts are rendered in the process converting each NSX file")
+            self.logger.warning(msg)
+            if not config.silent:
+                print(msg)
+        with Timer(name="nsx_conversion", logger=self.logger.info, silent=bool(config.silent)):
+            self._nsx_backups = convert_nsx_files_in_processes(nsx_files_to_convert, self.conversion_settings,
+                                                               config.processes)
+            for nsx_file_result in self._nsx_backups:
+                self.update_processing_stats(nsx_file_result)
+                add_cache_statistics(*nsx_file_result.cache_statistics)
+                add_chart_cache_statistics(*nsx_file_result.chart_cache_statistics)
+                add_skipped_stage_counts(nsx_file_result.skipped_stage_counts)
+                self._write_errors.extend(nsx_file_result.write_errors)
+
     def process_nsx_files(self):
         with Timer(name="nsx_conversion", logger=self.logger.info, silent=bool(config.silent)):
             for nsx_file in self._nsx_backups:
                 nsx_file.process_nsx_file()
                 self.update_processing_stats(nsx_file)
+            if config.incremental:
+                finish_conversion_manifests()
 
     def update_processing_stats(self, nsx_file):
         self._note_page_count += nsx_file.note_page_count
         self._note_book_count += nsx_file.note_book_count
         self._image_count += nsx_file.image_count
         self._attachment_count += nsx_file.attachment_count
+        self._unchanged_note_count += nsx_file.unchanged_note_count
 
     def evaluate_command_line_arguments(self):
         self.configure_for_ini_settings()
@@ -135,6 +205,7 @@ class NotesConvertor:
         self.run_interactive_command_line_interface()
 
     def run_interactive_command_line_interface(self):
+        from interactive_cli import StartUpCommandLineInterface  # only imported when the cli is used
         command_line_interface = StartUpCommandLineInterface(self.conversion_settings)
         self.conversion_settings = command_line_interface.run_cli()
         self.conversion_settings.source = self.command_line_args['source']
@@ -151,6 +222,8 @@ class NotesConvertor:
             self.print_result_if_any(self._note_page_count, 'Note page')
             self.print_result_if_any(self._image_count, 'Image')
             self.print_result_if_any(self._attachment_count, 'Attachment')
+            if config.incremental:
+                print(f'{self._unchanged_note_count} unchanged Note pages were not converted again')
             num_links_corrected = 0
             num_links_not_corrected = 0
             for nsx_file in self._nsx_backups:
@@ -161,6 +234,14 @@ class NotesConvertor:
             for nsx_file in self._nsx_backups:
                 if nsx_file.inter_note_link_processor.unmatched_links_msg:
                     print(nsx_file.inter_note_link_processor.unmatched_links_msg)
+            if config.pandoc_cache:
+                cache_hits, cache_misses = cache_statistics()
+                print(f'Pandoc cache - {cache_hits} hits, {cache_misses} misses')
+            if config.chart_cache:
+                chart_cache_hits, chart_cache_misses = chart_cache_statistics()
+                print(f'Chart image cache - {chart_cache_hits} hits, {chart_cache_misses} misses')
+            if self._write_errors:
+                print(f'{len(self._write_errors)} files could not be written, see the error log for details')
 
     @staticmethod
     def print_result_if_any(conversion_count, message):
@@ -175,4 +256,14 @@ class NotesConvertor:
         self.logger.info(f"{self._note_book_count} Note books")
         self.logger.info(f"{self._note_page_count} Note Pages")
         self.logger.info(f"{self._image_count} Images")
-        self.logger.info(f"{self._attachment_count} Attachments")
\ No newline at end of file
+        self.logger.info(f"{self._attachment_count} Attachments")
+        if config.incremental:
+            self.logger.info(f"{self._unchanged_note_count} unchanged Note Pages not converted")
+        if config.pandoc_cache:
+            cache_hits, cache_misses = cache_statistics()
+            self.logger.info(f"Pandoc cache {cache_hits} hits {cache_misses} misses")
+        if config.chart_cache:
+            chart_cache_hits, chart_cache_misses = chart_cache_statistics()
+            self.logger.info(f"Chart image cache {chart_cache_hits} hits {chart_cache_misses} misses")
+        for stage, count in sorted(skipped_stage_counts().items()):
+            self.logger.info(f"Pre-processing of {stage} skipped for {count} pages")
\ No newline at end of file
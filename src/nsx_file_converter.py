@@ -5,8 +5,10 @@ from pathlib import Path
 from alive_progress import alive_bar
 
 import config
+from conversion_manifest import get_conversion_manifest
 import file_writer
 from nsx_inter_note_link_processor import NSXInterNoteLinkProcessor
+from path_allocator import path_allocator
 from sn_notebook import Notebook
 from sn_note_page import NotePage
 import zip_file_reader
@@ -26,6 +28,7 @@ class NSXFile:
         self.logger.setLevel(config.logger_level)
         self._conversion_settings = conversion_settings
         self._nsx_file_name = file
+        self._nsx_archive = zip_file_reader.NSXArchive(file)
         self._nsx_json_data = ''
         self._notebook_ids = None
         self._note_page_ids = None
@@ -38,23 +41,38 @@ class NSXFile:
         self._attachment_count = 0
         self._pandoc_converter = pandoc_converter
         self._inter_note_link_processor = NSXInterNoteLinkProcessor()
+        self._conversion_manifest = None
+        self._manifest_entries = {}
+        self._unchanged_note_count = 0
 
     def process_nsx_file(self):
         self.logger.info(f"Processing {self._nsx_file_name}")
-        self._nsx_json_data = self.fetch_json_data('config.json')
-        self._notebook_ids = self._nsx_json_data['notebook']
-        self._note_page_ids = self._nsx_json_data['note']
-        self.add_notebooks()
-        self.add_recycle_bin_notebook()
-        self.create_export_folder_if_not_exist()
-        self.create_folders()
-        self.add_note_pages()
-        self.add_note_pages_to_notebooks()
-        self.generate_note_page_filename_and_path()
-        self.build_dictionary_of_inter_note_links()
-        self.process_notebooks()
-        self.store_attachments()
-        self.save_note_pages()
+        with self._nsx_archive:
+            self._nsx_json_data = self.fetch_json_data('config.json')
+            self._notebook_ids = self._nsx_json_data['notebook']
+            self._note_page_ids = self._nsx_json_data['note']
+            self.add_notebooks()
+            self.add_recycle_bin_notebook()
+            self.create_export_folder_if_not_exist()
+            if config.incremental:
+                self.open_conversion_manifest()
+            self.create_folders()
+            self.add_note_pages()
+            self.add_note_pages_to_notebooks()
+            self.generate_note_page_filename_and_path()
+            self.build_dictionary_of_inter_note_links()
+            if config.incremental:
+                self.find_unchanged_note_pages()
+            if config.stream_notes:
+                self.release_note_page_content()
+            self.process_notebooks()
+            self.store_attachments()
+            # attachments are read from the open nsx archive so must be written before it is closed
+            file_writer.flush_write_behind()
+        if not config.stream_notes:
+            self.save_note_pages()
+        if config.incremental:
+            self.update_conversion_manifest()
         self.logger.info(f"Processing of {self._nsx_file_name} complete.")
 
     def build_dictionary_of_inter_note_links(self):
@@ -63,6 +81,38 @@ class NSXFile:
         self.inter_note_link_processor.match_link_title_to_notes(all_note_pages)
         self.inter_note_link_processor.match_renamed_links_using_link_ref_id()
 
+    def open_conversion_manifest(self):
+        # opening the manifest frees the paths used by the previous run so notebook folders and notes keep their paths
+        self._conversion_manifest = get_conversion_manifest(
+            Path(self.conversion_settings.working_directory, config.DATA_DIR,
+                 self._conversion_settings.export_folder_name))
+
+    def find_unchanged_note_pages(self):
+        for note_id, note_page in self._note_pages.items():
+            entry = self._conversion_manifest.make_entry(
+                note_page, self.inter_note_link_processor.replacement_html_for_note(note_page))
+            self._manifest_entries[note_id] = entry
+            if self._conversion_manifest.is_unchanged(note_id, entry):
+                self._conversion_manifest.reserve_previous_outputs(note_id)
+                note_page.skip_conversion = True
+                self._unchanged_note_count += 1
+
+        self.logger.info(f"{self._unchanged_note_count} of {len(self._note_pages)} note pages are unchanged since "
+                         f"the last conversion")
+
+    def update_conversion_manifest(self):
+        for note_id, note_page in self._note_pages.items():
+            if note_page.skip_conversion:
+                self._conversion_manifest.record_unchanged(note_id)
+            else:
+                self._conversion_manifest.record(note_id, self._manifest_entries[note_id], note_page.attachments)
+
+    def release_note_page_content(self):
+        # when streaming notes each note is read from the nsx file again as it is processed, and saved and released
+        # as soon as it is processed, so only the notes being processed are held in memory
+        for note_page in self._note_pages.values():
+            note_page.release_raw_content()
+
     def generate_note_page_filename_and_path(self):
         for note_page in self.note_pages.values():
             # this has to happen before processing as the file name and path are needed for pre_processing content
@@ -71,10 +121,13 @@ class NSXFile:
             note_page.generate_filenames_and_paths()
 
     def fetch_json_data(self, data_id):
-        return zip_file_reader.read_json_data(self._nsx_file_name, data_id)
+        return self._nsx_archive.read_json_data(data_id)
 
     def fetch_attachment_file(self, file_name):
-        return zip_file_reader.read_binary_file(self._nsx_file_name, file_name)
+        return self._nsx_archive.read_binary_file(file_name)
+
+    def open_attachment_file(self, file_name):
+        return self._nsx_archive.open_member(file_name)
 
     def add_notebooks(self):
         self.logger.info(f"Creating Notebooks")
@@ -86,7 +139,7 @@ class NSXFile:
         self._note_book_count += len(self._notebooks)
 
     def fetch_notebook_title(self, notebook_id):
-        notebook_title = zip_file_reader.read_json_data(self._nsx_file_name, notebook_id)['title']
+        notebook_title = self.fetch_json_data(notebook_id)['title']
         if notebook_title == "":  # The notebook with no title is called 'My Notes' in note station
             notebook_title = "My Notebook"
 
@@ -107,9 +160,19 @@ class NSXFile:
 
     def create_folders(self):
         self.logger.debug(f"Creating folders for notebooks")
+        if config.attachment_store == 'shared':
+            self.create_shared_attachment_folder()
         for notebooks_id in self._notebooks:
             self._notebooks[notebooks_id].create_folders()
 
+    def create_shared_attachment_folder(self):
+        # reserved before the notebook folders are created so a notebook with the same name is given another folder
+        target_path = Path(self.conversion_settings.working_directory, config.DATA_DIR,
+                           self._conversion_settings.export_folder_name,
+                           self._conversion_settings.attachment_folder_name)
+        path_allocator().reserve(target_path)
+        target_path.mkdir(exist_ok=True)
+
     def add_note_pages(self):
         self.logger.debug(f"Creating note page objects")
 
@@ -138,12 +201,22 @@ class NSXFile:
         attachments_to_save = [attachment for note_page_id in self._note_pages for attachment in self._note_pages[note_page_id].attachments.values()]
         if not config.silent:
             print("Saving attachments")
+        linked_attachments = []
         with alive_bar(len(attachments_to_save), bar='blocks') as bar:
             for attachment in attachments_to_save:
-                file_writer.store_file(attachment.full_path, attachment.get_content_to_save())
+                if attachment.stored_copy is None:
+                    file_writer.store_file(attachment.full_path, attachment.get_content_to_save())
+                elif attachment.full_path != attachment.stored_copy:
+                    linked_attachments.append(attachment)
                 if not config.silent:
                     bar()
 
+        if linked_attachments:
+            # the files being linked to have to be on disk before the links are made
+            file_writer.flush_write_behind()
+            for attachment in linked_attachments:
+                file_writer.link_file(attachment.stored_copy, attachment.full_path)
+
     def process_notebooks(self):
         for notebooks_id in self._notebooks:
             self._notebooks[notebooks_id].process_notebook_pages()
@@ -153,11 +226,16 @@ class NSXFile:
             print("Saving note pages")
         with alive_bar(len(self._note_pages), bar='blocks') as bar:
             for note_page_id in self._note_pages:
-                file_writer.store_file(self._note_pages[note_page_id].full_path,
-                                       self._note_pages[note_page_id].converted_content)
+                if not self._note_pages[note_page_id].skip_conversion:
+                    file_writer.store_file(self._note_pages[note_page_id].full_path,
+                                           self._note_pages[note_page_id].converted_content)
                 if not config.silent:
                     bar()
 
+    @property
+    def nsx_file_name(self):
+        return self._nsx_file_name
+
     @property
     def notebooks(self):
         return self._notebooks
@@ -190,6 +268,14 @@ class NSXFile:
     def note_pages(self):
         return self._note_pages
 
+    @property
+    def nsx_archive(self):
+        return self._nsx_archive
+
+    @property
+    def unchanged_note_count(self):
+        return self._unchanged_note_count
+
     @property
     def inter_note_link_processor(self):
         return self._inter_note_link_processor
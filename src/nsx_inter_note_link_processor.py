@@ -1,3 +1,4 @@
+from collections import defaultdict
 import logging
 import re
 
@@ -8,6 +9,9 @@ def what_module_is_this():
     return __name__
 
 
+_NOTESTATION_LINK = re.compile(r'<a href="notestation://[^>]*>[^>]*>')
+
+
 class NSXInterNoteLinkProcessor:
     """
     Attempt to create valid links to other notes pages using the link title text.
@@ -19,6 +23,10 @@ class NSXInterNoteLinkProcessor:
 
     The links are not guaranteed to be valid/correct but this is currently the best guess for links to other note pages.
 
+    Pages are indexed by title and title matched links by link id so matching is a dictionary look up per link rather
+    than a comparison with every page and every other link.  Once links are matched the replacement html for the links
+    on each page is generated once and page content is updated in a single pass over the content.
+
     """
 
     def __init__(self):
@@ -28,6 +36,8 @@ class NSXInterNoteLinkProcessor:
         self._replacement_links = []
         self._renamed_links_not_corrected = {}
         self._unmatched_links_msg = ''
+        self._replacement_html_by_note = {}
+        self._replacement_html = {}
 
     class IntraPageLink:
         """
@@ -45,7 +55,7 @@ class NSXInterNoteLinkProcessor:
             self._target_notes = []
 
         def generate_new_links(self):
-            self.logger.debug("Creating inter note links")
+            self._replacement_text = []
             for target_note in self._target_notes:
                 if self._source_note_page.parent_notebook == target_note.parent_notebook:
                     replacement_text = f'<a href="{target_note.file_name}">{self._text}</a>'
@@ -67,7 +77,7 @@ class NSXInterNoteLinkProcessor:
             return self._replacement_text
 
         def append_to_target_notes(self, target_notes: list):
-            self._target_notes = self._target_notes + target_notes
+            self._target_notes.extend(target_notes)
 
         @property
         def link_id(self):
@@ -82,21 +92,19 @@ class NSXInterNoteLinkProcessor:
             return self._source_note_page
 
     def make_list_of_links(self, all_note_pages):
-        new_replacement_links = []
         for note in all_note_pages:
-            new_raw_note_links = re.findall(r'<a href="notestation://[^>]*>[^>]*>', note.raw_content)
-            self._raw_note_links = self._raw_note_links + new_raw_note_links
-
-            new_replacement_links = new_replacement_links + [self.IntraPageLink(raw_link, note)
-                                                             for raw_link in new_raw_note_links]
-
-        self._replacement_links = self._replacement_links + new_replacement_links
+            new_raw_note_links = _NOTESTATION_LINK.findall(note.raw_content)
+            self._raw_note_links.extend(new_raw_note_links)
+            self._replacement_links.extend(self.IntraPageLink(raw_link, note) for raw_link in new_raw_note_links)
 
     def match_link_title_to_notes(self, all_note_pages):
+        notes_by_title = defaultdict(list)
+        for note in all_note_pages:
+            notes_by_title[note.original_title].append(note)
+
         for intra_page_link_obj in self._replacement_links:
-            for note in all_note_pages:
-                if intra_page_link_obj.text == note.original_title:
-                    intra_page_link_obj.append_to_target_notes([note])
+            if intra_page_link_obj.text in notes_by_title:
+                intra_page_link_obj.append_to_target_notes(notes_by_title[intra_page_link_obj.text])
 
     def match_renamed_links_using_link_ref_id(self):
         links_not_yet_matched = [inter_note_link
@@ -104,58 +112,82 @@ class NSXInterNoteLinkProcessor:
                                  if not inter_note_link.target_notes
                                  ]
 
-        matched_links = [inter_note_link
-                         for inter_note_link in self._replacement_links
-                         if inter_note_link.target_notes
-                         ]
+        matched_links_by_link_id = defaultdict(list)
+        for inter_note_link in self._replacement_links:
+            if inter_note_link.target_notes:
+                matched_links_by_link_id[inter_note_link.link_id].append(inter_note_link)
 
         for unmatched_link in links_not_yet_matched:
-            for matched_link in matched_links:
-                if unmatched_link.link_id == matched_link.link_id and unmatched_link is not matched_link:
-                    unmatched_link.append_to_target_notes(matched_link.target_notes)
+            for matched_link in matched_links_by_link_id.get(unmatched_link.link_id, []):
+                unmatched_link.append_to_target_notes(matched_link.target_notes)
 
         self._renamed_links_not_corrected = [inter_note_link
                                              for inter_note_link in self._replacement_links
                                              if not inter_note_link.target_notes
                                              ]
 
-        self._replacement_links = list(set(self._replacement_links) - set(self._renamed_links_not_corrected))
+        self._replacement_links = [inter_note_link
+                                   for inter_note_link in self._replacement_links
+                                   if inter_note_link.target_notes
+                                   ]
 
         if self._renamed_links_not_corrected:
             self._log_link_unmatched_links()
 
+        self._generate_replacement_html()
+
+    def _generate_replacement_html(self):
+        self._replacement_html_by_note = {}
+        self._replacement_html = {}
+        for replacement_link in self._replacement_links:
+            replacement_link.generate_new_links()
+            html_code = self.generate_html_code_for_new_links(replacement_link.replacement_text)
+            self._replacement_html_by_note.setdefault(replacement_link.source_note_page, {})[
+                replacement_link.raw_link] = html_code
+            self._replacement_html[replacement_link.raw_link] = html_code
+
+    def replacement_html_for_note(self, source_note):
+        """Return a dictionary of the replacement html for each link on the source note, keyed on the raw link."""
+        return self._replacement_html_by_note.get(source_note, {})
+
     def _log_link_unmatched_links(self):
         self._generate_unmatched_links_message()
-        unmatched_links_msg = 'The following links could not be corrected.\n'
-        for link in self._renamed_links_not_corrected:
-            unmatched_links_msg = f'{unmatched_links_msg}On page {link.source_note_page.title} - {link.raw_link}\n'
-
         self.logger.info(self._unmatched_links_msg)
 
     def _generate_unmatched_links_message(self):
-        unmatched_links_msg = 'The following link(s) could not be corrected.\n'
-        for link in self._renamed_links_not_corrected:
-            unmatched_links_msg = f'{unmatched_links_msg}On page - {link.source_note_page.title} - {link.raw_link}\n'
+        unmatched_links = [f'On page - {link.source_note_page.title} - {link.raw_link}\n'
+                           for link in self._renamed_links_not_corrected]
 
-        self._unmatched_links_msg = unmatched_links_msg
+        self._unmatched_links_msg = f"The following link(s) could not be corrected.\n{''.join(unmatched_links)}"
 
-    def update_content(self, content):
-        self.logger.debug("Adding inter note links to page")
-        raw_note_links = re.findall(r'<a href="notestation://[^>]*>[^>]*>', content)
+    def update_content(self, content, source_note=None):
+        """
+        Replace the links to other note pages in content with links to the matched pages.
 
-        if not raw_note_links:
-            return content
+        Parameters
+        ----------
+        content : str
+            html content of a note page
+        source_note : NotePage
+            The note page the content is from.  Links are made relative to this page.  If not given the replacement
+            generated for any page containing the link is used.
 
-        replacement_links = {replacement_link.raw_link: replacement_link for replacement_link in
-                             self._replacement_links}
+        Returns
+        -------
+        str:
+            content with the links that were matched replaced.
 
-        for raw_link in raw_note_links:
-            if raw_link in replacement_links:
-                replacement_links[raw_link].generate_new_links()
-                content = content.replace(raw_link,
-                                    self.generate_html_code_for_new_links(replacement_links[raw_link].replacement_text))
+        """
+        self.logger.debug("Adding inter note links to page")
+        if source_note is None:
+            replacement_html = self._replacement_html
+        else:
+            replacement_html = self._replacement_html_by_note.get(source_note, {})
+
+        if not replacement_html:
+            return content
 
-        return content
+        return _NOTESTATION_LINK.sub(lambda match: replacement_html.get(match.group(0), match.group(0)), content)
 
     @staticmethod
     def generate_html_code_for_new_links(replacement_links):
@@ -1,7 +1,6 @@
 import logging
 
 import config
-from iframe_processing import post_process_iframes_to_markdown
 from image_processing import ObsidianImageTagFormatter
 
 
@@ -23,9 +22,7 @@ class NoteStationPostProcessing:
     def post_process_note_page(self):
         if self._conversion_settings.front_matter_format != 'none':
             self._add_meta_data()
-        self._add_check_lists()
-        if self._note.conversion_settings.export_format != 'pandoc_markdown_strict':
-            self._add_iframes()
+        self._add_check_lists_and_iframes()
         self._format_images_links()
         self._add_one_last_line_break()
 
@@ -33,15 +30,11 @@ class NoteStationPostProcessing:
         self.logger.debug(f"Adding meta-data to page")
         self._post_processed_content = self._pre_processor.metadata_processor.add_metadata_md_to_content(self._post_processed_content)
 
-    def _add_check_lists(self):
-        if self._note.pre_processor.checklist_processor.list_of_checklist_items:
-            self.logger.debug(f"Adding checklists to page")
-            self._post_processed_content = self._note.pre_processor.checklist_processor.add_checklist_items_to(self._post_processed_content)
-
-    def _add_iframes(self):
-        if self._pre_processor.iframes_dict:
-            self.logger.debug(f"Adding iframes to note page")
-            self._post_processed_content = post_process_iframes_to_markdown(self._post_processed_content, self._pre_processor.iframes_dict)
+    def _add_check_lists_and_iframes(self):
+        # iframes are not removed in pre-processing for pandoc_markdown_strict so only checklists are restored
+        if self._pre_processor.placeholders:
+            self.logger.debug(f"Adding checklists and iframes to page")
+            self._post_processed_content = self._pre_processor.placeholders.restore(self._post_processed_content)
 
     def _format_images_links(self):
         if self._conversion_settings.export_format == 'obsidian':
@@ -1,14 +1,15 @@
 import logging
 import re
 
-
 from chart_processing import NSXChartProcessor
 from checklist_processing import NSXInputMDOutputChecklistProcessor, NSXInputHTMLOutputChecklistProcessor
 import config
+from content_features import ContentFeatures, record_skipped_stage
 from helper_functions import add_strong_between_tags, change_html_tags
-from iframe_processing import pre_process_iframes_from_html
+from iframe_processing import pre_process_iframes_from_soup
 from image_processing import ImageTag
 from metadata_processing import MetaDataProcessor
+from placeholders import PlaceholderRegistry
 from sn_attachment import FileNSAttachment
 
 
@@ -22,6 +23,10 @@ class NoteStationPreProcessing:
 
     Clean and format data for pandoc.  Also regenerate html checklists or put in place holders to aid adding checklists
     back in markdown files after pandoc processing.
+
+    The note is parsed once.  Iframes, checklists, charts and meta-data are processed on the parsed page which is
+    then serialised once for the remaining text based clean up.  Before the page is parsed it is scanned for iframes,
+    checklists, charts and tables and the stages for any that are not present are skipped.
     """
 
     def __init__(self, note):
@@ -35,9 +40,15 @@ class NoteStationPreProcessing:
         self._image_tag_processors = []
         self._image_ref_to_image_path = {}
         self._iframes_dict = {}
+        self._placeholders = PlaceholderRegistry(remove_leading_spaces=True)
+        self._soup = None
+        self._features = None
         self._checklist_processor = None
+        self._chart_processor = None
         self._charts = []
         self._metadata_processor = None
+        self._metadata_added = False
+        self._serialised_content = ''
         self.pre_process_note_page()
         pass
 
@@ -61,30 +72,70 @@ class NoteStationPreProcessing:
     def iframes_dict(self):
         return self._iframes_dict
 
+    @property
+    def placeholders(self):
+        return self._placeholders
+
     def pre_process_note_page(self):
         self.logger.debug(f"Pre processing of note page {self._note.title}")
         self._create_image_tag_processors()
         self._update_content_with_new_img_tags()
-        if self._note.conversion_settings.export_format != 'pandoc_markdown_strict' \
-                and self._note.conversion_settings.export_format != 'html':
-            self._process_iframes()
         self._fix_ordered_list()
         self._fix_unordered_list()
-        self._fix_check_lists()
-        self._add_boarder_to_tables()
-        if self._note.conversion_settings.first_row_as_header:
-            self._fix_table_headers()
-        if self._note.conversion_settings.first_column_as_header:
-            self._first_column_in_table_as_header_if_required()
-        self._extract_and_generate_chart()
+        if self._note.conversion_settings.front_matter_format != 'none':
+            self._add_head_section()
+
+        self._features = ContentFeatures(self.pre_processed_content)
+        self._parse_content()
+        if self._note.conversion_settings.export_format != 'pandoc_markdown_strict' \
+                and self._note.conversion_settings.export_format != 'html':
+            self._run_stage_if(self._features.has_iframes, 'iframes', self._process_iframes)
+        self._run_stage_if(self._features.has_nsx_checklists, 'checklists', self._fix_check_lists)
+        self._run_stage_if(self._features.has_nsx_charts, 'charts', self._extract_and_generate_chart)
         if self._note.conversion_settings.front_matter_format != 'none':
             self._generate_metadata()
+        self._serialise_content()
+
+        self._run_stage_if(self._features.has_tables, 'tables', self._clean_tables)
+        if self._chart_processor:
+            self._add_chart_elements()
+        self._format_content_if_changed_after_metadata_added()
         self._generate_links_to_other_note_pages()
         self._add_file_attachment_links()
         self._clean_excessive_divs()
 
+    def _run_stage_if(self, required, stage, stage_function):
+        if required:
+            stage_function()
+            return
+
+        self.logger.debug(f"Skipping {stage} pre-processing, none found in note page")
+        record_skipped_stage(stage)
+
+    def _parse_content(self):
+        # html.parser leaves a self closing void tag open if the same tag has been used without closing it earlier
+        # in the page, for example <br>text<br/>, so all void tags are written without the closing slash
+        self.pre_processed_content = re.sub(r'<(area|base|br|col|embed|hr|img|input|link|meta|param|source|track|wbr)'
+                                            r'(\b[^>]*?)\s*/>', r'<\1\2>', self.pre_processed_content)
+        from bs4 import BeautifulSoup  # bs4 is only imported when a page has to be parsed
+        self._soup = BeautifulSoup(self.pre_processed_content, 'html.parser')
+
+    def _serialise_content(self):
+        self.pre_processed_content = str(self._soup)
+        self._serialised_content = self.pre_processed_content
+        self._soup = None
+
+    def _format_content_if_changed_after_metadata_added(self):
+        """
+        When meta-data is added to a page the whole page is formatted by BeautifulSoup.  Table and chart changes are
+        made after the page is serialised so only if they changed the page is it parsed again to format those changes.
+        """
+        if self._metadata_added and self.pre_processed_content != self._serialised_content:
+            from bs4 import BeautifulSoup
+            self.pre_processed_content = str(BeautifulSoup(self.pre_processed_content, 'html.parser'))
+
     def _process_iframes(self):
-        self.pre_processed_content, self._iframes_dict = pre_process_iframes_from_html(self.pre_processed_content)
+        self._iframes_dict = pre_process_iframes_from_soup(self._soup, self._placeholders)
 
     def _create_image_tag_processors(self):
         self.logger.debug(f"Cleaning image tags")
@@ -120,12 +171,9 @@ class NoteStationPreProcessing:
         self.logger.debug(f"Cleaning check lists")
 
         if self._note.conversion_settings.export_format == 'html':
-            self._checklist_processor = NSXInputHTMLOutputChecklistProcessor(self.pre_processed_content)
+            self._checklist_processor = NSXInputHTMLOutputChecklistProcessor(self._soup)
         else:
-            self._checklist_processor = NSXInputMDOutputChecklistProcessor(self.pre_processed_content)
-
-        self.pre_processed_content = self._checklist_processor.processed_html
-        pass
+            self._checklist_processor = NSXInputMDOutputChecklistProcessor(self._soup, self._placeholders)
 
     def _extract_and_generate_chart(self):
         self.logger.debug(f"Cleaning charts")
@@ -134,9 +182,17 @@ class NoteStationPreProcessing:
                          'create_csv': self._note.conversion_settings.chart_csv,
                          'create_data_table': self._note.conversion_settings.chart_data_table,
                          }
-        chart_processor = NSXChartProcessor(self._note, self.pre_processed_content, **chart_options)
+        self._chart_processor = NSXChartProcessor(self._note, self._soup, **chart_options)
 
-        self.pre_processed_content = chart_processor.processed_html
+    def _add_chart_elements(self):
+        self.pre_processed_content = self._chart_processor.add_chart_elements_to(self.pre_processed_content)
+
+    def _clean_tables(self):
+        self._add_boarder_to_tables()
+        if self._note.conversion_settings.first_row_as_header:
+            self._fix_table_headers()
+        if self._note.conversion_settings.first_column_as_header:
+            self._first_column_in_table_as_header_if_required()
 
     def _fix_table_headers(self):
         self.logger.debug(f"Cleaning table headers")
@@ -168,16 +224,19 @@ class NoteStationPreProcessing:
             new_table = new_table.replace('<table', '<table border="1"')
             self.pre_processed_content = self.pre_processed_content.replace(table, new_table)
 
+    def _add_head_section(self):
+        self.pre_processed_content = f'<head><title> </title></head>{self.pre_processed_content}'
+
     def _generate_metadata(self):
         self.logger.debug(f"Generating meta-data")
         self._metadata_processor = MetaDataProcessor(self._note.conversion_settings)
         self._metadata_processor.parse_dict_metadata(self._note.note_json)
-        self.pre_processed_content = f'<head><title> </title></head>{self.pre_processed_content}'
-        self.pre_processed_content = self._metadata_processor.add_metadata_html_to_content(self.pre_processed_content)
+        self._metadata_added = self._metadata_processor.add_metadata_html_to_soup(self._soup)
 
     def _generate_links_to_other_note_pages(self):
         self.logger.debug(f"Creating links between pages")
-        self.pre_processed_content = self._note.nsx_file.inter_note_link_processor.update_content(self.pre_processed_content)
+        link_processor = self._note.nsx_file.inter_note_link_processor
+        self.pre_processed_content = link_processor.update_content(self.pre_processed_content, self._note)
 
     def _add_file_attachment_links(self):
         self.logger.debug(f"Add attachment links to page content")
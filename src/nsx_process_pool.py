@@ -0,0 +1,102 @@
+import logging
+from pathlib import Path
+
+import chart_rendering
+import config
+import content_features
+import file_writer
+from nsx_file_converter import NSXFile
+import pandoc_cache
+from pandoc_converter import PandocConverter
+from worker_processes import worker_process_pool
+
+
+def what_module_is_this():
+    return __name__
+
+
+class InterNoteLinkReport:
+    """
+    The results of an NSXInterNoteLinkProcessor that are reported at the end of a run, with the links as raw link text
+    so they can be returned from a worker process.
+    """
+
+    def __init__(self, inter_note_link_processor):
+        self.replacement_links = [link.raw_link for link in inter_note_link_processor.replacement_links]
+        self.renamed_links_not_corrected = [link.raw_link
+                                            for link in inter_note_link_processor.renamed_links_not_corrected]
+        self.unmatched_links_msg = inter_note_link_processor.unmatched_links_msg
+
+
+class NSXFileResult:
+    """
+    The statistics of an NSX file converted in a worker process.  Has the same statistics attributes as NSXFile so
+    NotesConvertor can report on either.
+    """
+
+    def __init__(self, nsx_file, cache_statistics, skipped_stage_counts, write_errors, chart_cache_statistics):
+        self.nsx_file_name = nsx_file.nsx_file_name
+        self.note_page_count = nsx_file.note_page_count
+        self.note_book_count = nsx_file.note_book_count
+        self.image_count = nsx_file.image_count
+        self.attachment_count = nsx_file.attachment_count
+        self.unchanged_note_count = nsx_file.unchanged_note_count
+        self.inter_note_link_processor = InterNoteLinkReport(nsx_file.inter_note_link_processor)
+        self.cache_statistics = cache_statistics
+        self.skipped_stage_counts = skipped_stage_counts
+        self.write_errors = write_errors
+        self.chart_cache_statistics = chart_cache_statistics
+
+
+def convert_nsx_files_in_processes(nsx_files, conversion_settings, number_of_processes):
+    """
+    Convert nsx files at the same time on a pool of worker processes.
+
+    The largest files are started first so a large file started last does not leave the other processes idle at the
+    end of the run.  Progress bars are not shown for files converted in worker processes.
+
+    Parameters
+    ----------
+    nsx_files : list[pathlib.Path]
+        The nsx files to convert
+    conversion_settings : ConversionSettings
+        The conversion settings for all of the files
+    number_of_processes : int
+        The maximum number of files to convert at the same time
+
+    Returns
+    -------
+    list[NSXFileResult]
+        The result for each file in the same order as nsx_files
+
+    """
+    largest_first = sorted(nsx_files, key=lambda nsx_file: Path(nsx_file).stat().st_size, reverse=True)
+
+    with worker_process_pool(number_of_processes) as executor:
+        conversions = {nsx_file: executor.submit(_convert_nsx_file, nsx_file, conversion_settings)
+                       for nsx_file in largest_first}
+
+        return [conversions[nsx_file].result() for nsx_file in nsx_files]
+
+
+def _convert_nsx_file(nsx_file_path, conversion_settings):
+    logger = logging.getLogger(f'{config.APP_NAME}.{what_module_is_this()}')
+    logger.debug(f"Converting {nsx_file_path} in a worker process")
+
+    # a worker process can convert several files, the statistics returned are for this file only
+    cache_hits_before, cache_misses_before = pandoc_cache.cache_statistics()
+    chart_cache_hits_before, chart_cache_misses_before = chart_rendering.chart_cache_statistics()
+    content_features.reset_skipped_stage_counts()
+    if config.write_behind:
+        file_writer.start_write_behind(config.write_queue_size)
+    try:
+        nsx_file = NSXFile(nsx_file_path, conversion_settings, PandocConverter(conversion_settings))
+        nsx_file.process_nsx_file()
+    finally:
+        write_errors = file_writer.finish_write_behind()
+
+    cache_hits, cache_misses = pandoc_cache.cache_statistics()
+    chart_cache_hits, chart_cache_misses = chart_rendering.chart_cache_statistics()
+    return NSXFileResult(nsx_file, (cache_hits - cache_hits_before, cache_misses - cache_misses_before),
+                         content_features.skipped_stage_counts(), write_errors,
+                         (chart_cache_hits - chart_cache_hits_before, chart_cache_misses - chart_cache_misses_before))
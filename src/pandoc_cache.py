@@ -0,0 +1,187 @@
+import atexit
+import hashlib
+import json
+import logging
+from pathlib import Path
+import sqlite3
+import threading
+import time
+
+import config
+
+
+def what_module_is_this():
+    return __name__
+
+
+class PandocCache:
+    """
+    An on disk cache of pandoc conversions stored in a SQLite database.
+
+    Entries are keyed on a hash of the text to be converted, the pandoc options and the pandoc version, so a note
+    that has not changed since the last run can be re-used without running pandoc.  When the total size of the
+    cached output grows past max_size bytes the least recently used entries are removed.
+
+    """
+
+    def __init__(self, cache_file, max_size):
+        self.logger = logging.getLogger(f'{config.APP_NAME}.{what_module_is_this()}.{self.__class__.__name__}')
+        self.logger.setLevel(config.logger_level)
+        self._cache_file = Path(cache_file)
+        self._max_size = max_size
+        self._connection = None
+        self._total_size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def open(self):
+        """
+        Open, creating if required, the cache database.
+
+        Returns
+        -------
+        bool:
+            True if the cache can be used, False if the database could not be opened.
+
+        """
+        try:
+            self._cache_file.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(str(self._cache_file), check_same_thread=False)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute('PRAGMA synchronous=NORMAL')
+            self._connection.execute('CREATE TABLE IF NOT EXISTS conversions '
+                                     '(key TEXT PRIMARY KEY, output TEXT NOT NULL, '
+                                     'size INTEGER NOT NULL, last_used REAL NOT NULL)')
+            self._connection.execute('CREATE INDEX IF NOT EXISTS conversions_last_used ON conversions (last_used)')
+            self._connection.commit()
+            self._total_size = self._connection.execute('SELECT COALESCE(SUM(size), 0) FROM conversions').fetchone()[0]
+        except (OSError, sqlite3.Error) as exc:
+            self.logger.warning(f"Unable to open pandoc cache {self._cache_file} - {exc}")
+            self._connection = None
+            return False
+
+        atexit.register(self.close)
+        self.logger.debug(f"Opened pandoc cache {self._cache_file} containing {self._total_size} bytes")
+        return True
+
+    def close(self):
+        if self._connection is None:
+            return
+
+        with self._lock:
+            self._connection.close()
+            self._connection = None
+
+        atexit.unregister(self.close)
+
+    @staticmethod
+    def make_key(input_data, pandoc_options, pandoc_version):
+        key_data = json.dumps([str(pandoc_version), [str(option) for option in pandoc_options]])
+        return hashlib.sha256(f'{key_data}\0{input_data}'.encode('utf-8')).hexdigest()
+
+    def fetch(self, key):
+        """
+        Return the cached conversion for key, or None if the conversion is not in the cache.
+        """
+        if self._connection is None:
+            return None
+
+        with self._lock:
+            try:
+                row = self._connection.execute('SELECT output FROM conversions WHERE key = ?', (key,)).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+
+                self._connection.execute('UPDATE conversions SET last_used = ? WHERE key = ?', (time.time(), key))
+                self._connection.commit()
+            except sqlite3.Error as exc:
+                self.logger.warning(f"Unable to read from pandoc cache - {exc}")
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return row[0]
+
+    def store(self, key, output):
+        if self._connection is None:
+            return
+
+        size = len(output.encode('utf-8'))
+        if size > self._max_size:
+            return
+
+        with self._lock:
+            try:
+                existing = self._connection.execute('SELECT size FROM conversions WHERE key = ?', (key,)).fetchone()
+                self._connection.execute('INSERT OR REPLACE INTO conversions (key, output, size, last_used) '
+                                         'VALUES (?, ?, ?, ?)', (key, output, size, time.time()))
+                self._total_size += size - (existing[0] if existing else 0)
+                if self._total_size > self._max_size:
+                    self._evict_least_recently_used()
+                self._connection.commit()
+            except sqlite3.Error as exc:
+                self.logger.warning(f"Unable to write to pandoc cache - {exc}")
+
+    def _evict_least_recently_used(self):
+        keys_to_remove = []
+        for key, size in self._connection.execute('SELECT key, size FROM conversions ORDER BY last_used'):
+            if self._total_size <= self._max_size:
+                break
+            keys_to_remove.append((key,))
+            self._total_size -= size
+
+        self._connection.executemany('DELETE FROM conversions WHERE key = ?', keys_to_remove)
+        self.logger.debug(f"Removed {len(keys_to_remove)} entries from pandoc cache")
+
+    @property
+    def total_size(self):
+        return self._total_size
+
+    @property
+    def is_open(self):
+        return self._connection is not None
+
+
+_pandoc_caches = {}
+_worker_process_statistics = [0, 0]
+
+
+def get_pandoc_cache(cache_file, max_size):
+    """
+    Return the pandoc cache stored in cache_file, opening it on first use.
+
+    Every PandocConverter in a run using the same cache file shares one PandocCache, so hit and miss counts are for
+    the whole run.  None is returned if the cache can not be opened.
+    """
+    cache_file = str(cache_file)
+    if cache_file not in _pandoc_caches:
+        cache = PandocCache(cache_file, max_size)
+        _pandoc_caches[cache_file] = cache if cache.open() else None
+
+    return _pandoc_caches[cache_file]
+
+
+def cache_statistics():
+    """
+    Return the total number of cache hits and misses for the pandoc caches used in this run, including those used in
+    worker processes.
+    """
+    caches = [cache for cache in _pandoc_caches.values() if cache is not None]
+    return (sum(cache.hits for cache in caches) + _worker_process_statistics[0],
+            sum(cache.misses for cache in caches) + _worker_process_statistics[1])
+
+
+def add_cache_statistics(hits, misses):
+    """Add the cache hits and misses of a worker process to the statistics for this run."""
+    _worker_process_statistics[0] += hits
+    _worker_process_statistics[1] += misses
+
+
+def close_pandoc_caches():
+    for cache in _pandoc_caches.values():
+        if cache is not None:
+            cache.close()
+    _pandoc_caches.clear()
+    _worker_process_statistics[:] = [0, 0]
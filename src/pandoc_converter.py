@@ -1,10 +1,19 @@
+import atexit
+import json
 from packaging import version
 import logging
 from pathlib import Path
+import re
+import socket
 import subprocess
 import sys
+import time
+import urllib.error
+import urllib.request
+import uuid
 
 import config
+from pandoc_cache import get_pandoc_cache
 
 
 def what_module_is_this():
@@ -28,6 +37,8 @@ class PandocConverter:
                                           'html': 'html'}
         self.pandoc_options = None
         self._pandoc_path = None
+        self._pandoc_server = None
+        self._pandoc_cache = None
         self.set_pandoc_path()
         self.check_and_set_pandoc_options_if_required()
 
@@ -58,6 +69,10 @@ class PandocConverter:
 
         self.find_pandoc_version()
         self.generate_pandoc_options()
+        if config.pandoc_server:
+            self.start_pandoc_server()
+        if config.pandoc_cache:
+            self.open_pandoc_cache()
 
     def find_pandoc_version(self):
         try:
@@ -101,12 +116,91 @@ class PandocConverter:
         # if not nsx or html must be markdown
         return self.pandoc_conversion_options[self.conversion_settings.markdown_conversion_input]
 
+    def start_pandoc_server(self):
+        """
+        Use the run wide pandoc server for conversions if it can be started and produces the same output as the
+        pandoc command line, otherwise conversions continue to use a pandoc process per conversion.
+        """
+        if self._pandoc_older_than_v_2_18():
+            self.logger.warning(f"Pandoc {self._pandoc_version} does not support server mode, "
+                                f"using pandoc command line for conversions")
+            return
+
+        server = get_pandoc_server(self._pandoc_path)
+        if server is None or not self._server_output_matches_command_line(server):
+            self.logger.warning("Pandoc server is not available, using pandoc command line for conversions")
+            return
+
+        self._pandoc_server = server
+        self.logger.info(f"Using pandoc server on port {server.port} for conversions")
+
+    def _server_output_matches_command_line(self, server):
+        if self._calculate_input_format() == 'html':
+            sample = '<h1>Title</h1><p>Some <strong>text</strong> and a <a href="page.html">link</a></p>'
+        else:
+            sample = '# Title\n\nSome **text** and a [link](page.md)\n'
+
+        expected = subprocess.run(self.pandoc_options, input=sample, capture_output=True,
+                                  encoding='utf-8', text=True, timeout=20).stdout
+
+        return server.convert(sample, self._server_conversion_options()) == expected
+
+    def _server_conversion_options(self):
+        return {'from': self._calculate_input_format(),
+                'to': self.pandoc_conversion_options[self.output_file_format],
+                'standalone': True,
+                'wrap': 'none',
+                'markdown-headings': 'atx',
+                }
+
+    def _convert_using_server(self, input_data):
+        if self._pandoc_server is None:
+            return None
+
+        output = self._pandoc_server.convert(input_data, self._server_conversion_options())
+        if output is None:
+            self.logger.warning("Pandoc server conversion failed, using pandoc command line")
+
+        return output
+
+    def open_pandoc_cache(self):
+        cache_file = Path(self.conversion_settings.working_directory, config.DATA_DIR, 'cache', 'pandoc_cache.db')
+        self._pandoc_cache = get_pandoc_cache(cache_file, config.pandoc_cache_size * 1024 * 1024)
+        if self._pandoc_cache is None:
+            self.logger.warning("Pandoc cache is not available, all notes will be converted with pandoc")
+
+    def _cache_key(self, input_data):
+        return self._pandoc_cache.make_key(input_data, self.pandoc_options, self._pandoc_version)
+
+    def _fetch_from_cache(self, input_data):
+        if self._pandoc_cache is None:
+            return None
+
+        return self._pandoc_cache.fetch(self._cache_key(input_data))
+
+    def _store_in_cache(self, input_data, output):
+        if self._pandoc_cache is None:
+            return
+
+        self._pandoc_cache.store(self._cache_key(input_data), output)
+
     def convert_using_strings(self, input_data, note_title):
+        output = self._fetch_from_cache(input_data)
+        if output is not None:
+            return output
+
+        output = self._convert_using_server(input_data)
+        if output is not None:
+            self._store_in_cache(input_data, output)
+            return output
+
         try:
             out = subprocess.run(self.pandoc_options, input=input_data, capture_output=True,
                                  encoding='utf-8', text=True, timeout=20)
             if out.returncode > 0:
                 self.logger.error(f"Pandoc Return code={out.returncode}, error={out.stderr}")
+            else:
+                self._store_in_cache(input_data, out.stdout)
             return out.stdout
 
         except subprocess.CalledProcessError as exc:
@@ -117,6 +211,103 @@ class PandocConverter:
 
         return 'Error converting data'
 
+    def convert_batch_using_strings(self, list_of_input_data, list_of_note_titles):
+        """
+        Convert a list of notes with as few pandoc processes as possible.
+
+        Notes already in the pandoc cache are not converted again.  Notes that can share a pandoc process are joined
+        into one document with a unique sentinel marker before each note, converted with one pandoc run and the output
+        is split back into one string per note.  Notes with a <head> section are converted on their own, as pandoc
+        would render the head of only one note in a combined document.  If the batch fails to convert or the sentinel
+        markers do not survive the conversion the notes are converted one at a time.
+
+        Parameters
+        ----------
+        list_of_input_data : list of str
+            Pre-processed content of each note
+        list_of_note_titles : list of str
+            Title of each note, used for error reporting
+
+        Returns
+        -------
+        list of str:
+            Converted content of each note, in the same order as list_of_input_data
+
+        """
+        converted = [self._fetch_from_cache(input_data) for input_data in list_of_input_data]
+        batchable = [index for index, input_data in enumerate(list_of_input_data)
+                     if converted[index] is None and self._can_be_batched(input_data)]
+
+        if len(batchable) > 1:
+            batch_output = self._convert_batch([list_of_input_data[index] for index in batchable])
+            if batch_output is None:
+                self.logger.warning(f"Batch conversion of {len(batchable)} notes failed, "
+                                    f"converting the notes one at a time")
+            else:
+                for index, output in zip(batchable, batch_output):
+                    converted[index] = output
+                    self._store_in_cache(list_of_input_data[index], output)
+
+        for index, output in enumerate(converted):
+            if output is None:
+                converted[index] = self.convert_using_strings(list_of_input_data[index], list_of_note_titles[index])
+
+        return converted
+
+    @staticmethod
+    def _can_be_batched(input_data):
+        return input_data.strip() != '' and '<head' not in input_data
+
+    def _convert_batch(self, list_of_input_data):
+        sentinel = f'yanombatch{uuid.uuid4().hex}'
+        batch_input = self._join_batch(sentinel, list_of_input_data)
+
+        output = self._convert_using_server(batch_input)
+        if output is not None:
+            return self._split_batch(sentinel, output, len(list_of_input_data))
+
+        try:
+            out = subprocess.run(self.pandoc_options, input=batch_input, capture_output=True,
+                                 encoding='utf-8', text=True, timeout=20 + len(list_of_input_data))
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as exc:
+            self.logger.warning(f"Pandoc batch conversion error - {exc}")
+            return None
+
+        if out.returncode > 0:
+            self.logger.warning(f"Pandoc batch Return code={out.returncode}, error={out.stderr}")
+            return None
+
+        return self._split_batch(sentinel, out.stdout, len(list_of_input_data))
+
+    def _join_batch(self, sentinel, list_of_input_data):
+        if self._calculate_input_format() == 'html':
+            markers = [f'<p>{sentinel}n{index}</p>' for index in range(len(list_of_input_data) + 1)]
+        else:
+            markers = [f'\n\n{sentinel}n{index}\n\n' for index in range(len(list_of_input_data) + 1)]
+
+        parts = [f'{marker}{input_data}' for marker, input_data in zip(markers, list_of_input_data)]
+        return ''.join(parts) + markers[-1]
+
+    @staticmethod
+    def _split_batch(sentinel, batch_output, number_of_notes):
+        """
+        Split converted batch output back into notes.
+
+        Text before the first marker is the standalone document header and text after the last marker is the
+        footer, each note is given the same header and footer it would have had if converted on its own.
+        Returns None if the markers are missing or out of order.
+        """
+        pieces = re.split(rf'(?:<p>)?{sentinel}n(\d+)(?:</p>)?', batch_output)
+        marker_numbers = pieces[1::2]
+        if marker_numbers != [str(index) for index in range(number_of_notes + 1)]:
+            return None
+
+        header = pieces[0]
+        footer = pieces[-1]
+        note_bodies = [body.strip('\n') for body in pieces[2:-1:2]]
+
+        return [f"{header}{body}{footer}" for body in note_bodies]
+
     def _pandoc_older_than_v_1_16(self):
         return version.parse(self._pandoc_version) < version.parse('1.16')
 
@@ -126,4 +317,154 @@ class PandocConverter:
     def _pandoc_older_than_v_2_11_2(self):
         return version.parse(self._pandoc_version) < version.parse('2.11.2')
 
+    def _pandoc_older_than_v_2_18(self):
+        return version.parse(self._pandoc_version) < version.parse('2.18')
+
+
+class PandocServer:
+    """
+    A ``pandoc server`` process listening on a local port.
+
+    Conversions are sent to the server as JSON using pandoc's HTTP API, so a new pandoc process is not started
+    for every note.  The server is stopped when ``stop`` is called or when the program exits.
+    """
+    def __init__(self, pandoc_path, start_up_timeout=5, conversion_timeout=20):
+        self.logger = logging.getLogger(f'{config.APP_NAME}.{what_module_is_this()}.{self.__class__.__name__}')
+        self.logger.setLevel(config.logger_level)
+        self._pandoc_path = pandoc_path
+        self._start_up_timeout = start_up_timeout
+        self._conversion_timeout = conversion_timeout
+        self._process = None
+        self._port = None
+
+    def start(self):
+        """
+        Start the server and wait for it to accept connections.
+
+        Returns
+        -------
+        bool:
+            True if the server is running, False if it could not be started.
+
+        """
+        self._port = self._find_free_port()
+        try:
+            self._process = subprocess.Popen([self._pandoc_path, 'server', '--port', str(self._port),
+                                              '--timeout', str(self._conversion_timeout)],
+                                             stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        except OSError as exc:
+            self.logger.warning(f"Unable to start pandoc server - {exc}")
+            self._process = None
+            return False
+
+        atexit.register(self.stop)
+
+        deadline = time.monotonic() + self._start_up_timeout
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                self.logger.warning(f"Pandoc server exited with return code {self._process.returncode}")
+                self.stop()
+                return False
+            try:
+                with socket.create_connection(('127.0.0.1', self._port), timeout=0.5):
+                    self.logger.debug(f"Pandoc server started on port {self._port}")
+                    return True
+            except OSError:
+                time.sleep(0.05)
+
+        self.logger.warning(f"Pandoc server did not start within {self._start_up_timeout} seconds")
+        self.stop()
+        return False
+
+    def stop(self):
+        if self._process is None:
+            return
+
+        if self._process.poll() is None:
+            self._process.terminate()
+            try:
+                self._process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._process.kill()
+                self._process.wait()
+
+        self.logger.debug("Pandoc server stopped")
+        self._process = None
+        atexit.unregister(self.stop)
+
+    def convert(self, input_data, conversion_options):
+        """
+        Convert text using the pandoc server.
+
+        Parameters
+        ----------
+        input_data : str
+            Text to be converted
+        conversion_options : dict
+            pandoc server options, for example 'from', 'to' and 'standalone'
+
+        Returns
+        -------
+        str or None:
+            The converted text, or None if the server was unable to convert the text.
+
+        """
+        if not self.is_running:
+            return None
+
+        body = json.dumps({**conversion_options, 'text': input_data}).encode('utf-8')
+        request = urllib.request.Request(f'http://127.0.0.1:{self._port}/', data=body,
+                                         headers={'Content-Type': 'application/json',
+                                                  'Accept': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=self._conversion_timeout) as response:
+                result = json.loads(response.read().decode('utf-8'))
+        except (urllib.error.URLError, OSError, ValueError) as exc:
+            self.logger.warning(f"Pandoc server request failed - {exc}")
+            return None
+
+        if not isinstance(result, dict) or 'output' not in result or result.get('base64'):
+            self.logger.warning(f"Pandoc server conversion error - {result}")
+            return None
+
+        return result['output']
+
+    @staticmethod
+    def _find_free_port():
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.bind(('127.0.0.1', 0))
+            return sock.getsockname()[1]
+
+    @property
+    def is_running(self):
+        return self._process is not None and self._process.poll() is None
+
+    @property
+    def port(self):
+        return self._port
+
+
+_pandoc_servers = {}
+
+
+def get_pandoc_server(pandoc_path):
+    """
+    Return the pandoc server for this run, starting it on first use.
+
+    Every PandocConverter shares the same server.  If the server can not be started None is returned, and is
+    remembered so that the start up is not retried for every file.
+    """
+    if pandoc_path not in _pandoc_servers:
+        server = PandocServer(pandoc_path)
+        _pandoc_servers[pandoc_path] = server if server.start() else None
+
+    return _pandoc_servers[pandoc_path]
+
+
+def stop_pandoc_servers():
+    for server in _pandoc_servers.values():
+        if server is not None:
+            server.stop()
+    _pandoc_servers.clear()
+
 
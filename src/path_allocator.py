@@ -0,0 +1,127 @@
+from pathlib import Path
+import sys
+import threading
+
+
+class PathAllocator:
+    """
+    Hand out unique file and folder names without checking the file system for every candidate name.
+
+    The first time a directory is used its contents are read once.  After that names are checked against, and added
+    to, the in memory record of the names in use in that directory.  Numbered names continue from the last number
+    handed out for the same name, so allocating many copies of a common name such as 'image.png' does not re-test
+    every lower number.  Allocation is protected by a lock so concurrent workers can not be given the same name.
+
+    Names are only known to be in use if they existed when the directory was read or have been allocated or reserved
+    since, so files created in a directory by other means after it has been read are not seen until reset is called.
+
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._names_in_use = {}
+        self._next_number = {}
+
+    @staticmethod
+    def _name_key(name):
+        # windows and macOS file systems do not normally distinguish file names that differ only by case
+        if sys.platform in ('win32', 'darwin'):
+            return name.casefold()
+        return name
+
+    def _names_in(self, directory):
+        directory = Path(directory)
+        if directory not in self._names_in_use:
+            try:
+                names = {self._name_key(entry.name) for entry in directory.iterdir()}
+            except OSError:
+                names = set()
+            self._names_in_use[directory] = names
+
+        return self._names_in_use[directory]
+
+    def is_in_use(self, path):
+        path = Path(path)
+        with self._lock:
+            return self._name_key(path.name) in self._names_in(path.parent)
+
+    def reserve(self, path):
+        """Record path as in use, returns True if it was not already in use."""
+        path = Path(path)
+        with self._lock:
+            names = self._names_in(path.parent)
+            key = self._name_key(path.name)
+            if key in names:
+                return False
+            names.add(key)
+            return True
+
+    def release(self, path):
+        """Record path as no longer in use, for example after the file has been moved."""
+        path = Path(path)
+        with self._lock:
+            self._names_in(path.parent).discard(self._name_key(path.name))
+
+    def allocate(self, path, number_format='-{}', is_directory=False):
+        """
+        Reserve and return path if it is not in use, otherwise the first unused path with an incrementing number
+        added to the file name.
+
+        Parameters
+        ----------
+        path : pathlib.Path
+            The preferred path
+        number_format : str
+            Format of the text added to the end of the file name, before the suffix, where {} is the number.
+        is_directory : bool
+            If True path is a directory name, which has no suffix, so the number is added to the end of the whole name.
+
+        Returns
+        -------
+        pathlib.Path
+            The reserved path
+
+        """
+        path = Path(path)
+        with self._lock:
+            names = self._names_in(path.parent)
+            if self._name_key(path.name) not in names:
+                names.add(self._name_key(path.name))
+                return path
+
+            stem, suffix = (path.name, '') if is_directory else (path.stem, path.suffix)
+            counter_key = (path.parent, self._name_key(stem), self._name_key(suffix), number_format)
+            n = self._next_number.get(counter_key, 1)
+            candidate = Path(path.parent, f"{stem}{number_format.format(n)}{suffix}")
+            while self._name_key(candidate.name) in names:
+                n += 1
+                candidate = Path(path.parent, f"{stem}{number_format.format(n)}{suffix}")
+
+            self._next_number[counter_key] = n + 1
+            names.add(self._name_key(candidate.name))
+            return candidate
+
+    def allocate_using(self, path, make_new_path):
+        """
+        Reserve and return path if it is not in use, otherwise repeatedly call make_new_path with the last path tried
+        until an unused path is returned and reserve that.
+        """
+        path = Path(path)
+        with self._lock:
+            while self._name_key(path.name) in self._names_in(path.parent):
+                path = Path(make_new_path(path))
+            self._names_in(path.parent).add(self._name_key(path.name))
+            return path
+
+    def reset(self):
+        with self._lock:
+            self._names_in_use.clear()
+            self._next_number.clear()
+
+
+_path_allocator = PathAllocator()
+
+
+def path_allocator():
+    """Return the path allocator shared by the whole run."""
+    return _path_allocator
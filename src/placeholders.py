@@ -0,0 +1,52 @@
+import re
+
+# placeholders end with '-end' so digits in the text that follows are not read as part of the id
+_PLACEHOLDER_PATTERN = re.compile(r'( *)([a-z]+-placeholder-id-\d+-end)')
+
+
+def make_placeholder(kind, item):
+    """Return the placeholder text used in content in place of item, kind is for example 'checklist'."""
+    return f'{kind}-placeholder-id-{id(item)}-end'
+
+
+class PlaceholderRegistry:
+    """
+    Placeholders put in to content in place of elements that can not be converted, and the text that replaces them.
+
+    Every placeholder is restored in one scan of the content with a single compiled regular expression and a
+    dictionary lookup, so the time taken grows with the length of the content rather than with the number of
+    placeholders multiplied by the length of the content.  Placeholders in the content that are not in the registry
+    are left as they are.
+
+    Parameters
+    ----------
+    remove_leading_spaces : bool
+        If True spaces before a placeholder are removed when it is restored, as leading spaces would stop the
+        markdown that replaces it working.
+
+    """
+
+    def __init__(self, remove_leading_spaces=False):
+        self._remove_leading_spaces = remove_leading_spaces
+        self._replacements = {}
+
+    def __len__(self):
+        return len(self._replacements)
+
+    def add(self, placeholder, replacement):
+        self._replacements[placeholder] = replacement
+
+    def restore(self, content):
+        """Return content with every placeholder in the registry replaced by its replacement text."""
+        if not self._replacements:
+            return content
+
+        return _PLACEHOLDER_PATTERN.sub(self._replacement_for, content)
+
+    def _replacement_for(self, match):
+        replacement = self._replacements.get(match.group(2))
+        if replacement is None:
+            return match.group(0)
+        if self._remove_leading_spaces:
+            return replacement
+        return f'{match.group(1)}{replacement}'
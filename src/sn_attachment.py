@@ -1,9 +1,11 @@
 from abc import ABC, abstractmethod
 from pathlib import Path
 
+from attachment_store import attachment_store
 import config
 from file_writer import store_file
 import helper_functions
+from path_allocator import path_allocator
 
 
 class NSAttachment(ABC):
@@ -19,6 +21,7 @@ class NSAttachment(ABC):
         self._filename_inside_nsx = ''
         self._html_link = ''
         self._attachment_folder_name = self._conversion_settings.attachment_folder_name
+        self._stored_copy = None
 
     @abstractmethod
     def create_html_link(self):  # pragma: no cover
@@ -49,11 +52,11 @@ class NSAttachment(ABC):
                                self._path_relative_to_notebook)
 
     def change_file_name_if_already_exists(self):
-        while self._full_path.is_file():
-            self._full_path = helper_functions.add_random_string_to_file_name(self._full_path, 4)
+        self._full_path = path_allocator().allocate_using(
+            self._full_path, lambda path: helper_functions.add_random_string_to_file_name(path, 4))
 
         self._file_name = self._full_path.name
-        self._path_relative_to_notebook = (Path(self._conversion_settings.attachment_folder_name, self._file_name))
+        self.generate_relative_path_to_notebook()
 
     @property
     def notebook_folder_name(self):
@@ -75,6 +78,14 @@ class NSAttachment(ABC):
     def filename_inside_nsx(self):
         return self._filename_inside_nsx
 
+    @property
+    def stored_copy(self):
+        """
+        Path of a file with the same content already placed in the export folder in this run, None if this attachment
+        has to be extracted from the nsx file.
+        """
+        return self._stored_copy
+
     @property
     def html_link(self):
         return self._html_link
@@ -88,7 +99,51 @@ class FileNSAttachment(NSAttachment):
     def __init__(self, note, attachment_id):
         super().__init__(note, attachment_id)
         self._name = self._json['attachment'][attachment_id]['name']
-        self._filename_inside_nsx = f"file_{self._json['attachment'][attachment_id]['md5']}"
+        self._md5 = self._json['attachment'][attachment_id]['md5']
+        self._filename_inside_nsx = f"file_{self._md5}"
+
+    def generate_relative_path_to_notebook(self):
+        if config.attachment_store != 'shared':
+            super().generate_relative_path_to_notebook()
+            return
+
+        self._path_relative_to_notebook = Path('..', self._attachment_folder_name, self._file_name)
+
+    def generate_absolute_path(self):
+        if config.attachment_store != 'shared':
+            super().generate_absolute_path()
+            return
+
+        self._full_path = Path(self._conversion_settings.working_directory, config.DATA_DIR,
+                               self._conversion_settings.export_folder_name,
+                               self._attachment_folder_name,
+                               self._file_name)
+
+    def change_file_name_if_already_exists(self):
+        """
+        Allocate a unique file name, or when using an attachment store re-use the file already placed for an
+        attachment with the same md5.  With the shared layout the note links to that file, with the hardlink layout
+        the attachment gets its own file name in the notebook which is linked to that file when it is saved.
+        """
+        stored_copy = attachment_store().path_for(self._md5) if config.attachment_store != 'copy' else None
+        if stored_copy is None:
+            super().change_file_name_if_already_exists()
+            if config.attachment_store != 'copy':
+                attachment_store().add(self._md5, self._full_path)
+            return
+
+        self._stored_copy = stored_copy
+        if config.attachment_store == 'hardlink':
+            super().change_file_name_if_already_exists()
+            return
+
+        self._full_path = stored_copy
+        self._file_name = stored_copy.name
+        self.generate_relative_path_to_notebook()
+
+    @property
+    def md5(self):
+        return self._md5
 
     def create_html_link(self):
         self._html_link = f'<a href="{self._path_relative_to_notebook}">{self.file_name}</a>'
@@ -97,7 +152,8 @@ class FileNSAttachment(NSAttachment):
         self._file_name = helper_functions.generate_clean_path(self._name)
 
     def get_content_to_save(self):
-        return self._nsx_file.fetch_attachment_file(self.filename_inside_nsx)
+        # a file-like object is returned so the attachment is streamed to disk rather than read into memory
+        return self._nsx_file.open_attachment_file(self.filename_inside_nsx)
 
 
 class ImageNSAttachment(FileNSAttachment):
@@ -135,6 +191,14 @@ class ChartNSAttachment(NSAttachment):
     def create_file_name(self):
         self._file_name = helper_functions.generate_clean_path(self._attachment_id)
 
+    def change_file_name_if_already_exists(self):
+        """
+        Chart file names are made from a hash of the chart, so a file that already has this name holds the same chart
+        and is linked to rather than saving another copy with a different name.
+        """
+        if not path_allocator().reserve(self._full_path):
+            self._stored_copy = self._full_path
+
     @property
     def chart_file_like_object(self):
         return self._chart_file_like_object
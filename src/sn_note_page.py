@@ -3,6 +3,7 @@ import time
 from pathlib import Path
 
 import config
+import file_writer
 import helper_functions
 from nsx_post_processing import NoteStationPostProcessing
 from nsx_pre_processing import NoteStationPreProcessing
@@ -38,6 +39,7 @@ class NotePage:
         self._attachment_count = 0
         self._pre_processor = None
         self._post_processor = None
+        self._skip_conversion = False
 
     def _format_ctime_and_mtime_if_required(self):
         if self._conversion_settings.front_matter_format != 'none' \
@@ -46,15 +48,49 @@ class NotePage:
             self._note_json['mtime'] = time.strftime('%Y%m%d%H%M', time.localtime(self._note_json['mtime']))
 
     def process_note(self):
+        self.pre_process_note()
+        self.convert_data()
+        self.post_process_note()
+
+    def pre_process_note(self):
         self.logger.info(f"Processing note page '{self._title}' - {self._note_id}")
+        self._reload_raw_content_if_released()
         self.create_attachments()
         self.process_attachments()
         self.pre_process_content()
-        self.convert_data()
+
+    def post_process_note(self):
         if not self.conversion_settings.export_format == 'html':
             self.post_process_content()
         self.logger.debug(f"Processing of note page '{self._title}' - {self._note_id}  completed.")
 
+    def release_raw_content(self):
+        """
+        Drop the note content read from the nsx file.  The content is read from the nsx file again when the note is
+        processed.
+        """
+        self._raw_content = None
+        self._note_json.pop('content', None)
+
+    def _reload_raw_content_if_released(self):
+        if self._raw_content is None:
+            self._raw_content = self._nsx_file.fetch_json_data(self._note_id).get('content', '')
+
+    def save_note(self):
+        file_writer.store_file(self._full_path, self._converted_content)
+
+    def release_content(self):
+        """
+        Drop the note content and the pre and post processors, and the parsed html they hold, once the note has been
+        saved.  File names, paths and titles are kept as they are used for links from other notes.
+        """
+        self._raw_content = ''
+        self._note_json.pop('content', None)
+        self._pre_processed_content = ''
+        self._converted_content = ''
+        self._pre_processor = None
+        self._post_processor = None
+
     def _create_file_name(self):
         dirty_filename = self._append_file_extension()
         self._file_name = helper_functions.generate_clean_path(dirty_filename)
@@ -110,20 +146,26 @@ class NotePage:
         self._post_processor = NoteStationPostProcessing(self)
         self._converted_content = self._post_processor.post_processed_content
 
-    def increment_duplicated_title(self, list_of_existing_titles):
+    def increment_duplicated_title(self, list_of_existing_titles, next_number=None):
         """
         Add incrementing number to title for duplicates notes in a notebook.
 
         When a note title is found to already exist in a notebook add a number to the end of the title, incrementing
-        if required when there are multiple duplicates
+        if required when there are multiple duplicates.  If a next_number dictionary is provided the search for a free
+        number for a title starts from the number after the one last used for that title, and the dictionary is updated.
         """
-        this_title = self._title
-        n = 0
+        if self._title not in list_of_existing_titles:
+            return
+
+        n = next_number.get(self._title, 1) if next_number is not None else 1
+        this_title = f'{self._title}-{n}'
 
         while this_title in list_of_existing_titles:
             n += 1
             this_title = f'{self._title}-{n}'
 
+        if next_number is not None:
+            next_number[self._title] = n + 1
         self._title = this_title
 
     @property
@@ -158,6 +200,10 @@ class NotePage:
     def converted_content(self):
         return self._converted_content
 
+    @converted_content.setter
+    def converted_content(self, value):
+        self._converted_content = value
+
     @property
     def note_json(self):
         return self._note_json
@@ -206,6 +252,14 @@ class NotePage:
     def parent_notebook(self, value):
         self._parent_notebook = value
 
+    @property
+    def skip_conversion(self):
+        return self._skip_conversion
+
+    @skip_conversion.setter
+    def skip_conversion(self, value):
+        self._skip_conversion = value
+
     @property
     def pre_processor(self):
         return self._pre_processor
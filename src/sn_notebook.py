@@ -1,3 +1,5 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import logging
 from pathlib import Path
 
@@ -5,6 +7,7 @@ from alive_progress import alive_bar
 
 import config
 from helper_functions import generate_clean_path, find_working_directory
+from path_allocator import path_allocator
 from sn_note_page import NotePage
 
 
@@ -25,19 +28,81 @@ class Notebook:
         self.create_folder_name()
         self.full_path_to_notebook = ''
         self.note_pages = []
-        self.note_titles = []
+        self._note_titles = set()
+        self._next_duplicate_title_number = {}
 
     def process_notebook_pages(self):
         self.logger.info(f"Processing note book {self.title} - {self.notebook_id}")
 
+        note_pages_to_convert = [note_page for note_page in self.note_pages if not note_page.skip_conversion]
+
         if not config.silent:
             print(f"Processing '{self.title}' Notebook")
-        with alive_bar(len(self.note_pages), bar='blocks') as bar:
-            for note_page in self.note_pages:
+        with alive_bar(len(note_pages_to_convert), bar='blocks') as bar:
+            if config.workers > 1 or config.batch_size > 1:
+                self._process_notebook_pages_in_stages(note_pages_to_convert, bar)
+                return
+
+            for note_page in note_pages_to_convert:
                 note_page.process_note()
+                self._save_and_release_if_streaming(note_page)
                 if not config.silent:
                     bar()
 
+    def _process_notebook_pages_in_stages(self, note_pages, bar):
+        """
+        Run the pandoc conversion of the note pages in batches on a pool of worker threads.
+
+        Pre-processing and post-processing stay serial and in note page order, they create attachments, update
+        statistics and file names.  Only the pandoc conversions, which spend their time waiting on a pandoc
+        subprocess, run at the same time, so the results are the same as processing the pages one at a time.
+
+        A batch is pre-processed just before it is submitted and no more than one batch per worker is waiting to be
+        post-processed, so only the notes in those batches are held part way through processing.
+        """
+        batches = [note_pages[start:start + config.batch_size]
+                   for start in range(0, len(note_pages), config.batch_size)]
+
+        with ThreadPoolExecutor(max_workers=config.workers) as executor:
+            conversions = deque()
+            for batch in batches:
+                for note_page in batch:
+                    note_page.pre_process_note()
+                conversions.append((batch, executor.submit(self._convert_note_pages, batch)))
+                if len(conversions) > config.workers:
+                    self._post_process_batch(*conversions.popleft(), bar)
+
+            while conversions:
+                self._post_process_batch(*conversions.popleft(), bar)
+
+    def _post_process_batch(self, batch, conversion, bar):
+        conversion.result()
+        for note_page in batch:
+            note_page.post_process_note()
+            self._save_and_release_if_streaming(note_page)
+            if not config.silent:
+                bar()
+
+    @staticmethod
+    def _save_and_release_if_streaming(note_page):
+        if config.stream_notes:
+            note_page.save_note()
+            note_page.release_content()
+
+    def _convert_note_pages(self, note_pages):
+        if len(note_pages) == 1 or self.conversion_settings.export_format == 'html':
+            for note_page in note_pages:
+                note_page.convert_data()
+            return
+
+        self.logger.debug(f"Converting a batch of {len(note_pages)} note pages")
+        converted_content = self.nsx_file.pandoc_converter.convert_batch_using_strings(
+            [note_page.pre_processed_content for note_page in note_pages],
+            [note_page.title for note_page in note_pages])
+
+        for note_page, content in zip(note_pages, converted_content):
+            note_page.converted_content = content
+
     def pair_up_note_pages_and_notebooks(self, note_page: NotePage):
         self.logger.debug(f"Adding note '{note_page.title}' - {note_page.note_id} "
                           f"to Notebook '{self.title}' - {self.notebook_id}")
@@ -45,12 +110,21 @@ class Notebook:
         note_page.notebook_folder_name = self.folder_name
         note_page.parent_notebook = self.notebook_id
 
-        while note_page.title in self.note_titles:
-            note_page.increment_duplicated_title(self.note_titles)
+        if note_page.title in self._note_titles:
+            note_page.increment_duplicated_title(self._note_titles, self._next_duplicate_title_number)
 
-        self.note_titles.append(note_page.title)
+        self._note_titles.add(note_page.title)
         self.note_pages.append(note_page)
 
+    @property
+    def note_titles(self):
+        return self._note_titles
+
+    @note_titles.setter
+    def note_titles(self, titles):
+        self._note_titles = set(titles)
+        self._next_duplicate_title_number = {}
+
     def create_folder_name(self):
         self.folder_name = generate_clean_path(self.title)
 
@@ -62,21 +136,23 @@ class Notebook:
         self.logger.debug(f"Creating notebook folder for {self.title}")
         current_directory_path = self.conversion_settings.working_directory
 
-        n = 0
-        target_path = Path(current_directory_path, config.DATA_DIR,
-                           self.nsx_file.conversion_settings.export_folder_name,
-                           self.folder_name)
+        preferred_path = Path(current_directory_path, config.DATA_DIR,
+                              self.nsx_file.conversion_settings.export_folder_name, self.folder_name)
+        target_path = path_allocator().allocate(preferred_path, is_directory=True)
 
-        while target_path.exists():
-            n += 1
-            target_path = Path(current_directory_path, config.DATA_DIR,
-                               self.nsx_file.conversion_settings.export_folder_name,
-                               f"{self.folder_name}-{n}")
+        # a process converting another nsx file into the same export folder may create a folder of the same name
+        # first, existing folders are only re-used when an incremental conversion has released them for re-use
+        while True:
+            try:
+                target_path.mkdir(parents=True, exist_ok=config.incremental)
+                break
+            except FileExistsError:
+                target_path = path_allocator().allocate(preferred_path, is_directory=True)
 
-        target_path.mkdir(parents=True, exist_ok=True)
-        self.folder_name = target_path.stem
+        self.folder_name = target_path.name
         self.full_path_to_notebook = target_path
 
     def create_attachment_folder(self):
         self.logger.debug(f"Creating attachment folder")
-        Path(self.full_path_to_notebook, self.conversion_settings.attachment_folder_name).mkdir()
+        # the folder already exists when an incremental conversion re-uses the notebook folder of a previous run
+        Path(self.full_path_to_notebook, self.conversion_settings.attachment_folder_name).mkdir(exist_ok=True)
@@ -0,0 +1,43 @@
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+import logging
+import logging.handlers
+import multiprocessing
+
+import config
+
+
+@contextmanager
+def worker_process_pool(max_workers, initializer=None, initargs=()):
+    """
+    Provide a ProcessPoolExecutor whose worker processes use the run settings of this process.
+
+    Worker processes are started fresh rather than forked, so they do not share open files, databases or threads with
+    this process.  Their log records are passed back to the log handlers of this process.  Progress bars are not shown
+    in worker processes as several progress bars would be mixed together on the console.  initializer is called with
+    initargs in each worker process once the settings have been applied.
+    """
+    context = multiprocessing.get_context('spawn')
+    log_queue = context.Queue()
+    log_listener = logging.handlers.QueueListener(log_queue, *logging.getLogger().handlers,
+                                                  respect_handler_level=True)
+    log_listener.start()
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=context,
+                                 initializer=_initialise_worker_process,
+                                 initargs=(config.run_settings(), log_queue, initializer, initargs)) as executor:
+            yield executor
+    finally:
+        log_listener.stop()
+
+
+def _initialise_worker_process(run_settings, log_queue, initializer, initargs):
+    config.apply_run_settings(run_settings)
+    config.set_silent(True)
+
+    root_logger = logging.getLogger()
+    root_logger.setLevel(logging.DEBUG)
+    root_logger.handlers = [logging.handlers.QueueHandler(log_queue)]
+
+    if initializer is not None:
+        initializer(*initargs)
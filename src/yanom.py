@@ -5,12 +5,12 @@ import os
 
 import argparse
 import logging
+import multiprocessing
 import sys
 
+from attachment_store import ATTACHMENT_STORE_LAYOUTS
 import config
-from config_data import ConfigData
 from helper_functions import find_working_directory
-from notes_converter import NotesConvertor
 
 
 def what_module_is_this():
@@ -34,6 +34,55 @@ def command_line_parser(args):
                         help="Set the level of program logging. Default = INFO. "
                              "Choices are INFO, DEBUG, WARNING, ERROR, CRITICAL"
                              "Example --log debug or --log INFO")
+    parser.add_argument("-w", "--workers", type=positive_int, default=1,
+                        help="Number of notes to convert with pandoc at the same time when converting NSX files. "
+                             "Default = 1.  Example --workers 8")
+    parser.add_argument("-b", "--batch-size", type=positive_int, default=1,
+                        help="Number of NSX notes to convert in each pandoc process. Notes with meta-data in "
+                             "a html head section are always converted one at a time. "
+                             "Default = 1.  Example --batch-size 50")
+    parser.add_argument("--pandoc-server", action="store_true",
+                        help="Run pandoc once in server mode and send each conversion to it, instead of starting "
+                             "pandoc for every note.  Requires pandoc 2.18 or later built with server support.  "
+                             "If the server can not be used pandoc is run for each note as normal.")
+    parser.add_argument("--pandoc-cache", action="store_true",
+                        help="Keep pandoc conversions in a cache in the data directory, notes that have not changed "
+                             "since a previous run with the same settings are not converted again.")
+    parser.add_argument("--pandoc-cache-size", type=positive_int, default=256,
+                        help="Maximum size in MB of the pandoc cache, the least recently used conversions are "
+                             "removed when the cache is full. Default = 256.  Example --pandoc-cache-size 1024")
+    parser.add_argument("--write-behind", action="store_true",
+                        help="Write converted notes and attachments to disk on background threads while conversion "
+                             "continues.  Any files that could not be written are reported at the end of the run.")
+    parser.add_argument("--write-queue-size", type=positive_int, default=64,
+                        help="Maximum number of files waiting to be written when using --write-behind, conversion "
+                             "waits when the queue is full. Default = 64.  Example --write-queue-size 256")
+    parser.add_argument("--stream-notes", action="store_true",
+                        help="Write each NSX note to disk as soon as it is converted and release its content, so "
+                             "memory use does not grow with the size of the NSX file.  Note content is read from "
+                             "the NSX file a second time when the note is converted.")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Only convert NSX notes that are new or have changed since the last conversion into the "
+                             "export folder, and remove the files of deleted notes.  A manifest of converted notes is "
+                             "kept in the export folder.")
+    parser.add_argument("--attachment-store", choices=ATTACHMENT_STORE_LAYOUTS, default='copy',
+                        help="How NSX attachments with the same content on several notes are saved. 'copy' saves "
+                             "a copy for every note, 'shared' saves each attachment once in a folder shared by all "
+                             "notebooks, 'hardlink' saves each attachment once and hard links the copies in other "
+                             "notebooks to it.  Default = copy.  Example --attachment-store shared")
+    parser.add_argument("-p", "--processes", type=positive_int, default=1,
+                        help="Number of NSX files, or html and markdown files, to convert at the same time, each in "
+                             "its own process.  The largest NSX files are started first.  NSX files are converted one "
+                             "at a time when using --incremental or --attachment-store shared.  "
+                             "Default = 1.  Example --processes 4")
+    parser.add_argument("--chart-processes", type=positive_int, default=0,
+                        help="Number of processes to render NSX chart images in while notes continue to be "
+                             "converted.  By default charts are rendered as each note is converted.  Not used when "
+                             "several NSX files are converted at the same time with --processes.  "
+                             "Example --chart-processes 2")
+    parser.add_argument("--chart-cache", action="store_true",
+                        help="Keep NSX chart images in a cache in the data directory, charts that have not changed "
+                             "since a previous run are not drawn again.")
     group = parser.add_argument_group('Mutually exclusive options. ',
                                       'To use the interactive command line tool for settings '
                                       'DO NOT use -s or -i')
@@ -47,6 +96,18 @@ def command_line_parser(args):
     return vars(parser.parse_args(args))
 
 
+def positive_int(value):
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+
+    if number < 1:
+        raise argparse.ArgumentTypeError(f'"{value}" is not a whole number of 1 or more')
+
+    return number
+
+
 def set_logging_level(log_level: str):
     levels = {
         'critical': logging.CRITICAL,
@@ -106,6 +167,19 @@ def main(command_line_sys_argv=sys.argv):
     args = command_line_parser(command_line_sys_argv[1:])
     set_logging_level(args['log'])
     config.set_silent(args['silent'])
+    config.set_workers(args['workers'])
+    config.set_batch_size(args['batch_size'])
+    config.set_pandoc_server(args['pandoc_server'])
+    config.set_pandoc_cache(args['pandoc_cache'])
+    config.set_pandoc_cache_size(args['pandoc_cache_size'])
+    config.set_write_behind(args['write_behind'])
+    config.set_write_queue_size(args['write_queue_size'])
+    config.set_stream_notes(args['stream_notes'])
+    config.set_incremental(args['incremental'])
+    config.set_attachment_store(args['attachment_store'])
+    config.set_processes(args['processes'])
+    config.set_chart_processes(args['chart_processes'])
+    config.set_chart_cache(args['chart_cache'])
     working_directory, working_directory_message = find_working_directory()
     setup_logging(working_directory)
     logger = logging.getLogger(f'{config.APP_NAME}.{what_module_is_this()}')
@@ -114,7 +188,13 @@ def main(command_line_sys_argv=sys.argv):
 
 
 if __name__ == '__main__':
+    # in a frozen build a worker process of a process pool starts this program, freeze_support runs the worker
+    # instead of starting another conversion
+    multiprocessing.freeze_support()
     command_line_args = main()
+    # the converters are imported once the command line is parsed, so --help, --version and invalid options are quick
+    from config_data import ConfigData
+    from notes_converter import NotesConvertor
     config_data = ConfigData(f"{config.DATA_DIR}/config.ini", 'gfm', allow_no_value=True)
     config_data.parse_config_file()
     notes_converter = NotesConvertor(command_line_args, config_data)
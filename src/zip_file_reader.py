@@ -58,6 +58,133 @@ def read_binary_file(zip_filename, target_filename):
         _error_handling(exc, target_filename, zip_filename)
 
 
+class NSXArchive:
+    """
+    Hold a zip archive open for the duration of a conversion and serve reads of its members.
+
+    Opening a zip file parses the whole central directory, reading every member through ``read_json_data`` or
+    ``read_binary_file`` repeats that work for each member read.  NSXArchive opens the archive once, keeps an index
+    of the members in memory and reads members from the open archive until ``close`` is called.  The archive is
+    opened on first use if ``open`` has not been called, and it can also be used as a context manager.
+
+    Parameters
+    ----------
+    zip_filename : Path
+        Path object to the zipfile
+
+    """
+
+    def __init__(self, zip_filename):
+        self._zip_filename = zip_filename
+        self._zip_file = None
+        self._members = {}
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def open(self):
+        """Open the zip archive and index its members, if the archive is not already open."""
+        if self._zip_file is not None:
+            return
+
+        try:
+            self._zip_file = zipfile.ZipFile(str(self._zip_filename), 'r')
+            self._members = {member.filename: member for member in self._zip_file.infolist()}
+        except Exception as exc:
+            _error_handling(exc, '', self._zip_filename)
+
+    def close(self):
+        """Close the zip archive, reads after a close will re-open the archive."""
+        if self._zip_file is None:
+            return
+
+        self._zip_file.close()
+        self._zip_file = None
+        self._members = {}
+
+    def read_json_data(self, target_filename):
+        """
+        Read a text file containing json from the archive and return a dictionary of the files json content
+
+        Parameters
+        ----------
+        target_filename : str
+            name of the file in the zip archive to be read from
+
+        Returns
+        -------
+        dict:
+            dictionary of the json data
+
+        """
+        try:
+            return json.loads(self._read_member(target_filename).decode('utf-8'))
+        except Exception as exc:
+            _error_handling(exc, target_filename, self._zip_filename)
+
+    def read_binary_file(self, target_filename):
+        """
+        Read and return binary content from a file stored in the archive.
+
+        Parameters
+        ----------
+        target_filename : str
+            name of the file in the zip archive to be read from
+
+        Returns
+        -------
+        binary str
+
+        """
+        try:
+            return self._read_member(target_filename)
+        except Exception as exc:
+            _error_handling(exc, target_filename, self._zip_filename)
+
+    def open_member(self, target_filename):
+        """
+        Open a file stored in the archive for reading and return a binary file-like object for the file.
+
+        The content is decompressed as it is read, so large members can be copied in chunks without holding the
+        whole member in memory.  The caller is responsible for closing the returned object.
+
+        Parameters
+        ----------
+        target_filename : str
+            name of the file in the zip archive to be read from
+
+        Returns
+        -------
+        zipfile.ZipExtFile
+
+        """
+        try:
+            self.open()
+            return self._zip_file.open(self._members[target_filename])
+        except Exception as exc:
+            _error_handling(exc, target_filename, self._zip_filename)
+
+    def _read_member(self, target_filename):
+        self.open()
+        return self._zip_file.read(self._members[target_filename])
+
+    @property
+    def zip_filename(self):
+        return self._zip_filename
+
+    @property
+    def is_open(self):
+        return self._zip_file is not None
+
+    @property
+    def member_names(self):
+        return list(self._members.keys())
+
+
 def _error_handling(exc, target_filename, zip_filename):
     """Error handling for errors encountered reading form zip files"""
 
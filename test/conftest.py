@@ -1,11 +1,34 @@
 import pytest
 
+from attachment_store import attachment_store
+import config
 import conversion_settings
 import nsx_file_converter
 import pandoc_converter
+from path_allocator import path_allocator
 import sn_note_page
 
 
+@pytest.fixture(autouse=True)
+def reset_path_allocator():
+    # names handed out in one test must not be seen as in use by the next
+    path_allocator().reset()
+
+
+@pytest.fixture(autouse=True)
+def reset_attachment_store():
+    # attachments placed in one test must not be re-used by the next
+    attachment_store().reset()
+
+
+@pytest.fixture
+def silent():
+    # turn off console output for the test only, so tests run after it still see the default
+    config.set_silent(True)
+    yield
+    config.set_silent(False)
+
+
 @pytest.fixture
 def all_notes(nsx):
     list_of_notes = []
@@ -0,0 +1,57 @@
+import re
+
+import pandas as pd
+import pytest
+
+from chart_data_table import chart_data_csv, chart_data_html_table
+from helper_functions import add_strong_between_tags
+
+CHART_DATA = [
+    [[500, 520, 540], [520, 540, 560]],
+    [[500, 520.5, 540], [1.25, 2, 3]],
+    [[1.123456789, 2, 0.1], [3, 4, 100.125]],
+    [[1e10, 2, 3], [3.5, 4, 5]],
+    [[0.0000001, 2, -3.5], [3, 4, -5]],
+    [['a', 2, 'x & <y>'], [1.5, 4, ' padded ']],
+    [[None, 2, 3.5], [4, None, None]],
+    [[True, 2, 3], [3, '', 'two\nlines']],
+]
+
+
+def pandas_html_table(column_labels, row_labels, rows, formatters=None):
+    html = pd.DataFrame(rows, columns=column_labels, index=row_labels).to_html(formatters=formatters)
+    html = html.replace('\n', '')
+    html = re.sub(r">\s*<", '><', html)
+    return add_strong_between_tags('<th>', '</th>', html)
+
+
+@pytest.mark.parametrize('rows', CHART_DATA)
+def test_chart_data_csv_is_the_same_as_pandas(rows):
+    column_labels = ['Number 1', 'Number 2', 'Number 3']
+    row_labels = ['Category A', 'Category B']
+
+    expected = pd.DataFrame(rows, columns=column_labels, index=row_labels).to_csv()
+
+    assert chart_data_csv(column_labels, row_labels, rows) == expected
+
+
+@pytest.mark.parametrize('rows', CHART_DATA)
+def test_chart_data_html_table_is_the_same_as_pandas(rows):
+    column_labels = ['Number 1', 'Number 2', 'Number 3']
+    row_labels = ['Category A', 'Category <B>']
+
+    expected = pandas_html_table(column_labels, row_labels, rows)
+
+    assert chart_data_html_table(column_labels, row_labels, rows) == expected
+
+
+def test_chart_data_html_table_uses_formatters():
+    column_labels = ['sum', 'percent']
+    row_labels = ['Category A', 'Category B']
+    rows = [[2080, 32.098765432098766], [4400, 67.90123456790123]]
+    formatters = {'percent': '{:,.2f}'.format}
+
+    expected = pandas_html_table(column_labels, row_labels, rows, formatters)
+
+    assert chart_data_html_table(column_labels, row_labels, rows, formatters) == expected
+    assert '<td>32.10</td>' in expected
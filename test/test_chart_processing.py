@@ -1,8 +1,16 @@
+import importlib.metadata
+from pathlib import Path
 import re
+from unittest.mock import patch
 
+from bs4 import BeautifulSoup
+import matplotlib
+import matplotlib.pyplot as pyplot
 import pytest
 
 import chart_processing
+import chart_rendering
+import config
 import conversion_settings
 
 
@@ -21,11 +29,11 @@ class Note:
 @pytest.mark.parametrize(
     'input_html, output_html_regx', [
         ("""<div chart-config='{"range":"A1:E4","direction":"row","rowHeaderExisted":true,"columnHeaderExisted":true,"title":"bar chart title","chartType":"bar","xAxisTitle":"x-axis title","yAxisTitle":"y-axis title"}' chart-data='[["","Number 1","Number 2","Number 3","Number 4"],["Category A",500,520,540,520],["Category B",520,540,560,540],["Category C",540,560,580,560]]' class="syno-ns-chart-object" style="width: 520px; height: 350px;"></div>""",
-         r"""<p><img src='attachments/\d{15}\.png'></p><p><a href='attachments/\d{15}\.csv'>Chart data file</a></p><p><table border="1" class="dataframe"><thead><tr style="text-align: right;"><th><strong></strong></th><th><strong>Number 1</strong></th><th><strong>Number 2</strong></th><th><strong>Number 3</strong></th><th><strong>Number 4</strong></th></tr></thead><tbody><tr><th><strong>Category A</strong></th><td>500</td><td>520</td><td>540</td><td>520</td></tr><tr><th><strong>Category B</strong></th><td>520</td><td>540</td><td>560</td><td>540</td></tr><tr><th><strong>Category C</strong></th><td>540</td><td>560</td><td>580</td><td>560</td></tr></tbody></table></p>"""),
+         r"""<p><img src='attachments/chart-[0-9a-f]{16}\.png'></p><p><a href='attachments/chart-[0-9a-f]{16}\.csv'>Chart data file</a></p><p><table border="1" class="dataframe"><thead><tr style="text-align: right;"><th><strong></strong></th><th><strong>Number 1</strong></th><th><strong>Number 2</strong></th><th><strong>Number 3</strong></th><th><strong>Number 4</strong></th></tr></thead><tbody><tr><th><strong>Category A</strong></th><td>500</td><td>520</td><td>540</td><td>520</td></tr><tr><th><strong>Category B</strong></th><td>520</td><td>540</td><td>560</td><td>540</td></tr><tr><th><strong>Category C</strong></th><td>540</td><td>560</td><td>580</td><td>560</td></tr></tbody></table></p>"""),
         ("""<div chart-config='{"range":"A1:E4","direction":"row","rowHeaderExisted":true,"columnHeaderExisted":true,"title":"Line Chart Title","chartType":"line","xAxisTitle":"x-axis title","yAxisTitle":"y-axis title"}' chart-data='[["","Number 1","Number 2","Number 3","Number 4"],["Category A",500,520,540,520],["Category B",520,540,560,540],["Category C",540,560,580,560]]' class="syno-ns-chart-object" style="width: 520px; height: 350px;"></div>""",
-         """<p><img src='attachments/\d{15}\.png'></p><p><a href='attachments/\d{15}\.csv'>Chart data file</a></p><p><table border="1" class="dataframe"><thead><tr style="text-align: right;"><th><strong></strong></th><th><strong>Number 1</strong></th><th><strong>Number 2</strong></th><th><strong>Number 3</strong></th><th><strong>Number 4</strong></th></tr></thead><tbody><tr><th><strong>Category A</strong></th><td>500</td><td>520</td><td>540</td><td>520</td></tr><tr><th><strong>Category B</strong></th><td>520</td><td>540</td><td>560</td><td>540</td></tr><tr><th><strong>Category C</strong></th><td>540</td><td>560</td><td>580</td><td>560</td></tr></tbody></table></p>"""),
+         r"""<p><img src='attachments/chart-[0-9a-f]{16}\.png'></p><p><a href='attachments/chart-[0-9a-f]{16}\.csv'>Chart data file</a></p><p><table border="1" class="dataframe"><thead><tr style="text-align: right;"><th><strong></strong></th><th><strong>Number 1</strong></th><th><strong>Number 2</strong></th><th><strong>Number 3</strong></th><th><strong>Number 4</strong></th></tr></thead><tbody><tr><th><strong>Category A</strong></th><td>500</td><td>520</td><td>540</td><td>520</td></tr><tr><th><strong>Category B</strong></th><td>520</td><td>540</td><td>560</td><td>540</td></tr><tr><th><strong>Category C</strong></th><td>540</td><td>560</td><td>580</td><td>560</td></tr></tbody></table></p>"""),
         ("""<div chart-config='{"range":"A1:E4","direction":"row","rowHeaderExisted":true,"columnHeaderExisted":true,"title":"Pie chart title","chartType":"pie","xAxisTitle":"x-axis title","yAxisTitle":"y axis ttile"}' chart-data='[["","cost","price","value","total value"],["something",500,520,540,520],["something else",520,540,560,540],["another thing",540,560,580,560]]' class="syno-ns-chart-object" style="width: 520px; height: 350px;"></div>""",
-         """<p><img src='attachments/\d{15}\.png'></p><p><a href='attachments/\d{15}\.csv'>Chart data file</a></p><p><table border="1" class="dataframe"><thead><tr style="text-align: right;"><th><strong></strong></th><th><strong>cost</strong></th><th><strong>price</strong></th><th><strong>value</strong></th><th><strong>total value</strong></th><th><strong>sum</strong></th><th><strong>percent</strong></th></tr></thead><tbody><tr><th><strong>something</strong></th><td>500</td><td>520</td><td>540</td><td>520</td><td>2080</td><td>32.10</td></tr><tr><th><strong>something else</strong></th><td>520</td><td>540</td><td>560</td><td>540</td><td>2160</td><td>33.33</td></tr><tr><th><strong>another thing</strong></th><td>540</td><td>560</td><td>580</td><td>560</td><td>2240</td><td>34.57</td></tr></tbody></table></p>""")
+         r"""<p><img src='attachments/chart-[0-9a-f]{16}\.png'></p><p><a href='attachments/chart-[0-9a-f]{16}\.csv'>Chart data file</a></p><p><table border="1" class="dataframe"><thead><tr style="text-align: right;"><th><strong></strong></th><th><strong>cost</strong></th><th><strong>price</strong></th><th><strong>value</strong></th><th><strong>total value</strong></th><th><strong>sum</strong></th><th><strong>percent</strong></th></tr></thead><tbody><tr><th><strong>something</strong></th><td>500</td><td>520</td><td>540</td><td>520</td><td>2080</td><td>32.10</td></tr><tr><th><strong>something else</strong></th><td>520</td><td>540</td><td>560</td><td>540</td><td>2160</td><td>33.33</td></tr><tr><th><strong>another thing</strong></th><td>540</td><td>560</td><td>580</td><td>560</td><td>2240</td><td>34.57</td></tr></tbody></table></p>""")
     ], ids=['bar-chart', 'line-chart', 'pie-chart']
 )
 def test_nsx_chart_processor_check_produced_html(input_html, output_html_regx):
@@ -34,7 +42,7 @@ def test_nsx_chart_processor_check_produced_html(input_html, output_html_regx):
 
     result = chart_processor.processed_html
     match = re.findall(output_html_regx, result)
-    # Note output_html_regx string uses '\d{15}\' to replace the chart id number in the actual html output
+    # Note output_html_regx string uses 'chart-[0-9a-f]{16}' to replace the chart file names in the actual html output
     # and escapes the full stop before the file extension
 
     assert result == match[0]
@@ -85,3 +93,92 @@ def test_plot_chart_check_csv_content(input_html, csv):
     for chart in chart_processor.charts:
         assert chart.csv_chart_data_string == csv
 
+
+
+def test_nsx_chart_processor_with_parsed_html_replaces_placeholders_in_serialised_html():
+    note = Note()
+    input_html = """<div>Chart</div><div chart-config='{"range":"A1:E4","direction":"row","rowHeaderExisted":true,"columnHeaderExisted":true,"title":"bar chart title","chartType":"bar","xAxisTitle":"x-axis title","yAxisTitle":"y-axis title"}' chart-data='[["","Number 1","Number 2","Number 3","Number 4"],["Category A",500,520,540,520],["Category B",520,540,560,540],["Category C",540,560,580,560]]' class="syno-ns-chart-object" style="width: 520px; height: 350px;"></div>"""
+    soup = BeautifulSoup(input_html, 'html.parser')
+    chart_processor = chart_processing.NSXChartProcessor(note, soup, create_image=True, create_csv=False,
+                                                         create_data_table=False)
+
+    assert re.fullmatch(r"<div>Chart</div>chart-placeholder-id-\d+-end", str(soup))
+    assert re.fullmatch(r"<div>Chart</div><p><img src='attachments/chart-[0-9a-f]{16}\.png'></p>",
+                        chart_processor.add_chart_elements_to(str(soup)))
+
+
+BAR_CHART_HTML = """<div chart-config='{"range":"A1:E4","direction":"row","rowHeaderExisted":true,"columnHeaderExisted":true,"title":"bar chart title","chartType":"bar","xAxisTitle":"x-axis title","yAxisTitle":"y-axis title"}' chart-data='[["","Number 1","Number 2","Number 3","Number 4"],["Category A",500,520,540,520],["Category B",520,540,560,540],["Category C",540,560,580,560]]' class="syno-ns-chart-object" style="width: 520px; height: 350px;"></div>"""
+
+
+def test_nsx_chart_processor_names_chart_files_the_same_on_every_run():
+    first_processor = chart_processing.NSXChartProcessor(Note(), BAR_CHART_HTML)
+    second_processor = chart_processing.NSXChartProcessor(Note(), BAR_CHART_HTML)
+    csv_only_processor = chart_processing.NSXChartProcessor(Note(), BAR_CHART_HTML, create_image=False)
+    changed_data_processor = chart_processing.NSXChartProcessor(Note(), BAR_CHART_HTML.replace('500', '501'))
+
+    assert first_processor.processed_html == second_processor.processed_html
+    assert first_processor.charts[0].file_stem == second_processor.charts[0].file_stem
+    assert re.fullmatch(r'chart-[0-9a-f]{16}', first_processor.charts[0].file_stem)
+    assert csv_only_processor.charts[0].file_stem != first_processor.charts[0].file_stem
+    assert changed_data_processor.charts[0].file_stem != first_processor.charts[0].file_stem
+
+
+def test_nsx_chart_processor_renders_a_repeated_chart_once():
+    note = Note()
+    with patch.object(chart_processing.ChartProcessor.BarChart, 'render_png', autospec=True,
+                      return_value=b'image') as mock_render_png:
+        chart_processor = chart_processing.NSXChartProcessor(note,
+                                                             f'{BAR_CHART_HTML}<div>Between</div>{BAR_CHART_HTML}')
+
+    chart_elements = chart_processor.processed_html.split('<div>Between</div>')
+
+    assert mock_render_png.call_count == 1
+    assert len(chart_processor.charts) == 1
+    assert len(note.attachments) == 2
+    assert chart_elements[0] == chart_elements[1]
+    assert 'placeholder-id' not in chart_processor.processed_html
+
+
+def test_nsx_chart_processor_uses_chart_image_cache(tmp_path):
+    first_note = Note()
+    first_note.conversion_settings.working_directory = tmp_path
+    second_note = Note()
+    second_note.conversion_settings.working_directory = tmp_path
+    chart_rendering._chart_image_caches.clear()
+    config.set_chart_cache(True)
+    try:
+        first_processor = chart_processing.NSXChartProcessor(first_note, BAR_CHART_HTML, create_csv=False,
+                                                             create_data_table=False)
+        with patch.object(chart_processing.ChartProcessor.BarChart, 'render_png') as mock_render_png:
+            second_processor = chart_processing.NSXChartProcessor(second_note, BAR_CHART_HTML, create_csv=False,
+                                                                  create_data_table=False)
+    finally:
+        config.set_chart_cache(False)
+        chart_rendering._chart_image_caches.clear()
+
+    mock_render_png.assert_not_called()
+    assert second_processor.charts[0].png_img_buffer.getvalue() == first_processor.charts[0].png_img_buffer.getvalue()
+    assert len(list(Path(tmp_path, config.DATA_DIR, 'cache', 'charts').glob('*.png'))) == 1
+
+
+def test_nsx_chart_processor_does_not_leave_pyplot_figures_open():
+    note = Note()
+    input_html = """<div chart-config='{"range":"A1:E4","direction":"row","rowHeaderExisted":true,"columnHeaderExisted":true,"title":"bar chart title","chartType":"bar","xAxisTitle":"x-axis title","yAxisTitle":"y-axis title"}' chart-data='[["","Number 1","Number 2","Number 3","Number 4"],["Category A",500,520,540,520],["Category B",520,540,560,540],["Category C",540,560,580,560]]' class="syno-ns-chart-object" style="width: 520px; height: 350px;"></div><div chart-config='{"range":"A1:E4","direction":"row","rowHeaderExisted":true,"columnHeaderExisted":true,"title":"Pie chart title","chartType":"pie","xAxisTitle":"x-axis title","yAxisTitle":"y axis ttile"}' chart-data='[["","cost","price","value","total value"],["something",500,520,540,520],["something else",520,540,560,540],["another thing",540,560,580,560]]' class="syno-ns-chart-object" style="width: 520px; height: 350px;"></div>"""
+    open_figures = pyplot.get_fignums()
+
+    for _ in range(5):
+        chart_processing.NSXChartProcessor(note, input_html, create_image=True, create_csv=False,
+                                           create_data_table=False)
+
+    assert pyplot.get_fignums() == open_figures
+
+
+def test_matplotlib_version_without_package_metadata():
+    chart_processing._matplotlib_version.cache_clear()
+    try:
+        with patch('importlib.metadata.version', side_effect=importlib.metadata.PackageNotFoundError('matplotlib')):
+            version = chart_processing._matplotlib_version()
+    finally:
+        chart_processing._matplotlib_version.cache_clear()
+
+    assert version == matplotlib.__version__
@@ -0,0 +1,100 @@
+from io import BytesIO
+from pathlib import Path
+from unittest.mock import patch
+
+import chart_processing
+import chart_rendering
+import file_writer
+
+
+def make_bar_chart():
+    chart = chart_processing.ChartProcessor.BarChart()
+    chart.set_title('bar chart title')
+    chart.set_x_axis_title('x-axis title')
+    chart.set_y_axis_title('y-axis title')
+    chart.x_category_labels = ['Number 1', 'Number 2']
+    chart.y_category_labels = ['Category A', 'Category B']
+    chart.set_data([[500, 520], [540, 560]])
+    return chart
+
+
+def test_render_chart_png_renders_now_when_not_started():
+    chart = make_bar_chart()
+
+    image = chart_rendering.render_chart_png(chart)
+
+    assert isinstance(image, BytesIO)
+    assert image.getvalue() == chart.render_png()
+    assert image.getvalue().startswith(b'\x89PNG')
+
+
+def test_render_chart_png_in_worker_processes(tmp_path):
+    chart = make_bar_chart()
+    expected_image = chart.render_png()
+
+    chart_rendering.start_chart_rendering(2)
+    try:
+        images = [chart_rendering.render_chart_png(chart) for _ in range(3)]
+        chart.plot_chart()  # the chart keeps the pending image, it is pickled when submitted
+        assert chart.png_img_buffer.getvalue() == expected_image
+        assert all(isinstance(image, chart_rendering.PendingChartImage) for image in images)
+        assert images[0].getvalue() == expected_image
+
+        file_writer.store_file(Path(tmp_path, 'chart.png'), images[1])
+    finally:
+        chart_rendering.finish_chart_rendering()
+
+    assert Path(tmp_path, 'chart.png').read_bytes() == expected_image
+    assert images[2].read() == expected_image
+    assert isinstance(chart_rendering.render_chart_png(chart), BytesIO)
+
+
+def test_chart_image_cache_put_and_get(tmp_path):
+    cache = chart_rendering.ChartImageCache(Path(tmp_path, 'charts'))
+
+    assert cache.get('key') is None
+    cache.put('key', b'image')
+
+    assert cache.get('key') == b'image'
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert [path.name for path in Path(tmp_path, 'charts').iterdir()] == ['key.png']
+
+
+def test_render_chart_png_uses_image_cache(tmp_path):
+    cache = chart_rendering.ChartImageCache(tmp_path)
+    chart = make_bar_chart()
+    chart.key = 'bar chart'
+    expected_image = chart_rendering.render_chart_png(chart, cache).getvalue()
+
+    with patch.object(chart, 'render_png') as mock_render_png:
+        image = chart_rendering.render_chart_png(chart, cache)
+
+    mock_render_png.assert_not_called()
+    assert image.getvalue() == expected_image
+
+
+def test_render_chart_png_in_worker_processes_adds_image_to_cache(tmp_path):
+    cache = chart_rendering.ChartImageCache(tmp_path)
+    chart = make_bar_chart()
+    chart.key = 'bar chart'
+
+    chart_rendering.start_chart_rendering(1)
+    try:
+        image = chart_rendering.render_chart_png(chart, cache)
+    finally:
+        chart_rendering.finish_chart_rendering()
+
+    assert cache.get(chart.image_cache_key) == image.getvalue()
+
+
+def test_chart_cache_statistics_include_worker_processes(tmp_path):
+    cache = chart_rendering.ChartImageCache(tmp_path)
+    cache.put('key', b'image')
+    cache.get('key')
+    cache.get('missing')
+
+    with patch.dict(chart_rendering._chart_image_caches, {str(tmp_path): cache}, clear=True), \
+            patch('chart_rendering._worker_process_statistics', [0, 0]):
+        chart_rendering.add_chart_cache_statistics(3, 2)
+
+        assert chart_rendering.chart_cache_statistics() == (4, 3)
@@ -2,6 +2,7 @@ from bs4 import BeautifulSoup
 import pytest
 
 import checklist_processing
+from placeholders import PlaceholderRegistry
 
 
 def test_checklist_processing_html_to_md_good_html_check_pre_processing():
@@ -32,6 +33,15 @@ def test_checklist_processing_nsx_to_md_with_nsx_html_check_pre_processing():
     assert checklist_processor.processed_html.count("checklist-placeholder-id-") == 5
 
 
+def test_checklist_processing_nsx_to_md_with_parsed_html_is_processed_in_place():
+    html = """<div><input class=\"syno-notestation-editor-checkbox\" src=\"webman/3rdparty/NoteStation/images/transparent.gif\" type=\"image\" />Check 1</div><div>Text</div>"""
+    soup = BeautifulSoup(html, 'html.parser')
+    checklist_processor = checklist_processing.NSXInputMDOutputChecklistProcessor(soup)
+
+    assert str(soup).count("checklist-placeholder-id-") == 1
+    assert checklist_processor.processed_html == str(soup)
+
+
 @pytest.mark.parametrize(
     'html, expected', [
         ('<div><input class=\"syno-notestation-editor-checkbox syno-notestation-editor-checkbox-checked\" src=\"webman/3rdparty/NoteStation/images/transparent.gif\" type=\"image\" />Check 1</div><div><input class=\"syno-notestation-editor-checkbox\" src=\"webman/3rdparty/NoteStation/images/transparent.gif\" type=\"image\" />Check 2</div><div style=\"padding-left: 30px;\"><input class=\"syno-notestation-editor-checkbox\" src=\"webman/3rdparty/NoteStation/images/transparent.gif\" type=\"image\" />Sub check 1</div><div style=\"padding-left: 30px;\"><input class=\"syno-notestation-editor-checkbox syno-notestation-editor-checkbox-checked\" src=\"webman/3rdparty/NoteStation/images/transparent.gif\" type=\"image\" />Sub check 2</div><div style=\"padding-left: 60px;\"><input class=\"syno-notestation-editor-checkbox\" src=\"webman/3rdparty/NoteStation/images/transparent.gif\" type=\"image\" />Sub sub check 1</div><div style=\"padding-left: 60px;\"><input class=\"syno-notestation-editor-checkbox syno-notestation-editor-checkbox-checked\" src=\"webman/3rdparty/NoteStation/images/transparent.gif\" type=\"image\" />Sub sub check 2</div><div><input class=\"syno-notestation-editor-checkbox\" src=\"webman/3rdparty/NoteStation/images/transparent.gif\" type=\"image\" />Check 3</div>',
@@ -96,3 +106,15 @@ def test_find_indent(html, expected_indent, expected_text):
 
 
 
+
+
+def test_add_checklist_items_to_restores_items_and_shared_placeholders_in_one_pass():
+    html = ''.join(f'<p><input type="checkbox"/>Item {n}</p>' for n in range(2000))
+    placeholders = PlaceholderRegistry(remove_leading_spaces=True)
+    placeholders.add('iframe-placeholder-id-1-end', '\n<iframe></iframe>\n')
+    checklist_processor = checklist_processing.HTMLInputMDOutputChecklistProcessor(html, placeholders)
+    markdown = '\n'.join(f'  {item.placeholder_text}' for item in checklist_processor.list_of_checklist_items)
+
+    result = checklist_processor.add_checklist_items_to(f'{markdown}\niframe-placeholder-id-1-end')
+
+    assert result == ''.join(f'- [ ] Item {n}\n\n' for n in range(2000)) + '\n<iframe></iframe>\n'
@@ -0,0 +1,48 @@
+import pytest
+
+import content_features
+
+
+@pytest.mark.parametrize(
+    'html, expected', [
+        ('<p>text</p>', (False, False, False, False, False)),
+        ('<p><iframe src="a"></iframe></p>', (True, False, False, False, False)),
+        ('<div><TABLE><tr><td>x</td></tr></TABLE></div>', (False, True, False, False, False)),
+        ('<p><input type="checkbox"/>item</p>', (False, False, True, False, False)),
+        ('<p><img class="syno-notestation-editor-checkbox"/>item</p>', (False, False, False, True, False)),
+        ('<div class="syno-ns-chart-object"></div>', (False, False, False, False, True)),
+        ('<p>tables and iframes mentioned in text, <tablet> and <inputs></p>', (False, False, False, False, False)),
+    ]
+)
+def test_content_features(html, expected):
+    features = content_features.ContentFeatures(html)
+
+    result = (features.has_iframes, features.has_tables, features.has_checkboxes, features.has_nsx_checklists,
+              features.has_nsx_charts)
+
+    assert result == expected
+
+
+def test_skipped_stage_counts():
+    content_features.reset_skipped_stage_counts()
+
+    content_features.record_skipped_stage('tables')
+    content_features.record_skipped_stage('charts')
+    content_features.record_skipped_stage('tables')
+
+    assert content_features.skipped_stage_counts() == {'tables': 2, 'charts': 1}
+
+    content_features.reset_skipped_stage_counts()
+
+    assert content_features.skipped_stage_counts() == {}
+
+
+def test_add_skipped_stage_counts():
+    content_features.reset_skipped_stage_counts()
+    content_features.record_skipped_stage('tables')
+
+    content_features.add_skipped_stage_counts({'tables': 2, 'iframes': 1})
+
+    assert content_features.skipped_stage_counts() == {'tables': 3, 'iframes': 1}
+
+    content_features.reset_skipped_stage_counts()
@@ -0,0 +1,228 @@
+import json
+import logging
+from pathlib import Path
+import shutil
+
+import pytest
+
+import config
+import conversion_manifest
+from conversion_manifest import ConversionManifest
+import conversion_settings
+import nsx_file_converter
+import pandoc_converter
+from path_allocator import path_allocator
+
+
+class FakeAttachment:
+    def __init__(self, full_path):
+        self.full_path = full_path
+
+
+class FakeNotePage:
+    def __init__(self, conv_setting, full_path, content='<p>content</p>', mtime='202104241115', attachments=None):
+        self.conversion_settings = conv_setting
+        self.full_path = full_path
+        self.raw_content = content
+        self.note_json = {'mtime': mtime, 'attachment': attachments or {}}
+
+
+@pytest.fixture
+def export_folder(tmp_path):
+    folder = Path(tmp_path, 'notes')
+    Path(folder, 'notebook1', 'attachments').mkdir(parents=True)
+    return folder
+
+
+def make_converted_note(manifest, conv_setting, export_folder, note_id='1234', **kwargs):
+    note_page = FakeNotePage(conv_setting, Path(export_folder, 'notebook1', 'page-1.md'), **kwargs)
+    entry = manifest.make_entry(note_page, {})
+    note_page.full_path.write_text('converted')
+    return note_page, entry
+
+
+def test_save_and_load(conv_setting, export_folder):
+    manifest = ConversionManifest(export_folder)
+    note_page, entry = make_converted_note(manifest, conv_setting, export_folder,
+                                           attachments={'abc': {'md5': 'e79072f793f22434740e64e93cfe5926'}})
+    manifest.record('1234', entry, {'abc': FakeAttachment(Path(export_folder, 'notebook1', 'attachments', 'a.png'))})
+    manifest.save()
+
+    saved = json.loads(Path(export_folder, conversion_manifest.MANIFEST_FILE_NAME).read_text())
+    assert saved['version'] == conversion_manifest.MANIFEST_VERSION
+    assert saved['notes']['1234']['output_path'] == 'notebook1/page-1.md'
+    assert saved['notes']['1234']['attachments']['abc'] == {'md5': 'e79072f793f22434740e64e93cfe5926',
+                                                            'path': 'notebook1/attachments/a.png'}
+
+    next_manifest = ConversionManifest(export_folder)
+    next_manifest.load()
+    assert next_manifest.is_unchanged('1234', manifest.make_entry(note_page, {}))
+
+
+@pytest.mark.parametrize(
+    'changes, links_html', [
+        ({'content': '<p>new content</p>'}, {}),
+        ({'mtime': '202201010000'}, {}),
+        ({'attachments': {'abc': {'md5': 'changed'}}}, {}),
+        ({}, {'<a href="notestation://remote/self/1234">Page 2</a>': '<a href="page-2-1.md">Page 2</a>'}),
+    ]
+)
+def test_is_unchanged_false_when_note_or_links_change(conv_setting, export_folder, changes, links_html):
+    note = {'attachments': {'abc': {'md5': 'e79072f793f22434740e64e93cfe5926'}}}
+    manifest = ConversionManifest(export_folder)
+    _, entry = make_converted_note(manifest, conv_setting, export_folder, **note)
+    manifest.record('1234', entry, {})
+    manifest.save()
+
+    next_manifest = ConversionManifest(export_folder)
+    next_manifest.load()
+    changed_note_page, _ = make_converted_note(next_manifest, conv_setting, export_folder, **dict(note, **changes))
+
+    assert not next_manifest.is_unchanged('1234', next_manifest.make_entry(changed_note_page, links_html))
+
+
+def test_is_unchanged_false_when_settings_change_or_output_missing(conv_setting, export_folder):
+    manifest = ConversionManifest(export_folder)
+    note_page, entry = make_converted_note(manifest, conv_setting, export_folder)
+    manifest.record('1234', entry, {})
+    manifest.save()
+
+    next_manifest = ConversionManifest(export_folder)
+    next_manifest.load()
+    assert not next_manifest.is_unchanged('9999', next_manifest.make_entry(note_page, {}))
+
+    conv_setting.front_matter_format = 'toml'
+    assert not next_manifest.is_unchanged('1234', next_manifest.make_entry(note_page, {}))
+
+    conv_setting.front_matter_format = 'yaml'
+    note_page.full_path.unlink()
+    assert not next_manifest.is_unchanged('1234', next_manifest.make_entry(note_page, {}))
+
+
+@pytest.mark.parametrize(
+    'manifest_text', ['not json', '{"version": 999, "notes": {}}']
+)
+def test_load_unusable_manifest(export_folder, caplog, manifest_text):
+    Path(export_folder, conversion_manifest.MANIFEST_FILE_NAME).write_text(manifest_text)
+    manifest = ConversionManifest(export_folder)
+
+    with caplog.at_level(logging.WARNING):
+        manifest.load()
+
+    assert manifest.entries == {}
+    assert any(record.levelname == 'WARNING' for record in caplog.records)
+
+
+def test_release_previous_outputs(conv_setting, export_folder):
+    manifest = ConversionManifest(export_folder)
+    note_page, entry = make_converted_note(manifest, conv_setting, export_folder)
+    manifest.record('1234', entry, {})
+    manifest.save()
+
+    assert path_allocator().allocate(note_page.full_path) != note_page.full_path
+    path_allocator().reset()
+
+    next_manifest = ConversionManifest(export_folder)
+    next_manifest.load()
+    next_manifest.release_previous_outputs()
+
+    assert path_allocator().allocate(note_page.full_path) == note_page.full_path
+    assert path_allocator().allocate(Path(export_folder, 'notebook1')) == Path(export_folder, 'notebook1')
+
+
+def test_reserve_previous_outputs_of_unchanged_note(conv_setting, export_folder):
+    # two notes in one notebook each had a different attachment called doc.pdf
+    attachments_folder = Path(export_folder, 'notebook1', 'attachments')
+    unchanged_note_attachment = Path(attachments_folder, 'doc.pdf')
+    changed_note_attachment = Path(attachments_folder, 'doc-gtzd.pdf')
+    manifest = ConversionManifest(export_folder)
+    _, unchanged_entry = make_converted_note(manifest, conv_setting, export_folder,
+                                             attachments={'abc': {'md5': 'first'}})
+    manifest.record('1234', unchanged_entry, {'abc': FakeAttachment(unchanged_note_attachment)})
+    changed_note = FakeNotePage(conv_setting, Path(export_folder, 'notebook1', 'page-2.md'),
+                                attachments={'def': {'md5': 'second'}})
+    manifest.record('5678', manifest.make_entry(changed_note, {}), {'def': FakeAttachment(changed_note_attachment)})
+    manifest.save()
+    path_allocator().reset()
+
+    next_manifest = ConversionManifest(export_folder)
+    next_manifest.load()
+    next_manifest.release_previous_outputs()
+    next_manifest.reserve_previous_outputs('1234')
+
+    changed_note_path = path_allocator().allocate_using(unchanged_note_attachment,
+                                                        lambda path: Path(path.parent, f'{path.stem}-abcd.pdf'))
+
+    assert changed_note_path != unchanged_note_attachment
+    assert path_allocator().allocate(changed_note_attachment) == changed_note_attachment
+
+
+def test_remove_stale_outputs(conv_setting, export_folder):
+    manifest = ConversionManifest(export_folder)
+    _, entry = make_converted_note(manifest, conv_setting, export_folder)
+    manifest.record('1234', entry, {})
+    Path(export_folder, 'notebook2').mkdir()
+    deleted_note_path = Path(export_folder, 'notebook2', 'deleted.md')
+    deleted_note_path.write_text('deleted')
+    deleted_note = FakeNotePage(conv_setting, deleted_note_path)
+    manifest.record('5678', manifest.make_entry(deleted_note, {}), {})
+    manifest.save()
+
+    next_manifest = ConversionManifest(export_folder)
+    next_manifest.load()
+    next_manifest.record_unchanged('1234')
+    next_manifest.remove_stale_outputs()
+    next_manifest.save()
+
+    assert Path(export_folder, 'notebook1', 'page-1.md').exists()
+    assert not deleted_note_path.exists()
+    assert not Path(export_folder, 'notebook2').exists()
+    assert list(next_manifest.entries) == ['1234']
+    assert next_manifest.unchanged_count == 1
+
+
+def test_incremental_conversion_of_nsx_file(tmp_path, silent):
+    Path(tmp_path, config.DATA_DIR).mkdir()
+    nsx_file_path = Path(tmp_path, config.DATA_DIR, 'test.nsx')
+    shutil.copy(Path(Path(__file__).parent, 'conversion_test_inputs', 'test.nsx'), nsx_file_path)
+
+    conv_setting = conversion_settings.ConversionSettings()
+    conv_setting.set_quick_setting('html')
+    conv_setting.working_directory = tmp_path
+    export_folder = Path(tmp_path, config.DATA_DIR, conv_setting.export_folder_name)
+
+    def convert():
+        path_allocator().reset()
+        nsx_file = nsx_file_converter.NSXFile(nsx_file_path, conv_setting, pandoc_converter.PandocConverter(conv_setting))
+        nsx_file.process_nsx_file()
+        conversion_manifest.finish_conversion_manifests()
+        return nsx_file
+
+    config.set_incremental(True)
+    try:
+        first_run = convert()
+        files_after_first_run = sorted(path for path in export_folder.rglob('*'))
+        first_manifest = json.loads(Path(export_folder, conversion_manifest.MANIFEST_FILE_NAME).read_text())
+
+        second_run = convert()
+        files_after_second_run = sorted(path for path in export_folder.rglob('*'))
+
+        # mark one note as changed and add a note that is no longer in the nsx file
+        changed_note_id = sorted(first_manifest['notes'])[0]
+        first_manifest['notes'][changed_note_id]['content_hash'] = 'changed'
+        deleted_note_path = Path(export_folder, 'deleted-note.html')
+        deleted_note_path.write_text('deleted')
+        first_manifest['notes']['deleted'] = dict(first_manifest['notes'][changed_note_id],
+                                                  output_path='deleted-note.html', attachments={})
+        Path(export_folder, conversion_manifest.MANIFEST_FILE_NAME).write_text(json.dumps(first_manifest))
+
+        third_run = convert()
+    finally:
+        config.set_incremental(False)
+
+    assert first_run.unchanged_note_count == 0
+    assert second_run.unchanged_note_count == second_run.note_page_count
+    assert files_after_second_run == files_after_first_run
+    assert third_run.unchanged_note_count == third_run.note_page_count - 1
+    assert not deleted_note_path.exists()
+    assert sorted(path for path in export_folder.rglob('*')) == files_after_first_run
@@ -27,6 +27,18 @@ class TestHTMLToMDConverter(unittest.TestCase):
         self.assertTrue('<p><a href="/a_folder/test_html_file.md">html file</a></p>' in self.file_converter._pre_processed_content, 'Failed to change link extension placeholders')
         self.assertTrue({'title': 'this is test2'} == self.file_converter._metadata_processor.metadata, 'Failed to parse meta data')
 
+    def test_pre_process_content_without_checklists_or_iframes(self):
+        self.file_converter._file_content = '<p>Some text</p><p><a href="/a_folder/test_html_file.html">html file</a></p>'
+        self.file_converter._file = Path('a-file.html')
+        self.file_converter.pre_process_content()
+        self.assertIsNone(self.file_converter._checklist_processor, 'Checklist processing not skipped')
+        self.assertEqual({}, self.file_converter._iframes_dict, 'Iframe processing not skipped')
+        self.assertEqual('<p>Some text</p><p><a href="/a_folder/test_html_file.md">html file</a></p>', self.file_converter._pre_processed_content, 'Failed to pre-process content')
+
+        self.file_converter._converted_content = 'Some text\n\n[html file](/a_folder/test_html_file.md)'
+        self.file_converter.post_process_content()
+        self.assertEqual('Some text\n\n[html file](/a_folder/test_html_file.md)\n', self.file_converter._post_processed_content, 'post processing failed')
+
     def test_post_process_content2(self):
         self.file_converter._file_content = '<head><meta title="this is test2"/><meta not_valid="not_in_schema"/></head><p><input checked="" type="checkbox"/>Check 1</p><p><input type="checkbox"/>Check 2</p><img src="filepath/image.png" width="600"><p><iframe allowfullscreen="" anchorhref="https://www.youtube.com/watch?v=SqdxNUMO2cg" frameborder="0" height="315" src="https://www.youtube.com/embed/SqdxNUMO2cg" width="420" youtube="true"> </iframe></p>'
         self.file_converter._metadata_schema = ['title']
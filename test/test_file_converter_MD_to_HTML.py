@@ -102,6 +102,28 @@ class TestMDToHTMLConverter(unittest.TestCase):
                         in new_content,
                         'file with md file extension not in to be changed list changed incorrectly')
 
+    def test_change_md_links_to_html_links_in_any_quoting_and_leave_rest_of_content_unchanged(self):
+        self.file_converter._files_to_convert = [Path('a_folder/test_md_file.md'), Path('a & b.md')]
+
+        content = "<p>Line<br>break &nbsp;<A HREF='test_md_file.md'>md file</A> " \
+                  "<a class=x href=a_folder/test_md_file.md>md file</a> " \
+                  '<a href="a &amp; b.md">entity</a></p><pre>href="test_md_file.md"</pre>'
+
+        new_content = self.file_converter.update_note_links(content, 'md', 'html')
+
+        self.assertEqual("<p>Line<br>break &nbsp;<A HREF='test_md_file.html'>md file</A> "
+                         "<a class=x href=a_folder/test_md_file.html>md file</a> "
+                         '<a href="a &amp; b.html">entity</a></p><pre>href="test_md_file.md"</pre>', new_content)
+
+    def test_change_md_links_uses_file_names_collected_once(self):
+        self.file_converter._files_to_convert = [Path('first.md')]
+        self.file_converter.update_note_links('<a href="first.md">first</a>', 'md', 'html')
+        self.file_converter._files_to_convert = []
+
+        new_content = self.file_converter.update_note_links('<a href="first.md">first</a>', 'md', 'html')
+
+        self.assertEqual('<a href="first.html">first</a>', new_content)
+
     def test_post_process_content(self):
         self.file_converter._conversion_settings.markdown_conversion_input = 'gfm'
         self.file_converter._converted_content = '<head><title>-</title></head><p><a href="a_folder/test_md_file.md">md file</a></p>'
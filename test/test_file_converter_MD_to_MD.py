@@ -1,9 +1,13 @@
+import subprocess
 import unittest
+from unittest.mock import patch
 from src.conversion_settings import ConversionSettings
+from src.file_converter_abstract import FileConverter
 from src.file_converter_MD_to_MD import MDToMDConverter
 from pathlib import Path
 from testfixtures import TempDirectory
 from src.metadata_processing import MetaDataProcessor
+from src.pandoc_converter import PandocConverter
 
 
 class TestMDToMDConverter(unittest.TestCase):
@@ -220,8 +224,12 @@ class TestMDToMDConverter(unittest.TestCase):
 
     def test_convert_content(self):
         self.file_converter._pre_processed_content = '<h1>Header 1</h1>'
-        self.file_converter.convert_content()
-        self.assertEqual('# Header 1\n', self.file_converter._converted_content, 'failed to convert content')
+        with patch('subprocess.run') as mock_run:
+            self.file_converter.convert_content()
+
+        mock_run.assert_not_called()
+        self.assertIsNone(self.file_converter._pandoc_converter, 'pandoc converter created')
+        self.assertEqual('<h1>Header 1</h1>', self.file_converter._converted_content, 'content changed')
 
     def test_write_post_processed_content(self):
         with TempDirectory() as d:
@@ -279,3 +287,35 @@ class TestMDToMDConverter(unittest.TestCase):
 
             result = source_file.read_text()
             self.assertEqual('![|600](filepath/image.png)', result, 'failed to convert file')
+
+    def test_convert_gives_the_same_result_as_pandoc_without_running_pandoc(self):
+        conversion_settings = ConversionSettings()
+        conversion_settings.set_quick_setting('gfm')
+        conversion_settings.conversion_input = 'markdown'
+        conversion_settings.markdown_conversion_input = 'obsidian'
+        content = '---\ntitle: Note\ntags: [a, b]\n---\n\n# Note\n\n![|600](image.png)\n\n' + 'Some *text*.\n\n' * 50
+
+        def convert_files(folder, converter_class):
+            files = [Path(folder, f'note-{n}.md') for n in range(20)]
+            for file in files:
+                file.write_text(content)
+            with patch('subprocess.run', wraps=subprocess.run) as mock_run:
+                file_converter = converter_class(conversion_settings, files)
+                for file in files:
+                    file_converter.convert(file)
+            return mock_run.call_count, [file.read_text() for file in files]
+
+        class PandocMDToMDConverter(MDToMDConverter):
+            # the previous conversion, which ran pandoc and did not use the result
+            def create_pandoc_converter(self):
+                return PandocConverter(self._conversion_settings)
+
+            convert_content = FileConverter.convert_content
+
+        with TempDirectory() as pandoc_folder, TempDirectory() as folder:
+            pandoc_runs, pandoc_results = convert_files(pandoc_folder.path, PandocMDToMDConverter)
+            runs, results = convert_files(folder.path, MDToMDConverter)
+
+        self.assertEqual(pandoc_results, results)
+        self.assertGreater(pandoc_runs, 20)
+        self.assertEqual(0, runs)
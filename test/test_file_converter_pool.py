@@ -0,0 +1,132 @@
+from pathlib import Path
+
+import config
+from conversion_settings import ConversionSettings
+from file_converter_HTML_to_MD import HTMLToMDConverter
+from file_converter_MD_to_HTML import MDToHTMLConverter
+from file_converter_MD_to_MD import MDToMDConverter
+import file_converter_pool
+from path_allocator import path_allocator
+
+
+def make_markdown_files(folder, number_of_files):
+    folder.mkdir()
+    files = []
+    for n in range(number_of_files):
+        file = Path(folder, f'note-{n}.md')
+        file.write_text(f'# Note {n}\n\nA link to [the next note](note-{n + 1}.md) and **bold {n}**\n',
+                        encoding='utf-8')
+        files.append(file)
+    return files
+
+
+def html_conversion_settings():
+    conversion_settings = ConversionSettings()
+    conversion_settings.set_quick_setting('html')
+    conversion_settings.conversion_input = 'markdown'
+    return conversion_settings
+
+
+def test_convert_files_in_processes_matches_serial(tmp_path, silent):
+    conversion_settings = html_conversion_settings()
+
+    serial_files = make_markdown_files(Path(tmp_path, 'serial'), 12)
+    serial_converter = MDToHTMLConverter(conversion_settings, serial_files)
+    for file in serial_files:
+        serial_converter.convert(file)
+
+    files = make_markdown_files(Path(tmp_path, 'processes'), 12)
+    file_conversion_results = list(file_converter_pool.convert_files_in_processes(
+        MDToHTMLConverter(conversion_settings, files), conversion_settings, files, 3))
+
+    assert [file_conversion_result.file for file_conversion_result in file_conversion_results] == files
+    for serial_file, file in zip(serial_files, files):
+        assert file.with_suffix('.html').read_text(encoding='utf-8') == \
+               serial_file.with_suffix('.html').read_text(encoding='utf-8')
+    assert 'href="note-1.html"' in files[0].with_suffix('.html').read_text(encoding='utf-8')
+
+
+def convert_files_with_the_same_output_name(folder, convert):
+    # 'note.html' is moved aside to 'note-old-1.html', the name 'note-old-1.md' is also converted to
+    folder.mkdir()
+    files = [Path(folder, 'note.md'), Path(folder, 'note-old-1.md')]
+    for file in files:
+        file.write_text(f'# {file.stem}\n', encoding='utf-8')
+    Path(folder, 'note.html').write_text('previous conversion', encoding='utf-8')
+
+    convert(files)
+    path_allocator().reset()
+
+    return {path.name: path.read_text(encoding='utf-8') for path in folder.iterdir() if path.suffix == '.html'}
+
+
+def test_convert_files_in_processes_with_the_same_output_name_matches_serial(tmp_path, silent):
+    conversion_settings = html_conversion_settings()
+
+    def convert_serially(files):
+        converter = MDToHTMLConverter(conversion_settings, files)
+        for file in files:
+            converter.convert(file)
+
+    def convert_in_processes(files):
+        list(file_converter_pool.convert_files_in_processes(MDToHTMLConverter(conversion_settings, files),
+                                                            conversion_settings, files, 2))
+
+    serial_files = convert_files_with_the_same_output_name(Path(tmp_path, 'serial'), convert_serially)
+    files = convert_files_with_the_same_output_name(Path(tmp_path, 'processes'), convert_in_processes)
+
+    assert files == serial_files
+    assert sorted(files) == ['note-old-1-old-1.html', 'note-old-1.html', 'note.html']
+    assert files['note-old-1-old-1.html'] == 'previous conversion'
+
+
+def test_convert_files_in_processes_in_place_keeps_old_files(tmp_path, silent):
+    conversion_settings = ConversionSettings()
+    conversion_settings.set_quick_setting('gfm')
+    conversion_settings.conversion_input = 'markdown'
+    conversion_settings.markdown_conversion_input = 'obsidian'
+    folder = Path(tmp_path, 'notes')
+    folder.mkdir()
+    files = [Path(folder, 'note.md'), Path(folder, 'note-old-1.md')]
+    for file in files:
+        file.write_text(f'![|600]({file.stem}.png)', encoding='utf-8')
+
+    list(file_converter_pool.convert_files_in_processes(MDToMDConverter(conversion_settings, files),
+                                                        conversion_settings, files, 2))
+
+    converted = {path.name: path.read_text(encoding='utf-8') for path in folder.iterdir()}
+    assert converted == {
+        'note.md': '<img src="note.png" width="600">',
+        'note-old-1.md': '<img src="note-old-1.png" width="600">',
+        'note-old-2.md': '![|600](note.png)',
+        'note-old-1-old-1.md': '![|600](note-old-1.png)',
+    }
+
+
+def test_convert_files_in_processes_returns_the_statistics_of_each_file(tmp_path, silent):
+    conversion_settings = ConversionSettings()
+    conversion_settings.set_quick_setting('gfm')
+    conversion_settings.conversion_input = 'html'
+    conversion_settings.working_directory = tmp_path
+    folder = Path(tmp_path, 'notes')
+    folder.mkdir()
+    files = [Path(folder, 'iframe.html'), Path(folder, 'plain.html')]
+    files[0].write_text('<p><iframe src="https://example.com"></iframe></p>', encoding='utf-8')
+    files[1].write_text('<p>plain</p>', encoding='utf-8')
+
+    def convert_in_processes():
+        return list(file_converter_pool.convert_files_in_processes(HTMLToMDConverter(conversion_settings, files),
+                                                                   conversion_settings, files, 2))
+
+    config.set_pandoc_cache(True)
+    try:
+        first_results = convert_in_processes()
+        path_allocator().reset()
+        file_conversion_results = convert_in_processes()
+    finally:
+        config.set_pandoc_cache(False)
+
+    assert [file_conversion_result.cache_statistics for file_conversion_result in first_results] == [(0, 1), (0, 1)]
+    assert file_conversion_results[1].cache_statistics == (1, 0)
+    assert [file_conversion_result.skipped_stage_counts for file_conversion_result in file_conversion_results] == \
+           [{'checklists': 1}, {'checklists': 1, 'iframes': 1}]
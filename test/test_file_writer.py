@@ -1,6 +1,10 @@
 from pathlib import Path
 import file_writer
 from io import BytesIO
+import threading
+import tracemalloc
+from unittest.mock import patch
+import zipfile
 
 
 def test_file_writer_string(tmp_path):
@@ -75,3 +79,140 @@ def test_file_writer_invalid_type_content(tmp_path, caplog):
 
     for record in caplog.records:
         assert record.levelname == "WARNING"
+
+
+def test_file_writer_stream(tmp_path):
+    source_path = Path(tmp_path, "source.file")
+    source_path.write_bytes(b"Hello World")
+    file_path = Path(tmp_path, "file1.file")
+
+    content = open(source_path, 'rb')
+    file_writer.store_file(file_path, content)
+
+    assert file_path.read_bytes() == b"Hello World"
+    assert content.closed
+
+
+def test_file_writer_stream_invalid_path(tmp_path, caplog):
+    source_path = Path(tmp_path, "source.file")
+    source_path.write_bytes(b"Hello World")
+    file_path = Path(tmp_path, "ddsf/dsfsdf/dfsd", "file1.file")
+
+    content = open(source_path, 'rb')
+    file_writer.store_file(file_path, content)
+
+    assert content.closed
+    assert len(caplog.records) > 0
+
+    for record in caplog.records:
+        assert record.levelname == "ERROR"
+
+
+def test_link_file_replaces_existing_file_with_hard_link(tmp_path):
+    source_path = Path(tmp_path, "source.file")
+    source_path.write_bytes(b"Hello World")
+    file_path = Path(tmp_path, "linked.file")
+    file_path.write_bytes(b"old content")
+
+    assert file_writer.link_file(source_path, file_path)
+
+    assert file_path.read_bytes() == b"Hello World"
+    assert file_path.stat().st_ino == source_path.stat().st_ino
+
+
+def test_link_file_copies_when_hard_link_fails(tmp_path):
+    source_path = Path(tmp_path, "source.file")
+    source_path.write_bytes(b"Hello World")
+    file_path = Path(tmp_path, "linked.file")
+
+    with patch('file_writer.os.link', side_effect=OSError('hard links not supported')):
+        assert file_writer.link_file(source_path, file_path)
+
+    assert file_path.read_bytes() == b"Hello World"
+    assert file_path.stat().st_ino != source_path.stat().st_ino
+
+
+def test_link_file_invalid_path(tmp_path, caplog):
+    source_path = Path(tmp_path, "source.file")
+    source_path.write_bytes(b"Hello World")
+
+    assert not file_writer.link_file(source_path, Path(tmp_path, "ddsf/dsfsdf/dfsd", "file1.file"))
+    assert caplog.records[-1].levelname == "ERROR"
+
+
+def test_file_writer_stream_from_zip_member_memory_is_bounded(tmp_path):
+    content_size = 64 * 1024 * 1024
+    zip_filename = Path(tmp_path, "test_zip.zip")
+    with zipfile.ZipFile(str(zip_filename), 'w', compression=zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.writestr("large.file", bytes(content_size))
+
+    file_path = Path(tmp_path, "large.file")
+
+    with zipfile.ZipFile(str(zip_filename), 'r') as zip_file:
+        tracemalloc.start()
+        file_writer.store_file(file_path, zip_file.open("large.file"))
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    assert file_path.stat().st_size == content_size
+    assert peak < content_size / 8
+
+
+def test_write_behind_writes_all_files(tmp_path):
+    file_writer.start_write_behind(4)
+    for n in range(50):
+        file_writer.store_file(Path(tmp_path, f'file{n}.txt'), f'content {n}')
+    file_writer.store_file(Path(tmp_path, 'file.bin'), b'bytes')
+
+    errors = file_writer.finish_write_behind()
+
+    assert errors == []
+    assert all(Path(tmp_path, f'file{n}.txt').read_text() == f'content {n}' for n in range(50))
+    assert Path(tmp_path, 'file.bin').read_bytes() == b'bytes'
+
+
+def test_write_behind_reports_errors_when_finished(tmp_path, caplog):
+    file_writer.start_write_behind(4)
+    file_writer.store_file(Path(tmp_path, 'missing-folder', 'file1.txt'), 'content')
+    file_writer.store_file(Path(tmp_path, 'file2.txt'), 'content')
+
+    errors = file_writer.finish_write_behind()
+
+    assert errors == [str(Path(tmp_path, 'missing-folder', 'file1.txt'))]
+    assert Path(tmp_path, 'file2.txt').read_text() == 'content'
+    assert caplog.records[-1].message == f"Unable to write file {Path(tmp_path, 'missing-folder', 'file1.txt')}"
+
+
+def test_write_behind_queue_is_bounded(tmp_path):
+    writer = file_writer.WriteBehindWriter(queue_size=2, number_of_threads=1)
+    release_writer = threading.Event()
+    original_store_file_now = file_writer._store_file_now
+
+    def slow_store_file_now(absolute_path, content_to_save):
+        release_writer.wait()
+        return original_store_file_now(absolute_path, content_to_save)
+
+    with patch('file_writer._store_file_now', side_effect=slow_store_file_now):
+        writer.start()
+        submitter = threading.Thread(target=lambda: [writer.submit(Path(tmp_path, f'file{n}.txt'), 'x')
+                                                     for n in range(6)])
+        submitter.start()
+        submitter.join(0.5)
+
+        assert submitter.is_alive()  # waiting for room in the queue
+        assert writer._queue.qsize() == 2
+
+        release_writer.set()
+        submitter.join()
+        errors = writer.finish()
+
+    assert errors == []
+    assert len(list(tmp_path.iterdir())) == 6
+
+
+def test_store_file_writes_immediately_without_write_behind(tmp_path):
+    assert file_writer.finish_write_behind() == []
+
+    file_writer.store_file(Path(tmp_path, 'file.txt'), 'content')
+
+    assert Path(tmp_path, 'file.txt').read_text() == 'content'
@@ -2,7 +2,8 @@ import pytest
 from typing import Tuple
 from bs4 import BeautifulSoup, Tag
 
-from iframe_processing import pre_process_iframes_from_html, post_process_iframes_to_markdown
+from iframe_processing import pre_process_iframes_from_html, pre_process_iframes_from_soup, post_process_iframes_to_markdown
+from placeholders import PlaceholderRegistry
 
 
 @pytest.fixture
@@ -20,13 +21,23 @@ def test_pre_process_iframes_from_html(raw_content):
         assert '<iframe allowfullscreen="" anchorhref="https://www.youtube.com/watch?v=SqdxNUMO2cg" frameborder="0" height="315" src="https://www.youtube.com/embed/SqdxNUMO2cg" width="420" youtube="true"> </iframe>' in str(value)
 
 
+def test_pre_process_iframes_from_soup(raw_content):
+    soup = BeautifulSoup(raw_content, 'html.parser')
+
+    iframes_dict = pre_process_iframes_from_soup(soup)
+
+    assert len(iframes_dict) == 1
+    assert soup.select('iframe') == []
+    assert f'<div>{list(iframes_dict.keys())[0]}</div>' in str(soup)
+
+
 @pytest.fixture
 def post_fixture() -> Tuple[str, Tag, dict, str]:
-    raw_md_content = '# heading1\niframe-placeholder-id-123456\n#heading2'
+    raw_md_content = '# heading1\niframe-placeholder-id-123456-end\n#heading2'
     raw_html = '</div><div></div><div><iframe src="https://www.youtube.com/embed/SqdxNUMO2cg" width="420" height="315" frameborder="0" allowfullscreen="" youtube="true" anchorhref="https://www.youtube.com/watch?v=SqdxNUMO2cg">&nbsp;</iframe></div><div>'
     soup = BeautifulSoup(raw_html, 'html.parser')
     iframe_tag = soup.select('iframe')[0]
-    iframes_dict = {'iframe-placeholder-id-123456': iframe_tag}
+    iframes_dict = {'iframe-placeholder-id-123456-end': iframe_tag}
     result = '# heading1\n\n<iframe allowfullscreen="" anchorhref="https://www.youtube.com/watch?v=SqdxNUMO2cg" frameborder="0" height="315" src="https://www.youtube.com/embed/SqdxNUMO2cg" width="420" youtube="true"> </iframe>\n\n#heading2'
     return raw_md_content, iframes_dict, result
 
@@ -35,3 +46,13 @@ def test_post_process_iframes_to_markdown(post_fixture):
     post_content = post_process_iframes_to_markdown(post_fixture[0], post_fixture[1])
     assert post_fixture[2] == post_content
     pass
+
+
+def test_iframe_placeholder_followed_by_digits_is_restored():
+    placeholders = PlaceholderRegistry(remove_leading_spaces=True)
+    processed_content, iframes_dict = pre_process_iframes_from_html('<p><iframe src="x"></iframe>2021 trip</p>',
+                                                                    placeholders)
+
+    assert placeholders.restore(processed_content) == '<p>\n<iframe src="x"></iframe>\n2021 trip</p>'
+    assert post_process_iframes_to_markdown(processed_content, iframes_dict) == \
+           '<p>\n<iframe src="x"></iframe>\n2021 trip</p>'
@@ -1,5 +1,6 @@
 import unittest
 
+from bs4 import BeautifulSoup
 import pytest
 
 from src.conversion_settings import ConversionSettings
@@ -651,3 +652,24 @@ def test_add_metadata_html_to_content():
     result = metadata_processor.add_metadata_html_to_content(content)
 
     assert result == expected
+
+
+@pytest.mark.parametrize(
+    'content, metadata, expected_added, expected', [
+        ('<head><title> </title></head><p>text</p>', {'title': 'My Title'}, True,
+         '<head><title>My Title</title><meta title="My Title"/></head><p>text</p>'),
+        ('<head><title> </title></head><p>text</p>', {}, False, '<head><title> </title></head><p>text</p>'),
+        ('<p>text</p>', {'title': 'My Title'}, False, '<p>text</p>'),
+    ], ids=['metadata-added', 'no-metadata', 'no-head']
+)
+def test_add_metadata_html_to_soup(content, metadata, expected_added, expected):
+    conversion_settings = ConversionSettings()
+    conversion_settings.front_matter_format = 'yaml'
+    metadata_processor = MetaDataProcessor(conversion_settings)
+    metadata_processor._metadata = metadata
+    soup = BeautifulSoup(content, 'html.parser')
+
+    added = metadata_processor.add_metadata_html_to_soup(soup)
+
+    assert added == expected_added
+    assert str(soup) == expected
@@ -9,6 +9,7 @@ import conversion_settings
 import file_converter_HTML_to_MD
 import file_converter_MD_to_HTML
 import file_converter_MD_to_MD
+from file_converter_pool import FileConversionResult
 import notes_converter
 import nsx_file_converter
 
@@ -45,7 +46,8 @@ def test_log_results(caplog):
     nc._attachment_count = 4
 
     caplog.clear()
-    nc.log_results()
+    with patch('notes_converter.skipped_stage_counts', return_value={}):
+        nc.log_results()
 
     assert len(caplog.records) == 4
     assert caplog.records[3].message == '4 Attachments'
@@ -54,6 +56,45 @@ def test_log_results(caplog):
     assert caplog.records[0].message == '1 Note books'
 
 
+def test_log_results_with_pandoc_cache(caplog):
+    nc = notes_converter.NotesConvertor('', 'config_data_fake')
+    config.set_pandoc_cache(True)
+
+    with patch('notes_converter.cache_statistics', return_value=(5, 2)), \
+            patch('notes_converter.skipped_stage_counts', return_value={}):
+        caplog.clear()
+        nc.log_results()
+
+    config.set_pandoc_cache(False)
+
+    assert caplog.records[-1].message == 'Pandoc cache 5 hits 2 misses'
+
+
+def test_log_results_with_chart_cache(caplog):
+    nc = notes_converter.NotesConvertor('', 'config_data_fake')
+    config.set_chart_cache(True)
+
+    with patch('notes_converter.chart_cache_statistics', return_value=(4, 1)), \
+            patch('notes_converter.skipped_stage_counts', return_value={}):
+        caplog.clear()
+        nc.log_results()
+
+    config.set_chart_cache(False)
+
+    assert caplog.records[-1].message == 'Chart image cache 4 hits 1 misses'
+
+
+def test_log_results_with_skipped_pre_processing_stages(caplog):
+    nc = notes_converter.NotesConvertor('', 'config_data_fake')
+
+    with patch('notes_converter.skipped_stage_counts', return_value={'tables': 3, 'charts': 5}):
+        caplog.clear()
+        nc.log_results()
+
+    assert caplog.records[-2].message == 'Pre-processing of charts skipped for 5 pages'
+    assert caplog.records[-1].message == 'Pre-processing of tables skipped for 3 pages'
+
+
 def test_output_results_if_not_silent_mode_when_in_silent_mode(capsys):
     args = ''
     nc = notes_converter.NotesConvertor(args, 'config_data_fake')
@@ -77,6 +118,7 @@ class FakeNSXFile:
         self.note_book_count = 2
         self.image_count = 3
         self.attachment_count = 4
+        self.unchanged_note_count = 0
 
     @staticmethod
     def process_nsx_file():
@@ -108,6 +150,43 @@ def test_output_results_if_not_silent_mode(capsys):
     assert captured.out == '1 Note book\n2 Note pages\n3 Images\n4 Attachments\n3 out of 5 links between notes were re-created\nmissing links message\n'
 
 
+def test_output_results_if_not_silent_mode_with_pandoc_cache(capsys):
+    nc = notes_converter.NotesConvertor('', 'config_data_fake')
+    config.set_silent(False)
+    config.set_pandoc_cache(True)
+
+    with patch('notes_converter.cache_statistics', return_value=(5, 2)):
+        nc.output_results_if_not_silent_mode()
+
+    config.set_pandoc_cache(False)
+
+    assert capsys.readouterr().out == 'Pandoc cache - 5 hits, 2 misses\n'
+
+
+def test_output_results_if_not_silent_mode_with_chart_cache(capsys):
+    nc = notes_converter.NotesConvertor('', 'config_data_fake')
+    config.set_silent(False)
+    config.set_chart_cache(True)
+
+    with patch('notes_converter.chart_cache_statistics', return_value=(4, 1)):
+        nc.output_results_if_not_silent_mode()
+
+    config.set_chart_cache(False)
+
+    assert capsys.readouterr().out == 'Chart image cache - 4 hits, 1 misses\n'
+
+
+def test_output_results_if_not_silent_mode_with_write_errors(capsys):
+    nc = notes_converter.NotesConvertor('', 'config_data_fake')
+    config.set_silent(False)
+    nc._write_errors = ['file1.md', 'file2.md']
+
+    nc.output_results_if_not_silent_mode()
+
+    captured = capsys.readouterr()
+    assert captured.out == '2 files could not be written, see the error log for details\n'
+
+
 class FakeConfigData:
     def __init__(self):
         self.conversion_settings = 'fake_conversion_settings'
@@ -226,6 +305,101 @@ def test_process_nsx_files(capsys):
     assert nc._attachment_count == 4
 
 
+@pytest.mark.parametrize(
+    'processes, number_of_files, incremental, attachment_store, expected', [
+        (1, 3, False, 'copy', False),
+        (4, 1, False, 'copy', False),
+        (4, 3, False, 'copy', True),
+        (4, 3, True, 'copy', False),
+        (4, 3, False, 'shared', False),
+        (4, 3, False, 'hardlink', True),
+    ]
+)
+def test_use_worker_processes(processes, number_of_files, incremental, attachment_store, expected):
+    nc = notes_converter.NotesConvertor({'source': ''}, 'config_data_fake')
+    config.set_processes(processes)
+    config.set_incremental(incremental)
+    config.set_attachment_store(attachment_store)
+    try:
+        result = nc.use_worker_processes([Path(f'file{n}.nsx') for n in range(number_of_files)])
+    finally:
+        config.set_processes(1)
+        config.set_incremental(False)
+        config.set_attachment_store('copy')
+
+    assert result == expected
+
+
+class FakeNSXFileResult(FakeNSXFile):
+    def __init__(self):
+        super().__init__()
+        self.cache_statistics = (5, 2)
+        self.skipped_stage_counts = {'tables': 1}
+        self.chart_cache_statistics = (3, 1)
+        self.write_errors = ['file1.md']
+
+
+def test_process_nsx_files_in_worker_processes(capsys):
+    nc = notes_converter.NotesConvertor({'source': ''}, 'config_data_fake')
+    config.set_silent(False)
+    config.set_processes(2)
+
+    try:
+        with patch('notes_converter.convert_nsx_files_in_processes',
+                   return_value=[FakeNSXFileResult(), FakeNSXFileResult()]) as mock_convert, \
+                patch('notes_converter.add_cache_statistics') as mock_add_cache_statistics, \
+                patch('notes_converter.add_skipped_stage_counts') as mock_add_skipped_stage_counts, \
+                patch('notes_converter.add_chart_cache_statistics') as mock_add_chart_cache_statistics:
+            nc.process_nsx_files_in_worker_processes([Path('file1.nsx'), Path('file2.nsx')])
+    finally:
+        config.set_processes(1)
+
+    mock_convert.assert_called_once_with([Path('file1.nsx'), Path('file2.nsx')], nc.conversion_settings, 2)
+    assert 'Converting 2 NSX files using 2 processes' in capsys.readouterr().out
+    assert (nc._note_page_count, nc._note_book_count, nc._image_count, nc._attachment_count) == (2, 4, 6, 8)
+    assert mock_add_cache_statistics.call_count == 2
+    mock_add_skipped_stage_counts.assert_called_with({'tables': 1})
+    assert mock_add_chart_cache_statistics.call_count == 2
+    mock_add_chart_cache_statistics.assert_called_with(3, 1)
+    assert nc._write_errors == ['file1.md', 'file1.md']
+
+
+def test_process_nsx_files_in_worker_processes_warns_chart_processes_are_not_used(capsys, caplog):
+    nc = notes_converter.NotesConvertor({'source': ''}, 'config_data_fake')
+    config.set_silent(False)
+    config.set_processes(2)
+    config.set_chart_processes(2)
+
+    try:
+        with patch('notes_converter.convert_nsx_files_in_processes', return_value=[]):
+            nc.process_nsx_files_in_worker_processes([Path('file1.nsx'), Path('file2.nsx')])
+    finally:
+        config.set_processes(1)
+        config.set_chart_processes(0)
+
+    message = ("Chart processes are not used when NSX files are converted in worker processes, "
+               "charts are rendered in the process converting each NSX file")
+    assert message in capsys.readouterr().out
+    assert message in [record.message for record in caplog.records if record.levelname == 'WARNING']
+
+
+def test_process_nsx_files_incremental_finishes_conversion_manifests():
+    test_source_path = str(Path(__file__).parent.absolute())
+    args = {'source': test_source_path}
+    cd = config_data.ConfigData(f"{config.DATA_DIR}/config.ini", 'gfm', allow_no_value=True)
+    nc = notes_converter.NotesConvertor(args, cd)
+
+    nc._nsx_backups = [FakeNSXFile(), FakeNSXFile()]
+    config.set_incremental(True)
+    try:
+        with patch('notes_converter.finish_conversion_manifests') as mock_finish_conversion_manifests:
+            nc.process_nsx_files()
+    finally:
+        config.set_incremental(False)
+
+    mock_finish_conversion_manifests.assert_called_once()
+
+
 @pytest.mark.parametrize(
     'filetype', ['nsx', 'html']
 )
@@ -313,6 +487,32 @@ def test_process_files(tmp_path):
     assert nc._note_page_count == 1
 
 
+def test_process_files_in_worker_processes(tmp_path):
+    nc = notes_converter.NotesConvertor({'source': tmp_path}, 'config_data_fake')
+    nc.conversion_settings = conversion_settings.ConversionSettings()
+    files_to_convert = [Path(tmp_path, 'file1.html'), Path(tmp_path, 'file2.html')]
+    file_converter = file_converter_HTML_to_MD.HTMLToMDConverter(nc.conversion_settings, files_to_convert)
+
+    file_conversion_results = [FileConversionResult(file, (3, 1), {'iframes': 1}) for file in files_to_convert]
+
+    config.set_processes(2)
+    try:
+        with patch('notes_converter.convert_files_in_processes', return_value=iter(file_conversion_results)) \
+                as mock_convert_files_in_processes, \
+                patch('notes_converter.add_cache_statistics') as mock_add_cache_statistics, \
+                patch('notes_converter.add_skipped_stage_counts') as mock_add_skipped_stage_counts:
+            nc.process_files(files_to_convert, file_converter)
+    finally:
+        config.set_processes(1)
+
+    mock_convert_files_in_processes.assert_called_once_with(file_converter, nc.conversion_settings, files_to_convert,
+                                                            2)
+    assert nc._note_page_count == 2
+    assert mock_add_cache_statistics.call_count == 2
+    mock_add_cache_statistics.assert_called_with(3, 1)
+    mock_add_skipped_stage_counts.assert_called_with({'iframes': 1})
+
+
 @pytest.mark.parametrize(
     'silent_mode, expected_out', [
         (True, ''),
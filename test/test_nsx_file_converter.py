@@ -3,6 +3,7 @@ from pathlib import Path
 import pytest
 
 import config
+import file_writer
 import nsx_file_converter
 import pandoc_converter
 import sn_note_page
@@ -43,7 +44,7 @@ def test_generate_note_page_filename_and_path(nsx, conv_setting):
 def test_fetch_json_data(conv_setting):
     nsx_fc = nsx_file_converter.NSXFile('fake_file', conv_setting, 'fake_pandoc_converter')
 
-    with patch('zip_file_reader.read_json_data', spec=True, return_value='fake_json') as mock_read_json_data:
+    with patch('zip_file_reader.NSXArchive.read_json_data', spec=True, return_value='fake_json') as mock_read_json_data:
         result = nsx_fc.fetch_json_data('data_id')
 
         assert result == 'fake_json'
@@ -52,17 +53,26 @@ def test_fetch_json_data(conv_setting):
 def test_fetch_attachment_file(conv_setting):
     nsx_fc = nsx_file_converter.NSXFile('fake_file', conv_setting, 'fake_pandoc_converter')
 
-    with patch('zip_file_reader.read_binary_file', spec=True, return_value='fake_binary') as mock_read_binary_file:
+    with patch('zip_file_reader.NSXArchive.read_binary_file', spec=True, return_value='fake_binary') as mock_read_binary_file:
         result = nsx_fc.fetch_attachment_file('data_id')
 
         assert result == 'fake_binary'
 
 
+def test_open_attachment_file(conv_setting):
+    nsx_fc = nsx_file_converter.NSXFile('fake_file', conv_setting, 'fake_pandoc_converter')
+
+    with patch('zip_file_reader.NSXArchive.open_member', spec=True, return_value='fake_file_object'):
+        result = nsx_fc.open_attachment_file('data_id')
+
+        assert result == 'fake_file_object'
+
+
 def test_add_notebooks(conv_setting):
     nsx_fc = nsx_file_converter.NSXFile('fake_file', conv_setting, 'fake_pandoc_converter')
 
     nsx_fc._notebook_ids = ['1234', 'abcd']
-    with patch('zip_file_reader.read_json_data', spec=True, return_value={'title': "notebook"}) as mock_read_json_data:
+    with patch('zip_file_reader.NSXArchive.read_json_data', spec=True, return_value={'title': "notebook"}) as mock_read_json_data:
         nsx_fc.add_notebooks()
 
     assert nsx_fc.note_book_count == 2
@@ -77,7 +87,7 @@ def test_add_notebooks(conv_setting):
 def test_fetch_notebook_title(conv_setting, json, expected):
     nsx_fc = nsx_file_converter.NSXFile('fake_file', conv_setting, 'fake_pandoc_converter')
 
-    with patch('zip_file_reader.read_json_data', spec=True, return_value=json) as mock_read_json_data:
+    with patch('zip_file_reader.NSXArchive.read_json_data', spec=True, return_value=json) as mock_read_json_data:
         result = nsx_fc.fetch_notebook_title('1234')
 
     assert result == expected
@@ -140,7 +150,7 @@ def test_add_note_pages(conv_setting, caplog, silent_mode):
 
     nsx_fc._note_page_ids = ['1234']
 
-    with patch('zip_file_reader.read_json_data', spec=True, return_value={'title': 'note title', 'ctime': 1620808218, 'mtime': 1620808218, 'parent_id': '1234'}) as mock_read_json_data:
+    with patch('zip_file_reader.NSXArchive.read_json_data', spec=True, return_value={'title': 'note title', 'ctime': 1620808218, 'mtime': 1620808218, 'parent_id': '1234'}) as mock_read_json_data:
         caplog.clear()
         nsx_fc.add_note_pages()
 
@@ -219,8 +229,55 @@ def test_store_attachments(notebooks, all_notes_dict, conv_setting, silent_mode)
     nsx_fc.add_note_pages_to_notebooks()
     nsx_fc.process_notebooks()
 
-    with patch('nsx_file_converter.NSXFile.fetch_attachment_file', autospec=True):
+    with patch('nsx_file_converter.NSXFile.open_attachment_file', autospec=True):
         with patch('file_writer.store_file', spec=True) as mock_store_file:
             nsx_fc.store_attachments()
 
         assert mock_store_file.call_count == 4
+
+
+class FakeAttachment:
+    def __init__(self, full_path, stored_copy=None):
+        self.full_path = full_path
+        self.stored_copy = stored_copy
+
+    @staticmethod
+    def get_content_to_save():
+        return b'attachment content'
+
+
+class FakeNotePage:
+    def __init__(self, attachments):
+        self.attachments = attachments
+
+
+def test_store_attachments_writes_each_stored_attachment_once(conv_setting, tmp_path, silent):
+    nsx_fc = nsx_file_converter.NSXFile('fake_file', conv_setting, pandoc_converter.PandocConverter(conv_setting))
+    stored_path = Path(tmp_path, 'image.png')
+    nsx_fc._note_pages = {
+        1: FakeNotePage({'a': FakeAttachment(stored_path)}),
+        2: FakeNotePage({'a': FakeAttachment(stored_path, stored_copy=stored_path)}),
+        3: FakeNotePage({'a': FakeAttachment(Path(tmp_path, 'image-copy.png'), stored_copy=stored_path)}),
+    }
+
+    with patch('file_writer.store_file', wraps=file_writer.store_file) as mock_store_file:
+        nsx_fc.store_attachments()
+
+    mock_store_file.assert_called_once()
+    assert Path(tmp_path, 'image-copy.png').read_bytes() == b'attachment content'
+    assert Path(tmp_path, 'image-copy.png').stat().st_ino == stored_path.stat().st_ino
+
+
+def test_create_folders_creates_shared_attachment_folder_first(conv_setting, tmp_path):
+    nsx_fc = nsx_file_converter.NSXFile('fake_file', conv_setting, pandoc_converter.PandocConverter(conv_setting))
+    Path(tmp_path, config.DATA_DIR, 'notes').mkdir(parents=True)
+    nsx_fc._notebooks = {'attachments_notebook': sn_notebook.Notebook(nsx_fc, 'attachments_notebook', 'attachments')}
+
+    config.set_attachment_store('shared')
+    try:
+        nsx_fc.create_folders()
+    finally:
+        config.set_attachment_store('copy')
+
+    assert Path(tmp_path, config.DATA_DIR, 'notes', 'attachments').is_dir()
+    assert nsx_fc.notebooks['attachments_notebook'].folder_name == 'attachments-1'
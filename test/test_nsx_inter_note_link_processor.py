@@ -252,4 +252,61 @@ def test_update_content_use_only_title_matched_notes_content_with_valid_link_tha
 
     result = link_processor.update_content(content)
 
-    assert result == content
\ No newline at end of file
+    assert result == content
+
+def test_match_renamed_links_keeps_link_order_and_reports_unmatched_links(all_notes):
+    link_processor = nsx_inter_note_link_processor.NSXInterNoteLinkProcessor()
+    link_processor.make_list_of_links(all_notes)
+    expected_order = [link for link in link_processor.replacement_links]
+    link_processor.match_link_title_to_notes(all_notes)
+    link_processor.match_renamed_links_using_link_ref_id()
+
+    assert link_processor.replacement_links == [link for link in expected_order
+                                                if link not in link_processor.renamed_links_not_corrected]
+    assert link_processor.unmatched_links_msg == 'The following link(s) could not be corrected.\n' \
+                                                 'On page - Page 11 title - <a href="notestation://remote/self/1234-10">Page 10 renamed</a>\n'
+
+
+class FakeNote:
+    def __init__(self, number, raw_content):
+        self.title = f'Page {number}'
+        self.original_title = f'Page {number}'
+        self.raw_content = raw_content
+        self.parent_notebook = number % 10
+        self.notebook_folder_name = f'notebook-{number % 10}'
+        self.file_name = f'page-{number}.md'
+
+
+def test_link_matching_scales_with_number_of_notes_and_links():
+    number_of_notes = 20000
+    notes = [FakeNote(number,
+                      f'<a href="notestation://remote/self/id-{(number + 1) % number_of_notes}">Page {(number + 1) % number_of_notes}</a>'
+                      f'<a href="notestation://remote/self/id-{(number + 2) % number_of_notes}">Renamed page</a>')
+             for number in range(number_of_notes)]
+
+    link_processor = nsx_inter_note_link_processor.NSXInterNoteLinkProcessor()
+    link_processor.make_list_of_links(notes)
+    link_processor.match_link_title_to_notes(notes)
+    link_processor.match_renamed_links_using_link_ref_id()
+
+    assert len(link_processor.replacement_links) == 2 * number_of_notes
+    assert not link_processor.renamed_links_not_corrected
+    assert link_processor.replacement_links[1].target_notes == [notes[2]]
+
+
+def test_update_content_uses_links_generated_for_the_source_note():
+    link = '<a href="notestation://remote/self/id-2">Page 2</a>'
+    notes = [FakeNote(0, link), FakeNote(12, link), FakeNote(2, 'no links')]
+    link_processor = nsx_inter_note_link_processor.NSXInterNoteLinkProcessor()
+    link_processor.make_list_of_links(notes)
+    link_processor.match_link_title_to_notes(notes)
+    link_processor.match_renamed_links_using_link_ref_id()
+
+    content = f'<p>{link}</p><p>{link}</p>'
+
+    assert link_processor.update_content(content, notes[0]) == \
+           '<p><a href="../notebook-2/page-2.md">Page 2</a></p><p><a href="../notebook-2/page-2.md">Page 2</a></p>'
+    for _ in range(2):
+        assert link_processor.update_content(content, notes[1]) == \
+               '<p><a href="page-2.md">Page 2</a></p><p><a href="page-2.md">Page 2</a></p>'
+    assert link_processor.update_content(content, notes[2]) == content
@@ -86,8 +86,8 @@ Below is an image of the design of the line chart as seen in note-station
 
 ![|600]()
 """
-    # replace the generated 15 digit id-numbers with placeholder text to allow comparison
-    regex = r"\d{15}"
+    # replace the generated 15 digit id-numbers and chart file names with placeholder text to allow comparison
+    regex = r"chart-[0-9a-f]{16}|\d{15}"
     test_string = note_1.converted_content
     substitute_text = 'replaced_id_number'
     result = re.sub(regex, substitute_text, test_string, 0, re.MULTILINE)
@@ -135,8 +135,8 @@ Below is an image of the design of the line chart as seen in note-station
 <img src="" width="600" />
 
 """
-    # replace the generated 15 digit id-numbers with placeholder text to allow comparison
-    regex = r"\d{15}"
+    # replace the generated 15 digit id-numbers and chart file names with placeholder text to allow comparison
+    regex = r"chart-[0-9a-f]{16}|\d{15}"
     test_string = note_1.converted_content
     substitute_text = 'replaced_id_number'
     result = re.sub(regex, substitute_text, test_string, 0, re.MULTILINE)
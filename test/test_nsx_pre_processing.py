@@ -1,3 +1,4 @@
+from bs4 import BeautifulSoup
 from mock import patch
 import re
 
@@ -37,11 +38,12 @@ def note_1(nsx):
 def test_pre_process_note_page(note_1):
     note_1.pre_process_content()
 
-    output_html_regx = r"""<head><title> </title></head><p>Pie Chart</p><p></p><p><p><img src='attachments/\d{15}\.png'></p><p><a href='attachments/\d{15}\.csv'>Chart data file</a></p><p><table border="1" class="dataframe"><thead><tr style="text-align: right;"><th><strong></strong></th><th><strong>cost</strong></th><th><strong>price</strong></th><th><strong>value</strong></th><th><strong>total value</strong></th><th><strong>sum</strong></th><th><strong>percent</strong></th></tr></thead><tbody><tr><th><strong>something</strong></th><td>500</td><td>520</td><td>540</td><td>520</td><td>2080</td><td>32.10</td></tr><tr><th><strong>something else</strong></th><td>520</td><td>540</td><td>560</td><td>540</td><td>2160</td><td>33.33</td></tr><tr><th><strong>another thing</strong></th><td>540</td><td>560</td><td>580</td><td>560</td><td>2240</td><td>34.57</td></tr></tbody></table></p></p><p>iframe-placeholder-id-\d{15}</p><p>Below is a hyperlink to the internet</p><p><a href="https://github.com/kevindurston21/YANOM-Note-O-Matic">https://github.com/kevindurston21/YANOM-Note-O-Matic</a></p><p>Below is a 3x3 Table</p><p><table border="1" style="width: 240px; height: 90px;"><thead><tr><td><strong>cell R1C1</strong></td><td><strong>cell R1C2</strong></td><td><strong>cell R1C3</strong></td></tr></thead><tbody><tr><td><strong>cell R2C1</strong></td><td>cell R1C2</td><td>cell R1C3</td></tr><tr><td><strong>cell R3C1</strong></td><td>cell R1C2</td><td>cell R1C3</td></tr></tbody></table></p><p>Below is an image of the design of the line chart as seen in note-station</p><p><img src="" width="600"/></p>"""
+    output_html_regx = r"""<head><title> </title></head><p>Pie Chart</p><p></p><p><p><img src='attachments/chart-[0-9a-f]{16}\.png'></p><p><a href='attachments/chart-[0-9a-f]{16}\.csv'>Chart data file</a></p><p><table border="1" class="dataframe"><thead><tr style="text-align: right;"><th><strong></strong></th><th><strong>cost</strong></th><th><strong>price</strong></th><th><strong>value</strong></th><th><strong>total value</strong></th><th><strong>sum</strong></th><th><strong>percent</strong></th></tr></thead><tbody><tr><th><strong>something</strong></th><td>500</td><td>520</td><td>540</td><td>520</td><td>2080</td><td>32.10</td></tr><tr><th><strong>something else</strong></th><td>520</td><td>540</td><td>560</td><td>540</td><td>2160</td><td>33.33</td></tr><tr><th><strong>another thing</strong></th><td>540</td><td>560</td><td>580</td><td>560</td><td>2240</td><td>34.57</td></tr></tbody></table></p></p><p>iframe-placeholder-id-\d{15}-end</p><p>Below is a hyperlink to the internet</p><p><a href="https://github.com/kevindurston21/YANOM-Note-O-Matic">https://github.com/kevindurston21/YANOM-Note-O-Matic</a></p><p>Below is a 3x3 Table</p><p><table border="1" style="width: 240px; height: 90px;"><thead><tr><td><strong>cell R1C1</strong></td><td><strong>cell R1C2</strong></td><td><strong>cell R1C3</strong></td></tr></thead><tbody><tr><td><strong>cell R2C1</strong></td><td>cell R1C2</td><td>cell R1C3</td></tr><tr><td><strong>cell R3C1</strong></td><td>cell R1C2</td><td>cell R1C3</td></tr></tbody></table></p><p>Below is an image of the design of the line chart as seen in note-station</p><p><img src="" width="600"/></p>"""
 
     result = note_1.pre_processed_content
     match = re.findall(output_html_regx, result)
-    # Note output_html_regx string uses '\d{15}\' to replace the id numbers in the actual html output
+    # Note output_html_regx string uses '\d{15}' and 'chart-[0-9a-f]{16}' to replace the id numbers and chart file
+    # names in the actual html output
     # and escapes the full stop before the file extension
 
     assert result == match[0]
@@ -55,11 +57,49 @@ def test_pre_process_note_page_1(note_1):
 
     note_1.pre_process_content()
 
-    output_html_regx = """<p>Pie Chart</p><p></p><p><p><img src='attachments/\d{15}\.png'></p><p><a href='attachments/\d{15}\.csv'>Chart data file</a></p><p><table border="1" class="dataframe"><thead><tr style="text-align: right;"><th><strong></strong></th><th><strong>cost</strong></th><th><strong>price</strong></th><th><strong>value</strong></th><th><strong>total value</strong></th><th><strong>sum</strong></th><th><strong>percent</strong></th></tr></thead><tbody><tr><th><strong>something</strong></th><td>500</td><td>520</td><td>540</td><td>520</td><td>2080</td><td>32.10</td></tr><tr><th><strong>something else</strong></th><td>520</td><td>540</td><td>560</td><td>540</td><td>2160</td><td>33.33</td></tr><tr><th><strong>another thing</strong></th><td>540</td><td>560</td><td>580</td><td>560</td><td>2240</td><td>34.57</td></tr></tbody></table></p></p><p>iframe-placeholder-id-\d{15}</p><p>Below is a hyperlink to the internet</p><p><a href="https://github.com/kevindurston21/YANOM-Note-O-Matic">https://github.com/kevindurston21/YANOM-Note-O-Matic</a></p><p>Below is a 3x3 Table</p><p><table border="1" style="width: 240px; height: 90px;"><tbody><tr><td><b>cell R1C1</b></td><td><b>cell R1C2</b></td><td><b>cell R1C3</b></td></tr><tr><td>cell R2C1</td><td>cell R1C2</td><td>cell R1C3</td></tr><tr><td>cell R3C1</td><td>cell R1C2</td><td>cell R1C3</td></tr></tbody></table></p><p>Below is an image of the design of the line chart as seen in note-station</p><p><img src="" width="600"/></p>"""
+    output_html_regx = r"""<p>Pie Chart</p><p></p><p><p><img src='attachments/chart-[0-9a-f]{16}\.png'></p><p><a href='attachments/chart-[0-9a-f]{16}\.csv'>Chart data file</a></p><p><table border="1" class="dataframe"><thead><tr style="text-align: right;"><th><strong></strong></th><th><strong>cost</strong></th><th><strong>price</strong></th><th><strong>value</strong></th><th><strong>total value</strong></th><th><strong>sum</strong></th><th><strong>percent</strong></th></tr></thead><tbody><tr><th><strong>something</strong></th><td>500</td><td>520</td><td>540</td><td>520</td><td>2080</td><td>32.10</td></tr><tr><th><strong>something else</strong></th><td>520</td><td>540</td><td>560</td><td>540</td><td>2160</td><td>33.33</td></tr><tr><th><strong>another thing</strong></th><td>540</td><td>560</td><td>580</td><td>560</td><td>2240</td><td>34.57</td></tr></tbody></table></p></p><p>iframe-placeholder-id-\d{15}-end</p><p>Below is a hyperlink to the internet</p><p><a href="https://github.com/kevindurston21/YANOM-Note-O-Matic">https://github.com/kevindurston21/YANOM-Note-O-Matic</a></p><p>Below is a 3x3 Table</p><p><table border="1" style="width: 240px; height: 90px;"><tbody><tr><td><b>cell R1C1</b></td><td><b>cell R1C2</b></td><td><b>cell R1C3</b></td></tr><tr><td>cell R2C1</td><td>cell R1C2</td><td>cell R1C3</td></tr><tr><td>cell R3C1</td><td>cell R1C2</td><td>cell R1C3</td></tr></tbody></table></p><p>Below is an image of the design of the line chart as seen in note-station</p><p><img src="" width="600"/></p>"""
 
     result = note_1.pre_processed_content
     match = re.findall(output_html_regx, result)
-    # Note output_html_regx string uses '\d{15}\' to replace the chart id number in the actual html output
+    # Note output_html_regx string uses 'chart-[0-9a-f]{16}' to replace the chart file names in the actual html output
     # and escapes the full stop before the file extension
 
     assert result == match[0]
+
+
+def test_pre_process_note_page_parses_note_once(note_1):
+    original_init = BeautifulSoup.__init__
+
+    with patch.object(BeautifulSoup, '__init__', autospec=True, side_effect=original_init) as mock_init:
+        note_1.pre_process_content()
+
+        assert mock_init.call_count == 1
+
+    assert 'iframe-placeholder-id-' in note_1.pre_processed_content
+    assert 'syno-ns-chart-object' not in note_1.pre_processed_content
+
+
+def test_pre_process_note_page_with_metadata_formats_chart_elements(note_1):
+    note_1.conversion_settings.metadata_schema = ['title']
+
+    note_1.pre_process_content()
+
+    assert note_1.pre_processed_content.startswith('<head><title>Page 1 title</title><meta title="Page 1 title"/></head>')
+    assert re.search(r'<p><img src="attachments/chart-[0-9a-f]{16}\.png"/></p>', note_1.pre_processed_content)
+
+
+def test_pre_process_note_page_skips_stages_with_nothing_to_process(note_1):
+    note_1._raw_content = '<div>Below is a hyperlink to the internet</div><div><a href="https://github.com/kevindurston21/YANOM-Note-O-Matic">https://github.com/kevindurston21/YANOM-Note-O-Matic</a></div>'
+
+    with patch('nsx_pre_processing.NSXChartProcessor') as mock_chart_processor, \
+            patch('nsx_pre_processing.NSXInputMDOutputChecklistProcessor') as mock_checklist_processor, \
+            patch('nsx_pre_processing.record_skipped_stage') as mock_record_skipped_stage:
+        note_1.pre_process_content()
+
+    mock_chart_processor.assert_not_called()
+    mock_checklist_processor.assert_not_called()
+    assert [call.args[0] for call in mock_record_skipped_stage.call_args_list] == ['iframes', 'checklists', 'charts',
+                                                                                   'tables']
+    assert note_1.pre_processor.checklist_processor is None
+    assert note_1.pre_processor.iframes_dict == {}
+    assert note_1.pre_processed_content == '<head><title> </title></head><p>Below is a hyperlink to the internet</p><p><a href="https://github.com/kevindurston21/YANOM-Note-O-Matic">https://github.com/kevindurston21/YANOM-Note-O-Matic</a></p>'
@@ -0,0 +1,89 @@
+from concurrent.futures import Future
+from pathlib import Path
+import shutil
+
+from mock import patch
+import pytest
+
+import config
+import conversion_settings
+import nsx_file_converter
+import nsx_process_pool
+import pandoc_converter
+from path_allocator import path_allocator
+
+
+@pytest.fixture
+def nsx_files(tmp_path):
+    Path(tmp_path, config.DATA_DIR).mkdir()
+    test_nsx = Path(Path(__file__).parent, 'conversion_test_inputs', 'test.nsx')
+    files = [Path(tmp_path, config.DATA_DIR, 'user1.nsx'), Path(tmp_path, config.DATA_DIR, 'user2.nsx')]
+    for nsx_file in files:
+        shutil.copy(test_nsx, nsx_file)
+    return files
+
+
+@pytest.fixture
+def html_conversion_settings(tmp_path):
+    cs = conversion_settings.ConversionSettings()
+    cs.set_quick_setting('html')
+    cs.working_directory = tmp_path
+    return cs
+
+
+def test_convert_nsx_files_in_processes_matches_serial(tmp_path, nsx_files, html_conversion_settings, silent):
+    serial_nsx_file = nsx_file_converter.NSXFile(nsx_files[0], html_conversion_settings,
+                                                 pandoc_converter.PandocConverter(html_conversion_settings))
+    serial_nsx_file.process_nsx_file()
+    shutil.rmtree(Path(tmp_path, config.DATA_DIR, 'notes'))
+    path_allocator().reset()
+
+    results = nsx_process_pool.convert_nsx_files_in_processes(nsx_files, html_conversion_settings, 2)
+
+    assert [result.nsx_file_name for result in results] == nsx_files
+    for result in results:
+        assert (result.note_page_count, result.note_book_count, result.image_count, result.attachment_count) == \
+               (serial_nsx_file.note_page_count, serial_nsx_file.note_book_count, serial_nsx_file.image_count,
+                serial_nsx_file.attachment_count)
+        assert len(result.inter_note_link_processor.replacement_links) == \
+               len(serial_nsx_file.inter_note_link_processor.replacement_links)
+        assert result.inter_note_link_processor.unmatched_links_msg == \
+               serial_nsx_file.inter_note_link_processor.unmatched_links_msg
+
+    # each file's notebooks are given their own folders
+    notebook_folders = [folder for folder in Path(tmp_path, config.DATA_DIR, 'notes').iterdir() if folder.is_dir()]
+    assert len(notebook_folders) == 2 * len(serial_nsx_file.notebooks)
+
+
+class FakeProcessPoolExecutor:
+    submitted = []
+
+    def __init__(self, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def submit(self, function, nsx_file, conversion_settings):
+        self.submitted.append(nsx_file)
+        future = Future()
+        future.set_result(nsx_file.name)
+        return future
+
+
+def test_convert_nsx_files_in_processes_starts_largest_first(tmp_path, html_conversion_settings):
+    nsx_files = []
+    for name, size in [('small.nsx', 10), ('large.nsx', 1000), ('medium.nsx', 100)]:
+        nsx_file = Path(tmp_path, name)
+        nsx_file.write_bytes(bytes(size))
+        nsx_files.append(nsx_file)
+
+    with patch('worker_processes.ProcessPoolExecutor', FakeProcessPoolExecutor):
+        results = nsx_process_pool.convert_nsx_files_in_processes(nsx_files, html_conversion_settings, 2)
+
+    assert [nsx_file.name for nsx_file in FakeProcessPoolExecutor.submitted] == ['large.nsx', 'medium.nsx',
+                                                                                 'small.nsx']
+    assert results == ['small.nsx', 'large.nsx', 'medium.nsx']
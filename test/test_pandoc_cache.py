@@ -0,0 +1,183 @@
+import sqlite3
+from unittest.mock import patch
+
+import pytest
+
+import config
+import conversion_settings
+import pandoc_cache
+import pandoc_converter
+
+
+@pytest.fixture
+def cache(tmp_path):
+    pandoc_cache_instance = pandoc_cache.PandocCache(tmp_path / 'cache' / 'pandoc_cache.db', 1000)
+    pandoc_cache_instance.open()
+    yield pandoc_cache_instance
+    pandoc_cache_instance.close()
+
+
+def test_open_creates_cache_file(tmp_path, cache):
+    assert cache.is_open
+    assert (tmp_path / 'cache' / 'pandoc_cache.db').exists()
+
+
+def test_open_with_invalid_path(tmp_path, caplog):
+    (tmp_path / 'not_a_dir').write_text('file')
+    cache = pandoc_cache.PandocCache(tmp_path / 'not_a_dir' / 'pandoc_cache.db', 1000)
+
+    assert not cache.open()
+    assert cache.fetch('key') is None
+    cache.store('key', 'output')
+    assert 'Unable to open pandoc cache' in caplog.text
+
+
+def test_fetch_and_store_count_hits_and_misses(cache):
+    assert cache.fetch('key') is None
+
+    cache.store('key', 'converted')
+
+    assert cache.fetch('key') == 'converted'
+    assert cache.hits == 1
+    assert cache.misses == 1
+
+
+def test_cache_persists_between_runs(tmp_path, cache):
+    cache.store('key', 'converted')
+    cache.close()
+
+    reopened = pandoc_cache.PandocCache(tmp_path / 'cache' / 'pandoc_cache.db', 1000)
+    reopened.open()
+
+    assert reopened.fetch('key') == 'converted'
+    assert reopened.total_size == len('converted')
+    reopened.close()
+
+
+@pytest.mark.parametrize(
+    'input_data, pandoc_options, pandoc_version', [
+        ('other text', ['pandoc', '-f', 'html', '-t', 'gfm'], '3.1'),
+        ('text', ['pandoc', '-f', 'html', '-t', 'commonmark'], '3.1'),
+        ('text', ['pandoc', '-f', 'html', '-t', 'gfm'], '2.19'),
+    ], ids=['input', 'options', 'version']
+)
+def test_make_key_changes_with_input_options_and_version(input_data, pandoc_options, pandoc_version):
+    key = pandoc_cache.PandocCache.make_key('text', ['pandoc', '-f', 'html', '-t', 'gfm'], '3.1')
+
+    assert key == pandoc_cache.PandocCache.make_key('text', ['pandoc', '-f', 'html', '-t', 'gfm'], '3.1')
+    assert key != pandoc_cache.PandocCache.make_key(input_data, pandoc_options, pandoc_version)
+
+
+def test_store_evicts_least_recently_used_when_full(cache):
+    cache.store('one', 'a' * 400)
+    cache.store('two', 'b' * 400)
+    cache.fetch('one')
+
+    cache.store('three', 'c' * 400)
+
+    assert cache.total_size == 800
+    assert cache.fetch('two') is None
+    assert cache.fetch('one') == 'a' * 400
+    assert cache.fetch('three') == 'c' * 400
+
+
+def test_store_replacing_entry_keeps_total_size(cache):
+    cache.store('one', 'a' * 400)
+    cache.store('one', 'a' * 100)
+
+    assert cache.total_size == 100
+
+
+def test_store_output_larger_than_cache_is_not_stored(cache):
+    cache.store('big', 'a' * 1001)
+
+    assert cache.total_size == 0
+    assert cache.fetch('big') is None
+
+
+def test_fetch_database_error_is_a_miss(cache, caplog):
+    cache.close()
+    cache._connection = sqlite3.connect(':memory:')
+
+    assert cache.fetch('key') is None
+    assert cache.misses == 1
+    assert 'Unable to read from pandoc cache' in caplog.text
+
+
+def test_get_pandoc_cache_shared_and_statistics(tmp_path):
+    cache = pandoc_cache.get_pandoc_cache(tmp_path / 'pandoc_cache.db', 1000)
+
+    assert pandoc_cache.get_pandoc_cache(tmp_path / 'pandoc_cache.db', 1000) is cache
+
+    cache.store('key', 'converted')
+    cache.fetch('key')
+    cache.fetch('other')
+
+    assert pandoc_cache.cache_statistics() == (1, 1)
+
+    pandoc_cache.close_pandoc_caches()
+
+    assert not cache.is_open
+    assert pandoc_cache.cache_statistics() == (0, 0)
+
+
+def test_cache_statistics_include_worker_processes(tmp_path):
+    cache = pandoc_cache.get_pandoc_cache(tmp_path / 'pandoc_cache.db', 1000)
+    cache.fetch('key')
+
+    pandoc_cache.add_cache_statistics(3, 2)
+
+    assert pandoc_cache.cache_statistics() == (3, 3)
+
+    pandoc_cache.close_pandoc_caches()
+
+    assert pandoc_cache.cache_statistics() == (0, 0)
+
+
+@pytest.fixture
+def cached_pandoc_converter(tmp_path):
+    config.set_pandoc_cache(True)
+    cs = conversion_settings.ConversionSettings()
+    cs.conversion_input = 'nsx'
+    cs.export_format = 'gfm'
+    with patch('conversion_settings.ConversionSettings.working_directory', new=tmp_path):
+        yield pandoc_converter.PandocConverter(cs)
+    config.set_pandoc_cache(False)
+    pandoc_cache.close_pandoc_caches()
+
+
+def test_pandoc_converter_unchanged_notes_skip_pandoc(tmp_path, cached_pandoc_converter):
+    first_run = cached_pandoc_converter.convert_using_strings('<p>hello</p>', 'note')
+
+    with patch('subprocess.run', spec=True) as mock_run:
+        second_run = cached_pandoc_converter.convert_using_strings('<p>hello</p>', 'note')
+
+        mock_run.assert_not_called()
+
+    assert first_run == second_run == 'hello\n'
+    assert pandoc_cache.cache_statistics() == (1, 1)
+    assert (tmp_path / config.DATA_DIR / 'cache' / 'pandoc_cache.db').exists()
+
+
+def test_pandoc_converter_errors_are_not_cached(cached_pandoc_converter):
+    cached_pandoc_converter.pandoc_options = [cached_pandoc_converter._pandoc_path, '-fqwe', 'html']
+
+    cached_pandoc_converter.convert_using_strings('<p>hello</p>', 'note')
+    cached_pandoc_converter.convert_using_strings('<p>hello</p>', 'note')
+
+    assert pandoc_cache.cache_statistics() == (0, 2)
+
+
+def test_pandoc_converter_batch_only_converts_notes_not_in_cache(cached_pandoc_converter):
+    notes = ['<p>one</p>', '<p>two</p>', '<p>three</p>']
+    cached_pandoc_converter.convert_using_strings(notes[1], 'two')
+
+    with patch('pandoc_converter.PandocConverter._convert_batch', wraps=cached_pandoc_converter._convert_batch) \
+            as mock_convert_batch:
+        result = cached_pandoc_converter.convert_batch_using_strings(notes, ['one', 'two', 'three'])
+
+        mock_convert_batch.assert_called_once_with(['<p>one</p>', '<p>three</p>'])
+
+    assert result == ['one\n', 'two\n', 'three\n']
+    assert cached_pandoc_converter.convert_batch_using_strings(notes, ['one', 'two', 'three']) == result
+    assert pandoc_cache.cache_statistics() == (4, 3)
@@ -271,3 +271,241 @@ def test_set_pandoc_path(monkeypatch, is_linux, if_frozen, expected_ends_with):
     pandoc_processor.set_pandoc_path()
 
     assert pandoc_processor._pandoc_path.endswith(expected_ends_with)
+
+
+@pytest.fixture
+def nsx_gfm_pandoc_converter():
+    cs = conversion_settings.ConversionSettings()
+    cs.conversion_input = 'nsx'
+    cs.export_format = 'gfm'
+    return pandoc_converter.PandocConverter(cs)
+
+
+batch_notes = ['<p>Below is a hyperlink to the internet</p>',
+               '<ul><li>Bullet 1</li><li>Bullet 2<ul><li>Sub bullet 1</li></ul></li></ul>',
+               '<ol><li>Number 1</li><li>Number 2</li></ol>',
+               '<table border="1"><thead><tr><td><strong>R1C1</strong></td></tr></thead><tbody><tr><td>R2C1</td></tr></tbody></table>',
+               '<h1>This is H1</h1><p>This is <b>bold</b> and <i>italic</i></p>',
+               '<pre>if not files_to_convert:\n    exit(1)</pre>',
+               ]
+
+
+def test_convert_batch_using_strings_matches_convert_using_strings(nsx_gfm_pandoc_converter):
+    titles = [f'note {n}' for n in range(len(batch_notes))]
+    expected = [nsx_gfm_pandoc_converter.convert_using_strings(note, title) for note, title in zip(batch_notes, titles)]
+
+    with patch('pandoc_converter.PandocConverter.convert_using_strings', spec=True) as mock_convert_using_strings:
+        result = nsx_gfm_pandoc_converter.convert_batch_using_strings(batch_notes, titles)
+
+        mock_convert_using_strings.assert_not_called()
+
+    assert result == expected
+
+
+def test_convert_batch_using_strings_markdown_to_html():
+    cs = conversion_settings.ConversionSettings()
+    cs.conversion_input = 'markdown'
+    cs.markdown_conversion_input = 'gfm'
+    cs.export_format = 'html'
+    pandoc_processor = pandoc_converter.PandocConverter(cs)
+    notes = ['# Title\n\nhello', 'a list\n\n- x\n- y', '```\ncode\n```']
+    titles = ['a', 'b', 'c']
+    expected = [pandoc_processor.convert_using_strings(note, title) for note, title in zip(notes, titles)]
+
+    result = pandoc_processor.convert_batch_using_strings(notes, titles)
+
+    assert result == expected
+
+
+def test_convert_batch_using_strings_notes_with_head_converted_individually(nsx_gfm_pandoc_converter):
+    notes = ['<head><title>note 1</title></head><p>one</p>', '<p>two</p>', '<p>three</p>']
+
+    with patch('pandoc_converter.PandocConverter.convert_using_strings', spec=True,
+               return_value='individual') as mock_convert_using_strings:
+        result = nsx_gfm_pandoc_converter.convert_batch_using_strings(notes, ['a', 'b', 'c'])
+
+        mock_convert_using_strings.assert_called_once()
+
+    assert result == ['individual', 'two\n', 'three\n']
+
+
+def test_convert_batch_using_strings_falls_back_when_batch_fails(nsx_gfm_pandoc_converter, caplog):
+    titles = [f'note {n}' for n in range(len(batch_notes))]
+    expected = [nsx_gfm_pandoc_converter.convert_using_strings(note, title) for note, title in zip(batch_notes, titles)]
+    caplog.clear()
+
+    with patch('pandoc_converter.PandocConverter._split_batch', return_value=None):
+        result = nsx_gfm_pandoc_converter.convert_batch_using_strings(batch_notes, titles)
+
+    assert result == expected
+    assert 'converting the notes one at a time' in caplog.records[0].message
+
+
+def test_convert_batch_using_strings_falls_back_when_pandoc_errors(nsx_gfm_pandoc_converter):
+    notes = ['<p>one</p>', '<p>two</p>']
+    nsx_gfm_pandoc_converter.pandoc_options = [nsx_gfm_pandoc_converter._pandoc_path, '-fqwe', 'html', '-s', '-t', 'gfm']
+
+    with patch('pandoc_converter.PandocConverter.convert_using_strings', spec=True,
+               return_value='individual') as mock_convert_using_strings:
+        result = nsx_gfm_pandoc_converter.convert_batch_using_strings(notes, ['a', 'b'])
+
+        assert mock_convert_using_strings.call_count == 2
+
+    assert result == ['individual', 'individual']
+
+
+def test_split_batch_missing_marker_returns_none():
+    sentinel = 'yanombatchabc'
+    batch_output = f'{sentinel}n0\n\none\n\n{sentinel}n2\n'
+
+    assert pandoc_converter.PandocConverter._split_batch(sentinel, batch_output, 2) is None
+
+
+def test_convert_batch_using_strings_runs_pandoc_once_for_the_batch(nsx_gfm_pandoc_converter):
+    notes = [batch_notes[n % len(batch_notes)] for n in range(60)]
+    titles = [f'note {n}' for n in range(len(notes))]
+
+    with patch('pandoc_converter.subprocess.run', wraps=subprocess.run) as mock_run:
+        expected = [nsx_gfm_pandoc_converter.convert_using_strings(note, title) for note, title in zip(notes, titles)]
+    assert mock_run.call_count == len(notes)
+
+    with patch('pandoc_converter.subprocess.run', wraps=subprocess.run) as mock_run:
+        result = nsx_gfm_pandoc_converter.convert_batch_using_strings(notes, titles)
+    mock_run.assert_called_once()
+
+    assert result == expected
+
+
+@pytest.fixture
+def pandoc_server_config():
+    config.set_pandoc_server(True)
+    yield
+    config.set_pandoc_server(False)
+    pandoc_converter.stop_pandoc_servers()
+
+
+def test_start_pandoc_server_falls_back_when_server_can_not_start(pandoc_server_config, caplog):
+    cs = conversion_settings.ConversionSettings()
+    cs.conversion_input = 'nsx'
+    cs.export_format = 'gfm'
+
+    with patch('pandoc_converter.PandocServer.start', spec=True, return_value=False) as mock_start:
+        pandoc_processor = pandoc_converter.PandocConverter(cs)
+        pandoc_converter.PandocConverter(cs)
+
+        mock_start.assert_called_once()
+
+    assert pandoc_processor._pandoc_server is None
+    assert 'Pandoc server is not available' in caplog.text
+    assert pandoc_processor.convert_using_strings(batch_notes[0], 'note') == 'Below is a hyperlink to the internet\n'
+
+
+def test_start_pandoc_server_falls_back_when_server_output_differs(pandoc_server_config, caplog):
+    cs = conversion_settings.ConversionSettings()
+    cs.conversion_input = 'nsx'
+    cs.export_format = 'gfm'
+
+    with patch('pandoc_converter.PandocServer.start', spec=True, return_value=True):
+        with patch('pandoc_converter.PandocServer.convert', spec=True, return_value='different'):
+            pandoc_processor = pandoc_converter.PandocConverter(cs)
+
+    assert pandoc_processor._pandoc_server is None
+    assert 'Pandoc server is not available' in caplog.text
+
+
+def test_pandoc_server_start_with_invalid_path(caplog):
+    server = pandoc_converter.PandocServer('not_a_pandoc_path')
+
+    assert not server.start()
+    assert not server.is_running
+    assert server.convert('text', {'from': 'html', 'to': 'gfm'}) is None
+    assert 'Unable to start pandoc server' in caplog.text
+
+
+class FakePandocServer:
+    def __init__(self, output):
+        self.output = output
+        self.conversion_options = None
+
+    def convert(self, input_data, conversion_options):
+        self.conversion_options = conversion_options
+        return self.output
+
+
+def test_convert_using_strings_uses_pandoc_server(nsx_gfm_pandoc_converter):
+    nsx_gfm_pandoc_converter._pandoc_server = FakePandocServer('converted by server')
+
+    with patch('subprocess.run', spec=True) as mock_run:
+        result = nsx_gfm_pandoc_converter.convert_using_strings('<p>hello</p>', 'note')
+
+        mock_run.assert_not_called()
+
+    assert result == 'converted by server'
+    assert nsx_gfm_pandoc_converter._pandoc_server.conversion_options == {'from': 'html', 'to': 'gfm',
+                                                                        'standalone': True, 'wrap': 'none',
+                                                                        'markdown-headings': 'atx'}
+
+
+def test_convert_using_strings_falls_back_when_pandoc_server_fails(nsx_gfm_pandoc_converter, caplog):
+    nsx_gfm_pandoc_converter._pandoc_server = FakePandocServer(None)
+
+    result = nsx_gfm_pandoc_converter.convert_using_strings('<p>hello</p>', 'note')
+
+    assert result == 'hello\n'
+    assert 'Pandoc server conversion failed' in caplog.text
+
+
+@pytest.mark.parametrize(
+    'response, expected', [
+        (b'{"output": "hello\\n", "base64": false, "messages": []}', 'hello\n'),
+        (b'{"error": "Unknown input format"}', None),
+        (b'"Unknown input format"', None),
+        (b'not json', None),
+    ]
+)
+def test_pandoc_server_convert_response_handling(response, expected):
+    server = pandoc_converter.PandocServer('pandoc')
+    server._port = 3030
+
+    class FakeResponse:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            pass
+
+        def read(self):
+            return response
+
+    with patch('pandoc_converter.PandocServer.is_running', new=True):
+        with patch('urllib.request.urlopen', return_value=FakeResponse()) as mock_urlopen:
+            result = server.convert('<p>hello</p>', {'from': 'html', 'to': 'gfm'})
+
+            request = mock_urlopen.call_args[0][0]
+
+    assert result == expected
+    assert request.full_url == 'http://127.0.0.1:3030/'
+    assert request.data == b'{"from": "html", "to": "gfm", "text": "<p>hello</p>"}'
+
+
+def test_pandoc_server_converts_without_starting_pandoc_processes(pandoc_server_config):
+    cs = conversion_settings.ConversionSettings()
+    cs.conversion_input = 'nsx'
+    cs.export_format = 'gfm'
+    pandoc_processor = pandoc_converter.PandocConverter(cs)
+    if pandoc_processor._pandoc_server is None:
+        pytest.skip('pandoc server is not available with the installed pandoc')
+
+    notes = [batch_notes[n % len(batch_notes)] for n in range(12)]
+    server = pandoc_processor._pandoc_server
+    results = {}
+    pandoc_runs = {}
+
+    for name in ['command line', 'server']:
+        pandoc_processor._pandoc_server = server if name == 'server' else None
+        with patch('pandoc_converter.subprocess.run', wraps=subprocess.run) as mock_run:
+            results[name] = [pandoc_processor.convert_using_strings(note, f'note {n}') for n, note in enumerate(notes)]
+        pandoc_runs[name] = mock_run.call_count
+
+    assert results['server'] == results['command line']
+    assert pandoc_runs == {'command line': len(notes), 'server': 0}
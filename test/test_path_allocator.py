@@ -0,0 +1,78 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest.mock import patch
+
+import path_allocator
+
+
+def test_allocate_returns_path_if_not_in_use(tmp_path):
+    allocator = path_allocator.PathAllocator()
+
+    assert allocator.allocate(Path(tmp_path, 'image.png')) == Path(tmp_path, 'image.png')
+    assert allocator.is_in_use(Path(tmp_path, 'image.png'))
+
+
+def test_allocate_skips_existing_and_allocated_names(tmp_path):
+    Path(tmp_path, 'image.png').touch()
+    Path(tmp_path, 'image-2.png').touch()
+    allocator = path_allocator.PathAllocator()
+
+    result = [allocator.allocate(Path(tmp_path, 'image.png')).name for _ in range(3)]
+
+    assert result == ['image-1.png', 'image-3.png', 'image-4.png']
+
+
+def test_allocate_with_number_format(tmp_path):
+    Path(tmp_path, 'note.md').touch()
+    allocator = path_allocator.PathAllocator()
+
+    assert allocator.allocate(Path(tmp_path, 'note.md'), number_format='-old-{}') == Path(tmp_path, 'note-old-1.md')
+
+
+def test_allocate_directory_adds_number_to_the_whole_name(tmp_path):
+    Path(tmp_path, 'notes.v2').mkdir()
+    allocator = path_allocator.PathAllocator()
+
+    assert allocator.allocate(Path(tmp_path, 'notes.v2'), is_directory=True) == Path(tmp_path, 'notes.v2-1')
+
+
+def test_directory_is_read_once(tmp_path):
+    allocator = path_allocator.PathAllocator()
+
+    with patch.object(Path, 'iterdir', autospec=True, return_value=iter([])) as mock_iterdir:
+        for _ in range(1000):
+            allocator.allocate(Path(tmp_path, 'image.png'))
+
+    assert mock_iterdir.call_count == 1
+    assert allocator.allocate(Path(tmp_path, 'image.png')) == Path(tmp_path, 'image-1000.png')
+
+
+def test_allocate_using(tmp_path):
+    Path(tmp_path, 'file.txt').touch()
+    allocator = path_allocator.PathAllocator()
+
+    result = allocator.allocate_using(Path(tmp_path, 'file.txt'), lambda path: Path(path.parent, f'x{path.name}'))
+
+    assert result == Path(tmp_path, 'xfile.txt')
+    assert allocator.is_in_use(result)
+
+
+def test_reserve_and_release(tmp_path):
+    allocator = path_allocator.PathAllocator()
+    path = Path(tmp_path, 'file.txt')
+
+    assert allocator.reserve(path)
+    assert not allocator.reserve(path)
+
+    allocator.release(path)
+
+    assert not allocator.is_in_use(path)
+
+
+def test_concurrent_allocations_are_unique(tmp_path):
+    allocator = path_allocator.PathAllocator()
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        result = list(executor.map(lambda _: allocator.allocate(Path(tmp_path, 'image.png')), range(2000)))
+
+    assert len(set(result)) == 2000
@@ -0,0 +1,56 @@
+from unittest.mock import patch
+
+from placeholders import _PLACEHOLDER_PATTERN, make_placeholder, PlaceholderRegistry
+
+
+def test_restore_replaces_each_placeholder():
+    placeholders = PlaceholderRegistry()
+    placeholders.add('checklist-placeholder-id-1-end', '- [x] one')
+    placeholders.add('iframe-placeholder-id-22-end', '<iframe></iframe>')
+
+    result = placeholders.restore('a checklist-placeholder-id-1-end\n iframe-placeholder-id-22-end b')
+
+    assert result == 'a - [x] one\n <iframe></iframe> b'
+
+
+def test_restore_removes_leading_spaces_when_required():
+    placeholders = PlaceholderRegistry(remove_leading_spaces=True)
+    placeholders.add('checklist-placeholder-id-1-end', '- [ ] one\n')
+
+    assert placeholders.restore('text\n    checklist-placeholder-id-1-end') == 'text\n- [ ] one\n'
+
+
+def test_restore_leaves_unknown_placeholders_and_uses_replacement_as_is():
+    placeholders = PlaceholderRegistry(remove_leading_spaces=True)
+    placeholders.add('checklist-placeholder-id-1-end', r'- [ ] c:\new\1')
+
+    result = placeholders.restore(' checklist-placeholder-id-12-end checklist-placeholder-id-1-end')
+
+    assert result == r' checklist-placeholder-id-12-end- [ ] c:\new\1'
+
+
+def test_restore_placeholder_followed_by_digits():
+    placeholders = PlaceholderRegistry()
+    placeholders.add('iframe-placeholder-id-1-end', '<iframe></iframe>')
+
+    assert placeholders.restore('iframe-placeholder-id-1-end2021 trip') == '<iframe></iframe>2021 trip'
+
+
+def test_make_placeholder():
+    item = object()
+
+    assert make_placeholder('chart', item) == f'chart-placeholder-id-{id(item)}-end'
+
+
+def test_restore_replaces_every_placeholder_in_one_scan_of_the_content():
+    placeholders = PlaceholderRegistry(remove_leading_spaces=True)
+    items = [object() for _ in range(1000)]
+    for n, item in enumerate(items):
+        placeholders.add(make_placeholder('checklist', item), f'- [ ] item {n}\n')
+    content = '\n'.join(f'  {make_placeholder("checklist", item)}' for item in items)
+
+    with patch('placeholders._PLACEHOLDER_PATTERN', wraps=_PLACEHOLDER_PATTERN) as mock_pattern:
+        result = placeholders.restore(content)
+
+    mock_pattern.sub.assert_called_once()
+    assert result == '\n'.join(f'- [ ] item {n}\n' for n in range(len(items)))
@@ -2,6 +2,7 @@ from pathlib import Path
 
 import pytest
 
+import config
 import sn_attachment
 import conversion_settings
 
@@ -11,6 +12,10 @@ class NSXFile:
     def fetch_attachment_file(ignored):
         return 'file name in nsx'
 
+    @staticmethod
+    def open_attachment_file(ignored):
+        return 'file object in nsx'
+
 class Note:
     def __init__(self):
         self.nsx_file = NSXFile()
@@ -61,7 +66,7 @@ def test_FileNSAttachment_get_content_to_save():
     file_attachment = sn_attachment.FileNSAttachment(note, attachment_id)
     result = file_attachment.get_content_to_save()
 
-    assert result == 'file name in nsx'
+    assert result == 'file object in nsx'
 
 
 def test_ImageNSAttachment_create_html_link():
@@ -114,6 +119,67 @@ def test_change_file_name_if_already_exists(tmp_path):
     assert len(str(image_attachment.full_path)) == len(str(Path(tmp_path, 'my_file.png'))) + 5  # 4 random chars and a dash
 
 
+@pytest.mark.parametrize(
+    'layout, expected_relative_path', [
+        ('shared', Path('..', 'attachments', 'my_name')),
+        ('hardlink', Path('attachments', 'my_name')),
+    ]
+)
+def test_process_attachment_using_attachment_store(tmp_path, layout, expected_relative_path):
+    first_note = Note()
+    first_note.conversion_settings.working_directory = tmp_path
+    second_note = Note()
+    second_note.conversion_settings.working_directory = tmp_path
+    second_note.notebook_folder_name = 'other_notebook'
+
+    config.set_attachment_store(layout)
+    try:
+        first_attachment = sn_attachment.FileNSAttachment(first_note, '1234')
+        first_attachment.process_attachment()
+        second_attachment = sn_attachment.FileNSAttachment(second_note, '1234')
+        second_attachment.process_attachment()
+    finally:
+        config.set_attachment_store('copy')
+
+    assert first_attachment.stored_copy is None
+    assert first_attachment.path_relative_to_notebook == expected_relative_path
+    assert second_attachment.stored_copy == first_attachment.full_path
+    if layout == 'shared':
+        assert second_attachment.full_path == first_attachment.full_path
+        assert second_attachment.html_link == '<a href="../attachments/my_name">my_name</a>'
+    else:
+        assert second_attachment.full_path == Path(tmp_path, config.DATA_DIR, 'notes', 'other_notebook',
+                                                   'attachments', 'my_name')
+
+
+def test_process_attachment_copy_layout_does_not_use_attachment_store(tmp_path):
+    note = Note()
+    note.conversion_settings.working_directory = tmp_path
+
+    first_attachment = sn_attachment.FileNSAttachment(note, '1234')
+    first_attachment.process_attachment()
+    second_attachment = sn_attachment.FileNSAttachment(note, '1234')
+    second_attachment.process_attachment()
+
+    assert second_attachment.stored_copy is None
+    assert second_attachment.full_path != first_attachment.full_path
+
+
+def test_chart_attachment_with_the_same_name_is_stored_once(tmp_path):
+    note = Note()
+    note.conversion_settings.working_directory = tmp_path
+
+    first_attachment = sn_attachment.ChartImageNSAttachment(note, 'chart-0123456789abcdef.png', 'image')
+    first_attachment.process_attachment()
+    second_attachment = sn_attachment.ChartImageNSAttachment(note, 'chart-0123456789abcdef.png', 'image')
+    second_attachment.process_attachment()
+
+    assert first_attachment.stored_copy is None
+    assert second_attachment.full_path == first_attachment.full_path
+    assert second_attachment.stored_copy == first_attachment.full_path
+    assert second_attachment.html_link == first_attachment.html_link
+
+
 def test_notebook_folder_name():
     note = Note()
     attachment_id = '1234'
@@ -165,3 +165,35 @@ def test_process_note(nsx, note_page_1, export_format, expected):
     note_page_1.process_note()
 
     assert note_page_1.converted_content == expected
+
+
+def test_process_note_reads_released_raw_content_from_nsx_file(nsx, note_page_1):
+    note_page_1.conversion_settings.export_format = 'html'
+    note_page_1.release_raw_content()
+
+    assert note_page_1.raw_content is None
+    assert 'content' not in note_page_1.note_json
+
+    with patch('nsx_file_converter.NSXFile.fetch_json_data',
+               return_value={'content': '<div>content read again</div>'}) as mock_fetch_json_data:
+        note_page_1.process_note()
+
+    mock_fetch_json_data.assert_called_once_with(note_page_1.note_id)
+    assert 'content read again' in note_page_1.converted_content
+
+
+def test_save_note_and_release_content(tmp_path, nsx, note_page_1):
+    note_page_1.conversion_settings.export_format = 'html'
+    note_page_1._full_path = Path(tmp_path, 'page-1-title.html')
+    note_page_1.process_note()
+    converted_content = note_page_1.converted_content
+
+    note_page_1.save_note()
+    note_page_1.release_content()
+
+    assert Path(tmp_path, 'page-1-title.html').read_text(encoding='utf-8') == converted_content
+    assert note_page_1.raw_content == ''
+    assert note_page_1.pre_processed_content == ''
+    assert note_page_1.converted_content == ''
+    assert 'content' not in note_page_1.note_json
+    assert note_page_1.title == 'Page 1 title'
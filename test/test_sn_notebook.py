@@ -1,8 +1,10 @@
 from mock import patch
 from pathlib import Path
 import pytest
+import tracemalloc
 
 import config
+from path_allocator import path_allocator
 import sn_note_page
 import sn_notebook
 
@@ -51,6 +53,41 @@ def test_create_notebook_folder_folder_already_exist(tmp_path, nsx, caplog):
     assert caplog.records[0].message == f'Creating notebook folder for {notebook_title}'
 
 
+def test_create_notebook_folder_created_by_another_process(tmp_path, nsx):
+    notebook = sn_notebook.Notebook(nsx, 'abcd', 'notebook1')
+    notebook.conversion_settings.export_folder_name = 'export-folder'
+    notebook.folder_name = 'notebook1'
+    export_folder = Path(tmp_path, config.DATA_DIR, 'export-folder')
+    export_folder.mkdir(parents=True)
+    # the allocator reads the export folder before another process creates the folder
+    path_allocator().is_in_use(Path(export_folder, 'notebook1'))
+    Path(export_folder, 'notebook1').mkdir()
+
+    notebook.create_notebook_folder()
+
+    assert notebook.folder_name == 'notebook1-1'
+    assert Path(export_folder, 'notebook1-1').is_dir()
+
+
+@pytest.mark.parametrize(
+    'folder_name, expected_folder_names', [
+        ('notes.v2', ['notes.v2', 'notes.v2-1']),
+        ('Dr. Who', ['Dr. Who', 'Dr. Who-1']),
+    ]
+)
+def test_create_notebook_folder_with_a_dot_in_the_name(tmp_path, nsx, folder_name, expected_folder_names):
+    folder_names = []
+    for _ in expected_folder_names:
+        notebook = sn_notebook.Notebook(nsx, 'abcd', folder_name)
+        notebook.conversion_settings.export_folder_name = 'export-folder'
+        notebook.folder_name = folder_name
+        notebook.create_notebook_folder()
+        folder_names.append(notebook.folder_name)
+
+    assert folder_names == expected_folder_names
+    assert all(Path(tmp_path, config.DATA_DIR, 'export-folder', name).is_dir() for name in expected_folder_names)
+
+
 def test_create_attachment_folder(tmp_path, nsx, caplog):
     config.set_logger_level("DEBUG")
     notebook_title = 'notebook1'
@@ -152,3 +189,134 @@ def test_process_notebook_pages(all_notes, tmp_path, nsx, silent_mode, expected,
     assert expected in captured.out
 
 
+
+
+@pytest.mark.parametrize(
+    'workers, batch_size', [
+        (4, 1),
+        (1, 4),
+        (2, 4),
+    ]
+)
+def test_process_notebook_pages_with_workers_matches_serial(nsx, workers, batch_size, silent):
+
+    def notebook_of_note_pages():
+        notebook = sn_notebook.Notebook(nsx, 'notebook_id_abcd', 'notebook1')
+        notebook.folder_name = 'notebook_folder'
+        for n in range(6):
+            note_page_json = {'parent_id': 'notebook_id_abcd', 'title': f'Page {n} title', 'mtime': 1619298559,
+                              'ctime': 1619298539, 'attachment': {}, 'tag': [n],
+                              'content': f'<div>Page {n}</div><div><b>bold {n}</b></div>'}
+            note_page = sn_note_page.NotePage(nsx, n, note_page_json)
+            notebook.pair_up_note_pages_and_notebooks(note_page)
+        return notebook
+
+    config.set_workers(1)
+    serial_notebook = notebook_of_note_pages()
+    serial_notebook.process_notebook_pages()
+
+    config.set_workers(workers)
+    config.set_batch_size(batch_size)
+    concurrent_notebook = notebook_of_note_pages()
+    try:
+        concurrent_notebook.process_notebook_pages()
+    finally:
+        config.set_workers(1)
+        config.set_batch_size(1)
+
+    assert [note.converted_content for note in concurrent_notebook.note_pages] == \
+           [note.converted_content for note in serial_notebook.note_pages]
+    assert 'bold 5' in concurrent_notebook.note_pages[5].converted_content
+
+
+@pytest.mark.parametrize(
+    'workers, batch_size', [
+        (1, 1),
+        (2, 2),
+    ]
+)
+def test_process_notebook_pages_streaming_saves_and_releases_each_note(tmp_path, nsx, workers, batch_size, silent):
+
+    def notebook_of_note_pages():
+        notebook = sn_notebook.Notebook(nsx, 'notebook_id_abcd', 'notebook1')
+        notebook.folder_name = 'notebook_folder'
+        for n in range(5):
+            note_page_json = {'parent_id': 'notebook_id_abcd', 'title': f'Page {n} title', 'mtime': 1619298559,
+                              'ctime': 1619298539, 'attachment': {}, 'tag': [n],
+                              'content': f'<div>Page {n}</div><div><b>bold {n}</b></div>'}
+            note_page = sn_note_page.NotePage(nsx, n, note_page_json)
+            note_page._full_path = Path(tmp_path, f'page-{n}.md')
+            notebook.pair_up_note_pages_and_notebooks(note_page)
+        return notebook
+
+    serial_notebook = notebook_of_note_pages()
+    serial_notebook.process_notebook_pages()
+
+    config.set_workers(workers)
+    config.set_batch_size(batch_size)
+    config.set_stream_notes(True)
+    streaming_notebook = notebook_of_note_pages()
+    try:
+        streaming_notebook.process_notebook_pages()
+    finally:
+        config.set_workers(1)
+        config.set_batch_size(1)
+        config.set_stream_notes(False)
+
+    assert [Path(tmp_path, f'page-{n}.md').read_text(encoding='utf-8') for n in range(5)] == \
+           [note.converted_content for note in serial_notebook.note_pages]
+    assert all(note.converted_content == '' and note.pre_processed_content == ''
+               for note in streaming_notebook.note_pages)
+
+
+def test_process_notebook_pages_streaming_memory_does_not_grow_with_number_of_notes(tmp_path, nsx, silent):
+    nsx.conversion_settings.export_format = 'html'
+    number_of_notes = 60
+    note_content = f'<div>{"x" * 100000}</div>'
+
+    def peak_memory_processing_notes(stream_notes):
+        notebook = sn_notebook.Notebook(nsx, 'notebook_id_abcd', 'notebook1')
+        notebook.folder_name = 'notebook_folder'
+        for n in range(number_of_notes):
+            note_page = sn_note_page.NotePage(nsx, n, {'parent_id': 'notebook_id_abcd', 'title': f'Page {n} title',
+                                                       'mtime': 1619298559, 'ctime': 1619298539, 'attachment': {}})
+            note_page._full_path = Path(tmp_path, f'page-{n}.html')
+            note_page.release_raw_content()
+            notebook.pair_up_note_pages_and_notebooks(note_page)
+
+        config.set_stream_notes(stream_notes)
+        tracemalloc.start()
+        try:
+            with patch('nsx_file_converter.NSXFile.fetch_json_data',
+                       side_effect=lambda note_id: {'content': note_content}):
+                notebook.process_notebook_pages()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+            config.set_stream_notes(False)
+
+    peak_holding_all_notes = peak_memory_processing_notes(stream_notes=False)
+    peak_streaming = peak_memory_processing_notes(stream_notes=True)
+
+    assert len(list(tmp_path.glob('page-*.html'))) == number_of_notes
+    assert peak_streaming < number_of_notes * len(note_content)
+    assert peak_streaming < peak_holding_all_notes / 2
+
+
+def test_pair_up_note_pages_and_notebooks_many_notes_with_same_title(nsx):
+    logger_level = config.logger_level
+    config.set_logger_level('INFO')
+    notebook = sn_notebook.Notebook(nsx, 'notebook_id_abcd', 'notebook1')
+    note_pages = [sn_note_page.NotePage(nsx, str(note_id), {'parent_id': 'notebook_id_abcd', 'title': 'Untitled',
+                                                            'mtime': 1619298559, 'ctime': 1619298539})
+                  for note_id in range(100000)]
+
+    for note_page in note_pages:
+        notebook.pair_up_note_pages_and_notebooks(note_page)
+
+    config.set_logger_level(logger_level)
+
+    assert note_pages[0].title == 'Untitled'
+    assert note_pages[1].title == 'Untitled-1'
+    assert note_pages[-1].title == 'Untitled-99999'
+    assert len(notebook.note_titles) == 100000
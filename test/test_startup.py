@@ -0,0 +1,75 @@
+import os
+from pathlib import Path
+import subprocess
+import sys
+
+import pytest
+
+import config
+
+SOURCE_DIRECTORY = Path(config.__file__).parent
+
+# cumulative import time of the module, in seconds, that a normal start up is expected to be well within
+IMPORT_TIME_BUDGET = 1.0
+
+HEAVY_MODULES = ['matplotlib', 'pandas', 'bs4', 'PyInquirer', 'pyfiglet']
+
+
+def import_times(module_name):
+    """
+    Import module_name in a new python process with -X importtime and return a dictionary of the cumulative import
+    time, in seconds, of every module imported.
+    """
+    environment = dict(os.environ, PYTHONPATH=str(SOURCE_DIRECTORY))
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module_name}'],
+                            cwd=SOURCE_DIRECTORY, env=environment, capture_output=True, text=True, check=True)
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        times[name.strip()] = int(cumulative) / 1_000_000
+
+    return times
+
+
+@pytest.mark.parametrize(
+    'module_name', [
+        'yanom',
+        'notes_converter',
+        'nsx_pre_processing',
+    ]
+)
+def test_start_up_does_not_import_heavy_modules(module_name):
+    imported_modules = import_times(module_name)
+
+    assert module_name in imported_modules
+    assert [module for module in HEAVY_MODULES if module in imported_modules] == []
+
+
+def test_notes_converter_import_time_within_budget():
+    imported_modules = import_times('notes_converter')
+
+    assert imported_modules['notes_converter'] < IMPORT_TIME_BUDGET
+
+
+def test_chart_data_table_and_csv_do_not_import_pandas():
+    script = '; '.join([
+        'import sys',
+        'import chart_processing',
+        'chart = chart_processing.ChartProcessor.PieChart()',
+        'chart.x_category_labels = ["cost", "price"]',
+        'chart.y_category_labels = ["something", "something else"]',
+        'chart.set_data([[500, 520], [540, 560]])',
+        'chart.prepare_chart_data()',
+        'chart.make_csv_chart_data_string()',
+        'chart.make_html_chart_data_table()',
+        'chart.image_cache_key',
+        'print(sorted(module for module in ("pandas", "matplotlib") if module in sys.modules))',
+    ])
+    result = subprocess.run([sys.executable, '-c', script], cwd=SOURCE_DIRECTORY,
+                            env=dict(os.environ, PYTHONPATH=str(SOURCE_DIRECTORY)), capture_output=True, text=True,
+                            check=True)
+
+    assert result.stdout.strip() == '[]'
@@ -40,6 +40,34 @@ def test_set_logging_level_invalid_arg():
         (['--cli'], ('cli', True)),
         (['-c'], ('cli', True)),
         (['--source', 'Notes'], ('source', 'Notes')),
+        (['--workers', '4'], ('workers', 4)),
+        (['-w', '2'], ('workers', 2)),
+        ([], ('workers', 1)),
+        (['--batch-size', '50'], ('batch_size', 50)),
+        (['-b', '10'], ('batch_size', 10)),
+        ([], ('batch_size', 1)),
+        (['--pandoc-server'], ('pandoc_server', True)),
+        ([], ('pandoc_server', False)),
+        (['--pandoc-cache'], ('pandoc_cache', True)),
+        ([], ('pandoc_cache', False)),
+        (['--pandoc-cache-size', '1024'], ('pandoc_cache_size', 1024)),
+        ([], ('pandoc_cache_size', 256)),
+        (['--write-behind'], ('write_behind', True)),
+        ([], ('write_behind', False)),
+        (['--write-queue-size', '16'], ('write_queue_size', 16)),
+        ([], ('write_queue_size', 64)),
+        (['--stream-notes'], ('stream_notes', True)),
+        ([], ('stream_notes', False)),
+        (['--incremental'], ('incremental', True)),
+        ([], ('incremental', False)),
+        (['--attachment-store', 'shared'], ('attachment_store', 'shared')),
+        ([], ('attachment_store', 'copy')),
+        (['-p', '4'], ('processes', 4)),
+        ([], ('processes', 1)),
+        (['--chart-processes', '2'], ('chart_processes', 2)),
+        ([], ('chart_processes', 0)),
+        (['--chart-cache'], ('chart_cache', True)),
+        ([], ('chart_cache', False)),
         ]
 )
 def test_command_line_parser(command_line_args, expected):
@@ -51,6 +79,13 @@ def test_command_line_parser(command_line_args, expected):
     'command_line_args, value', [
         (['-s', 'Notes'], '2'),
         (['-i', '-c'], '2'),
+        (['-w', '0'], '2'),
+        (['--workers', 'many'], '2'),
+        (['--batch-size', '-1'], '2'),
+        (['--write-queue-size', '0'], '2'),
+        (['--attachment-store', 'symlink'], '2'),
+        (['--processes', '0'], '2'),
+        (['--chart-processes', '0'], '2'),
         ]
 )
 def test_command_line_parser_bad_args(command_line_args, value):
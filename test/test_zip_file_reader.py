@@ -1,5 +1,6 @@
 import json
 from pathlib import Path
+from unittest.mock import patch
 import zipfile
 
 import config
@@ -192,4 +193,122 @@ def test_read_json_data_bad_file_name_in_silent_mode(tmp_path, caplog, capfd):
 
     out, err = capfd.readouterr()
     assert '' in out
-    assert err == ''
\ No newline at end of file
+    assert err == ''
+
+@pytest.fixture
+def zip_with_members(tmp_path):
+    zip_filename = Path(tmp_path, 'test_zip.zip')
+
+    with zipfile.ZipFile(str(zip_filename), 'w') as zip_file:
+        zip_file.writestr('file.txt', json.dumps({'key': 'value'}))
+        zip_file.writestr('file.bin', b'Hello World')
+
+    return zip_filename
+
+
+def test_nsx_archive_read_json_data(zip_with_members):
+    with zip_file_reader.NSXArchive(zip_with_members) as archive:
+        result = archive.read_json_data('file.txt')
+
+    assert result == {'key': 'value'}
+
+
+def test_nsx_archive_read_binary_file(zip_with_members):
+    with zip_file_reader.NSXArchive(zip_with_members) as archive:
+        result = archive.read_binary_file('file.bin')
+
+    assert result == b'Hello World'
+
+
+def test_nsx_archive_open_member(zip_with_members):
+    with zip_file_reader.NSXArchive(zip_with_members) as archive:
+        with archive.open_member('file.bin') as member:
+            result = member.read()
+
+    assert result == b'Hello World'
+
+
+def test_nsx_archive_open_member_bad_file_name(zip_with_members, caplog):
+    with pytest.raises(SystemExit) as exc:
+        with zip_file_reader.NSXArchive(zip_with_members) as archive:
+            archive.open_member('bad_file_name')
+
+    assert str(exc.value) == '1'
+    assert ('Error - unable to find the file ' in caplog.records[1].message)
+
+
+def test_nsx_archive_opens_once_and_closes_on_exit(zip_with_members):
+    archive = zip_file_reader.NSXArchive(zip_with_members)
+
+    with patch('zipfile.ZipFile', wraps=zipfile.ZipFile) as mock_zip_file:
+        with archive:
+            archive.read_json_data('file.txt')
+            archive.read_binary_file('file.bin')
+            archive.read_binary_file('file.bin')
+
+            assert archive.is_open
+            assert sorted(archive.member_names) == ['file.bin', 'file.txt']
+
+        mock_zip_file.assert_called_once()
+
+    assert not archive.is_open
+
+
+def test_nsx_archive_opens_on_first_read(zip_with_members):
+    archive = zip_file_reader.NSXArchive(zip_with_members)
+
+    assert not archive.is_open
+
+    result = archive.read_binary_file('file.bin')
+
+    assert result == b'Hello World'
+    assert archive.is_open
+    archive.close()
+
+
+def test_nsx_archive_read_binary_file_bad_file_name(zip_with_members, caplog, capfd):
+    config.set_silent(False)
+    with pytest.raises(SystemExit) as exc:
+        with zip_file_reader.NSXArchive(zip_with_members) as archive:
+            archive.read_binary_file('bad_file_name')
+
+    assert str(exc.value) == '1'
+
+    assert ('Error - unable to find the file ' in caplog.records[1].message)
+
+    out, err = capfd.readouterr()
+    assert 'Error - unable to find the file ' in out
+
+
+def test_nsx_archive_bad_zip_file_name(caplog, capfd):
+    config.set_silent(False)
+    with pytest.raises(SystemExit) as exc:
+        zip_file_reader.NSXArchive('bad_file_name').read_json_data('file.txt')
+
+    assert str(exc.value) == '1'
+
+    assert ('Error - unable to read zip file ' in caplog.records[1].message)
+
+    out, err = capfd.readouterr()
+    assert 'Error - unable to read zip file ' in out
+
+
+def test_nsx_archive_opens_the_zip_file_once_for_all_reads(tmp_path):
+    zip_filename = Path(tmp_path, 'test_zip.zip')
+    member_names = [f'note_{n}' for n in range(50)]
+
+    with zipfile.ZipFile(str(zip_filename), 'w') as zip_file:
+        for member_name in member_names:
+            zip_file.writestr(member_name, json.dumps({'title': member_name}))
+
+    with patch('zip_file_reader.zipfile.ZipFile', wraps=zipfile.ZipFile) as mock_zip_file:
+        for member_name in member_names:
+            zip_file_reader.read_json_data(zip_filename, member_name)
+    assert mock_zip_file.call_count == len(member_names)
+
+    with patch('zip_file_reader.zipfile.ZipFile', wraps=zipfile.ZipFile) as mock_zip_file:
+        with zip_file_reader.NSXArchive(zip_filename) as archive:
+            titles = [archive.read_json_data(member_name)['title'] for member_name in member_names]
+    mock_zip_file.assert_called_once()
+
+    assert titles == member_names